@@ -3,6 +3,11 @@ from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 from structure.Equipment import Equipment
 from default_values import default_component
+from instrumentation import get_logger, metrics
+
+REPAINT_INTERVAL_MS = 16 # coalesce repaint requests into at most one per frame (~60 Hz)
+
+log = get_logger('gui')
 
 class EventController():
     def __init__(self):
@@ -11,6 +16,35 @@ class EventController():
         self.project_name_input = None
         self.centerline_input = None
         self.fuselage_mass_input = None
+        self.repaint_timer = None
+        self.repaint_pending = False
+        self.repaint_active = None
+        self.repaint_refresh_editor = False
+
+    def request_repaint(self, setActive=None, refresh_editor=True):
+        """ Mark the plane view dirty. Requests arriving before the next frame are merged into
+            one repaint (CG, NP and stability are recomputed once), the last setActive wins. """
+        self.repaint_active = setActive
+        self.repaint_refresh_editor = refresh_editor or (self.repaint_pending and self.repaint_refresh_editor)
+        metrics.count('gui.repaint_requests')
+        if self.repaint_pending:
+            metrics.count('gui.repaint_requests_coalesced')
+            return
+        self.repaint_pending = True
+        if self.repaint_timer is None:
+            self.repaint_timer = QTimer()
+            self.repaint_timer.setSingleShot(True)
+            self.repaint_timer.setInterval(REPAINT_INTERVAL_MS)
+            self.repaint_timer.timeout.connect(self.flush_repaint)
+        self.repaint_timer.start()
+
+    def flush_repaint(self):
+        """ Run a pending repaint right away """
+        if not self.repaint_pending:
+            return
+        self.repaint_pending = False
+        self.repaint_timer.stop()
+        self.plane_painter._repaintConfiguration(setActive=self.repaint_active, refresh_editor=self.repaint_refresh_editor)
 
     def set_params_editor(self, params_editor):
         self.params_editor = params_editor
@@ -40,10 +74,9 @@ class EventController():
             if update_tuple[0] == 'fuselage_centerline':
                 if new_val <= 0:
                     raise ValueError("Centerline must be longer than zero")
-                for _, elem in self.plane_painter.plane.x_axis.items():
-                    print (f"Checking {_}")
-                    if elem['end'] > new_val:
-                        raise ValueError("New centerline cannot be shorter than the rightmost component's end")
+                rightmost_end = self.plane_painter.plane.rightmost_end
+                if rightmost_end is not None and rightmost_end > new_val:
+                    raise ValueError("New centerline cannot be shorter than the rightmost component's end")
                 self.centerline_input.setText(str(round(new_val, 4)))
                 self.plane_painter.plane.x_axis_len = new_val
             elif update_tuple[0] == 'fuselage_mass':
@@ -51,11 +84,11 @@ class EventController():
                     raise ValueError("Fuselage mass must be larger than zero")
                 self.fuselage_mass_input.setText(str(round(new_val, 4)))
                 self.plane_painter.plane.fuselage_mass = new_val
-            self.plane_painter._repaintConfiguration()
+            self.request_repaint()
 
     def amend_plane(self, all_fields):
         self.plane_painter.plane.validate_param_update(input_fields=all_fields)
-        self.plane_painter._repaintConfiguration()
+        self.request_repaint()
 
     def remove_component(self):
         try:
@@ -65,7 +98,7 @@ class EventController():
             self.plane_painter.plane.remove_component(component_name=component_name)
             self.disable_all()
             self.clear_all()
-            self.plane_painter._repaintConfiguration()
+            self.request_repaint()
         except ValueError:
             QMessageBox(None, "Cannot remove component")
 
@@ -73,7 +106,7 @@ class EventController():
         self.clear_all()
         self.enable_all()
         for k,v in params_dict.items():
-            print (f"k = {k}, v = {v}")
+            log.debug("k = %s, v = %s", k, v)
             self.params_editor.set_param(name=k, value=v)
         if disabled_fields is not None:
             self.disable(what=disabled_fields)
@@ -124,7 +157,7 @@ class ParamsEditor(QFormLayout):
 
     def set_param(self, *, name, value):
         getattr(self, name, None).setText(str(value))
-        print (f"n = {name}, v = {value}")
+        log.debug("n = %s, v = %s", name, value)
 
     def clear(self):
         for field in self.all_fields:
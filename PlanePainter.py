@@ -1,4 +1,5 @@
 import copy
+import time
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
@@ -8,60 +9,145 @@ from structure.Equipment import Equipment
 from loader_utils import load_plane, save_plane
 from default_values import default_component, default_wing
 from EventController import EventController, show_unable_window
+from aero_jobs import AeroEvaluator, aero_snapshot
+from instrumentation import get_logger, metrics
 
 FUS_Y=240
 APP_HDG="RC Plane Calculator v.0.0.1"
+CANVAS_W=785; CANVAS_H=600
+PEN_MARGIN=3 # pixels a component's outline can reach beyond its rectangle
+
+log = get_logger('gui')
+
+_pixmap_cache = {}
+
+def cached_pixmap(path):
+    """ Image resources are decoded from disk only once per process """
+    pixmap = _pixmap_cache.get(path)
+    if pixmap is None:
+        pixmap = _pixmap_cache[path] = QPixmap(path)
+    return pixmap
+
+class PolarLoader(QThread):
+    """ Loads a plane's deferred airfoil polars off the GUI thread """
+    polars_loaded = pyqtSignal(object)
+
+    def __init__(self, plane: Plane):
+        super().__init__()
+        self.plane = plane
+
+    def run(self):
+        self.plane.prefetch_polars()
+        self.polars_loaded.emit(self.plane)
 
 class PlanePainter(QLabel):
+    aero_ready = pyqtSignal(object, object) # emitted from the aero worker thread
+    aero_updated = pyqtSignal(object) # {'Re_wings', 'Re_htail', 'np_xfoil'} of the plane as currently shown
+
     def __init__(self, *, src_img, plane: Plane=None, ec: EventController, status_label: QLabel):
         super().__init__()
         self.ec = ec
-        self.setMinimumHeight(600); self.setMinimumWidth(785)
+        self.setMinimumHeight(CANVAS_H); self.setMinimumWidth(CANVAS_W)
         self.plane = plane
-        self.origPixmap = QPixmap(src_img)
+        self.origPixmap = cached_pixmap(src_img)
+        self.backgroundPixmap = QPixmap(CANVAS_W, CANVAS_H) # static layer: the fuselage
+        self.backgroundPixmap.fill(Qt.transparent)
+        bg_painter = QPainter(self.backgroundPixmap)
+        bg_painter.drawPixmap(0, FUS_Y, self.origPixmap)
+        bg_painter.end()
         self.modifPixmap = None
+        self.paintedItems = {} # what is on modifPixmap: name -> layout with its drawing state and damaged rect
+        self.paintedPlane = None
         self.drawnComponents = []
+        self.drawnByName = {}
         self.activeComponent = None
         self.scale_factor = None
         self.xfoil_predictions = None
         self.status_label = status_label
+        self.polar_loader = None # loader of the current plane
+        self.polar_loaders = set() # every loader still running, including those of planes closed since
+        self.load_started = None
+        self.aero_snapshot = None # state of the last submitted aerodynamic evaluation
+        self.aero_result = None
+        self.aero_ready.connect(self._aero_ready)
+        self.aero = AeroEvaluator(on_result=self.aero_ready.emit)
         self._repaintConfiguration()
         self.setAcceptDrops(True)
 
-    def _repaintConfiguration(self, setActive=None):
+    @metrics.timed('gui.repaint')
+    def _repaintConfiguration(self, setActive=None, full=False, refresh_editor=True):
+        """ Bring the canvas up to date with the plane. Only the regions of components and
+            markers whose drawing changed since the previous paint are redrawn, unless `full`
+            is set or the plane or its scale changed. With refresh_editor=False the active
+            component is highlighted without reloading its values into the parameter form. """
         self.drawnComponents = []
-        self.modifPixmap = QPixmap(785,600)
-        self.modifPixmap.fill(Qt.transparent)
-        self.setPixmap(self.modifPixmap)
-        painter = QPainter(self.modifPixmap)
-        painter.drawPixmap(0, FUS_Y, self.origPixmap)
+        self.drawnByName = {} # name -> (drawing order, drawn component) for hit testing
+        items = {}
         if self.plane is not None:
-            self.scale_factor = 785.0 / self.plane.x_axis_len
-            # draw lifting surfaces
+            scale_factor = CANVAS_W / self.plane.x_axis_len
+            full = full or scale_factor != self.scale_factor or self.paintedPlane is not self.plane
+            self.scale_factor = scale_factor
             for elem_name, elem_properties in self.plane.x_axis.items():
                 if elem_name is not None:
-                    drawn_component = (elem_name, self._get_component_pixmap(painter=painter, elem_name=elem_name, x_axis_elem=elem_properties, is_active=setActive))
+                    obj = elem_properties['obj']
+                    key = (elem_properties['begin'], elem_properties['end'], getattr(obj, 'semispan', None), \
+                           getattr(obj, 'root_chord', None), setActive == elem_name)
+                    painted = self.paintedItems.get(elem_name)
+                    if not full and painted is not None and painted['key'] == key:
+                        items[elem_name] = painted # unchanged since the last paint
+                    else:
+                        items[elem_name] = self._component_layout(elem_name=elem_name, x_axis_elem=elem_properties, is_active=setActive)
+                        items[elem_name]['key'] = key
+                    drawn_component = (elem_name, items[elem_name]['coords'])
+                    self.drawnByName[elem_name] = (len(self.drawnComponents), drawn_component)
                     self.drawnComponents.append(drawn_component)
                     if setActive is not None and setActive == elem_name:
                         self.activeComponent = drawn_component
+                        if not refresh_editor:
+                            continue
                         new_param_values, disabled_fields = self.get_params_dict_to_update(elem_name)
                         self.ec.update_params(self, new_param_values, disabled_fields)
                 else:
-                    print (f"Skipping `{elem_name}` (unknown element type)")
-            self._draw_cg(painter=painter)
-        for coords in self.drawnComponents:
-            print (self.activeComponent)
+                    log.debug("Skipping `%s` (unknown element type)", elem_name)
+            for marker_no, marker in enumerate(self._marker_layout()):
+                items[('marker', marker_no)] = marker
+        if self.modifPixmap is None:
+            self.modifPixmap = QPixmap(CANVAS_W, CANVAS_H)
+            full = True
+        if full:
+            metrics.count('gui.repaint_full')
+            dirty = QRegion(0, 0, CANVAS_W, CANVAS_H)
+        else:
+            metrics.count('gui.repaint_dirty')
+            dirty = QRegion()
+            for key in self.paintedItems.keys() | items.keys():
+                old = self.paintedItems.get(key); new = items.get(key)
+                if old is new or (old is not None and new is not None and old['state'] == new['state']):
+                    continue
+                for changed in [old, new]:
+                    if changed is not None:
+                        dirty = dirty.united(changed['damage'])
+        self.paintedItems = items
+        self.paintedPlane = self.plane
+        if not dirty.isEmpty():
+            painter = QPainter(self.modifPixmap)
+            painter.setClipRegion(dirty)
+            painter.setCompositionMode(QPainter.CompositionMode_Source) # erase the dirty regions down to the static layer
+            painter.drawPixmap(0, 0, self.backgroundPixmap)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+            for item in items.values():
+                if dirty.intersects(item['damage']):
+                    self._paint_item(painter, item)
+            painter.end()
         self.setPixmap(self.modifPixmap)
 
     def dragEnterEvent(self, e):
-        print(e.mimeData().formats())
-        print(e.mimeData().data('airplane/component'))
-        print (e)
+        log.debug("Drag entered with %s", e.mimeData().formats())
         if 'airplane/component' in e.mimeData().formats():
             e.accept()
 
     def dropEvent(self, e):
-        print (e.pos())
+        log.debug("Dropped at %s", e.pos())
         component_type = e.mimeData().data('airplane/component').data().decode('utf-8')
         if component_type in ['wings', 'htail']:
             if self.plane.x_axis.get(component_type) is not None:
@@ -70,7 +156,7 @@ class PlanePainter(QLabel):
         init_x_offset = (self.plane.x_axis_len * e.pos().x()) / 785
         self.new_component(component_type, init_x_offset)
         self.activeComponent = None
-        self._repaintConfiguration()
+        self.ec.request_repaint()
 
     def new_component(self, component_type, init_x_offset):
         if component_type in ['wings', 'htail']:
@@ -84,13 +170,18 @@ class PlanePainter(QLabel):
                                          length=0.1, mass=0.1, eq_type=component_type)
     def mousePressEvent(self, e):
         if e.button() == Qt.LeftButton:
-            print(f"Click! {e.x()}, {e.y()}")
+            log.debug("Click! %s, %s", e.x(), e.y())
             newActiveComponent = None
             self.activeComponent = None
-            for coords in self.drawnComponents:
+            # candidates from the plane's interval index (one pixel of slack for the rounding of
+            # rectangles), then the first of them in drawing order whose rectangle was hit
+            candidates = [] if self.plane is None else \
+                         self.plane.elements_overlapping((e.x() - 1) / self.scale_factor, (e.x() + 1) / self.scale_factor)
+            drawn = sorted(self.drawnByName[name] for name in candidates if name in self.drawnByName)
+            for _, coords in drawn:
                 rect = coords[1]
                 if rect.contains(e.x(), e.y()):
-                    print (coords[0])
+                    log.debug("Clicked %s", coords[0])
                     self.activeComponent = coords
                     new_param_values, disabled_fields = self.get_params_dict_to_update(coords[0])
                     self.ec.update_params(self, new_param_values, disabled_fields)
@@ -99,7 +190,7 @@ class PlanePainter(QLabel):
             if self.activeComponent is None:
                 self.ec.clear_all()
                 self.ec.disable_all()
-            self._repaintConfiguration(setActive=newActiveComponent)
+            self.ec.request_repaint(setActive=newActiveComponent)
 
     def get_params_dict_to_update(self, component_name):
         ret_dict = {}
@@ -127,10 +218,52 @@ class PlanePainter(QLabel):
         return ret_dict, disabled_fields
 
     def setPlane(self, *, data_file):
-        self.plane = load_plane(conf_file=data_file)
+        # geometry, CG and np_offset are drawn right away, the polars follow from a worker thread
+        self.load_started = time.perf_counter()
+        self.plane = load_plane(conf_file=data_file, lazy_polars=True)
         global_params = [('project_name', self.plane.project_name), ('fuselage_centerline', self.plane.x_axis_len), ('fuselage_mass', self.plane.fuselage_mass)]
         [self.ec.update_global_parameter(p) for p in global_params]
-        self._repaintConfiguration()
+        self.ec.request_repaint()
+        self.ec.flush_repaint() # the first paint of a new plane is not deferred
+        log.info("%s: first paint after %.1f ms", data_file, (time.perf_counter() - self.load_started)*1000)
+        if self.plane.polars_pending:
+            self.polar_loader = PolarLoader(self.plane)
+            self.polar_loader.polars_loaded.connect(self._polars_loaded)
+            # a QThread destroyed while running aborts the app, so keep it until it has finished
+            self.polar_loaders.add(self.polar_loader)
+            self.polar_loader.finished.connect(lambda loader=self.polar_loader: self._polar_loader_finished(loader))
+            self.polar_loader.start()
+
+    def shutdown(self):
+        """ Stop the aero worker and wait for the polar loaders; call before dropping the painter """
+        self.aero.shutdown()
+        for loader in list(self.polar_loaders):
+            loader.wait()
+        self.polar_loaders.clear()
+
+    def _polar_loader_finished(self, loader):
+        loader.wait()
+        self.polar_loaders.discard(loader)
+
+    def _polars_loaded(self, plane):
+        if plane is not self.plane: # a different plane was opened in the meantime
+            return
+        log.info("Airfoil polars ready after %.1f ms", (time.perf_counter() - self.load_started)*1000)
+        self.refresh_overlay()
+
+    def refresh_overlay(self):
+        """ Repaint for a change that doesn't touch the layout (flight state, polars, aero
+            results), keeping the selection and the parameter form as they are """
+        if self.ec.repaint_pending: # the pending repaint picks the change up as well
+            return
+        self.ec.request_repaint(setActive=None if self.activeComponent is None else self.activeComponent[0], refresh_editor=False)
+
+    def _aero_ready(self, snapshot, result):
+        if snapshot != self.aero_snapshot: # the plane changed after this job was submitted
+            return
+        self.aero_result = result
+        self.aero_updated.emit(result)
+        self.refresh_overlay()
 
     def savePlane(self, *, data_file):
         save_plane(conf_file=data_file, plane=self.plane)
@@ -149,80 +282,93 @@ class PlanePainter(QLabel):
             #self.plane.remove_component(component=component_obj, orig_offset=orig_offset)
             #self.drawnComponents.remove(self.activeComponent)
             #self.plane.add_component(component=component_obj_cpy, x_offset=orig_offset - 0.05*self.plane.x_axis_len)
-            self._repaintConfiguration(setActive=component_name)
-            print (f"Selected {x_axis_elem}")
+            self.ec.request_repaint(setActive=component_name)
+            log.debug("Selected %s", x_axis_elem)
         except OutsideCenterlineException as e:
             msg = QMessageBox()
             msg.setWindowTitle("Unable, sir")
             msg.setText(str(e))
             msg.exec_()
         except KeyError:
-            print ("Unable to select")
-        print (self.activeComponent[0])
+            log.debug("Unable to select")
 
     def _get_wing_rect(self, x_axis_elem, scale_factor):
         wing_x_offset = x_axis_elem['begin'] * scale_factor
         wing_y_offset = 330 - (x_axis_elem['obj'].semispan * scale_factor)
         wing_chord = x_axis_elem['obj'].root_chord * scale_factor
         wing_span = x_axis_elem['obj'].semispan * 2 * scale_factor
-        return QRect(wing_x_offset, wing_y_offset, wing_chord, wing_span)
- 
-    def _get_component_pixmap(self, *, painter, elem_name, x_axis_elem, is_active):
+        return QRect(int(wing_x_offset), int(wing_y_offset), int(wing_chord), int(wing_span))
+
+    def _component_layout(self, *, elem_name, x_axis_elem, is_active):
+        """ Where and how a component is drawn, without drawing it """
         # y_offset = 240 + (0.5*wysokosc_obrazka z kadlubem=0.5*180=90) - (0.5*wysokosc obrazka nakladanego)
         comp_x_offset = x_axis_elem['begin'] * self.scale_factor
         comp_len = (x_axis_elem['end'] - x_axis_elem['begin']) * self.scale_factor
         painter_thickness = 3
+        pixmap = None
         if elem_name in ['wings', 'htail']:
             # wing_y_offset = 330 - (x_axis_elem['obj'].semispan * scale_factor)
             comp_height = x_axis_elem['obj'].semispan * 2 * self.scale_factor # wingspan
             comp_y_offset = FUS_Y + (0.5*180) - (0.5 * comp_height)
             comp_len = x_axis_elem['obj'].root_chord * self.scale_factor # override with root chord
         elif elem_name == 'propeller':
-            prop_pixmap = QPixmap('res/propeller_horiz2.png')
+            prop_pixmap = cached_pixmap('res/propeller_horiz2.png')
             comp_height = prop_pixmap.height()
             comp_y_offset = FUS_Y+ (0.5*180) - (0.5 * comp_height)
-            painter.drawPixmap(comp_x_offset, comp_y_offset, prop_pixmap)
+            pixmap = ('res/propeller_horiz2.png', int(comp_x_offset), int(comp_y_offset))
         else:
             comp_height = 50
             comp_y_offset = FUS_Y + (0.5*180) - (0.5 * comp_height)
             painter_thickness = 1
-        coords=QRect(comp_x_offset, comp_y_offset, comp_len, comp_height)
-        if is_active is None:
-            pen = QPen(Qt.blue, painter_thickness)
-        elif is_active == elem_name:
-            pen = QPen(Qt.red, painter_thickness)
-        else:
-            pen = QPen(Qt.blue, painter_thickness)
-        painter.setPen(pen)
-        painter.drawRect(coords)
-        return coords
-
-    def _draw_cg(self, *, painter):
-        cg_pixmap = QPixmap('res/cg_symbol40.png')
-        cg_x_offset = (self.plane.cg_offset * self.scale_factor) - 40
+        coords = QRect(int(comp_x_offset), int(comp_y_offset), int(comp_len), int(comp_height))
+        color = Qt.red if is_active is not None and is_active == elem_name else Qt.blue
+        damage = coords.adjusted(-PEN_MARGIN, -PEN_MARGIN, PEN_MARGIN, PEN_MARGIN)
+        if pixmap is not None:
+            damage = damage.united(QRect(pixmap[1], pixmap[2], prop_pixmap.width(), prop_pixmap.height()))
+        return {'coords': coords, 'damage': damage, 'pixmap': pixmap, 'pen': (color, painter_thickness), \
+                'state': (coords.getRect(), pixmap, int(color), painter_thickness)}
+
+    def _paint_item(self, painter, item):
+        if item['pixmap'] is not None:
+            path, x, y = item['pixmap']
+            painter.drawPixmap(x, y, cached_pixmap(path))
+        if item.get('coords') is not None:
+            painter.setPen(QPen(*item['pen']))
+            painter.drawRect(item['coords'])
+
+    def _marker_layout(self):
+        """ CG, NP and Xfoil NP markers; also refreshes the stability banner """
+        markers = []
         cg_y_offset = int(FUS_Y + (0.5*180) - (0.5 * 40))
-        painter.drawPixmap(cg_x_offset, cg_y_offset, cg_pixmap)
+        positions = [('res/cg_symbol40.png', self.plane.cg_offset)]
         plane_np = self.plane.np_offset
-        plane_np_xfoil = self.plane.np_xfoil
+        # np_xfoil is evaluated by a worker thread; the marker follows when the result comes in
+        snapshot = aero_snapshot(self.plane)
+        if snapshot != self.aero_snapshot:
+            self.aero_snapshot = snapshot
+            if snapshot is None:
+                self.aero_result = None
+            else:
+                self.aero.submit(snapshot)
+        plane_np_xfoil = None if self.aero_result is None else self.aero_result['np_xfoil']
         if plane_np is None:
             self.status_label.setStyleSheet("QLabel{background-color: gray}")
             self.status_label.setText(f"{APP_HDG}\nStatic stability: UNDECIDED")
-            return "UNDECIDED"
-        np_pixmap = QPixmap('res/np_symbol40.png')
-        np_x_offset = (plane_np * self.scale_factor) - 40
-        np_y_offset = cg_y_offset
-        painter.drawPixmap(np_x_offset, np_y_offset, np_pixmap)
-        if plane_np_xfoil is not None:
-            npx_pixmap = QPixmap('res/np_xfoil_symbol40.png')
-            npx_x_offset = (plane_np_xfoil * self.scale_factor) - 40
-            npx_y_offset = cg_y_offset
-            painter.drawPixmap(npx_x_offset, npx_y_offset, npx_pixmap)
-        print (f"NP = {plane_np}, NPX = {plane_np_xfoil}")
-        if self.plane.cg_offset <= self.plane.np_offset:
-            self.status_label.setStyleSheet("QLabel{background-color: green}")
-            self.status_label.setText(f"{APP_HDG}\nStatic stability: STABLE")
-            return "STABLE"
         else:
-            self.status_label.setStyleSheet("QLabel{background-color: darkred}")
-            self.status_label.setText(f"{APP_HDG}\nStatic stability: UNSTABLE")
-            return "UNSTABLE"
+            positions.append(('res/np_symbol40.png', plane_np))
+            if plane_np_xfoil is not None:
+                positions.append(('res/np_xfoil_symbol40.png', plane_np_xfoil))
+            log.debug("NP = %s, NPX = %s", plane_np, plane_np_xfoil)
+            stability = self.plane.stability
+            if stability == "STABLE":
+                self.status_label.setStyleSheet("QLabel{background-color: green}")
+            else:
+                self.status_label.setStyleSheet("QLabel{background-color: darkred}")
+            self.status_label.setText(f"{APP_HDG}\nStatic stability: {stability}")
+        for path, x in positions:
+            pixmap = cached_pixmap(path)
+            marker_x_offset = int((x * self.scale_factor) - 40)
+            markers.append({'pixmap': (path, marker_x_offset, cg_y_offset), \
+                            'damage': QRect(marker_x_offset, cg_y_offset, pixmap.width(), pixmap.height()), \
+                            'state': (path, marker_x_offset, cg_y_offset)})
+        return markers
@@ -0,0 +1,78 @@
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from aerodynamic_utils import SURFACES, np_xfoil_offset, reynolds_number
+
+# Immutable copies of what Plane.np_xfoil and Component.Re read. The polar tables are shared,
+# read-only objects, so a snapshot can be evaluated on any thread while the GUI edits the plane.
+SurfaceState = namedtuple('SurfaceState', ['begin', 'AC', 'area', 'characteristic_length', 'aoi', 'cl_table'])
+AeroSnapshot = namedtuple('AeroSnapshot', ['wings', 'htail', 'true_airspeed', 'pitch', 'air_viscosity'])
+
+def aero_snapshot(plane):
+    """ Snapshot of the plane's lifting surfaces and flight state, None without wings or htail.
+        Deferred polars are never loaded from here: cl_table is None while they are pending. """
+    if plane.x_axis.get('wings') is None or plane.x_axis.get('htail') is None:
+        return None
+    surfaces = {}
+    for name in SURFACES:
+        obj = plane.x_axis[name]['obj']
+        cl_table = None if obj.polars_pending or obj.xfoil_data is None else obj.cl_table
+        surfaces[name] = SurfaceState(begin=plane.x_axis[name]['begin'], AC=obj.AC, area=obj.area, \
+                                      characteristic_length=obj.characteristic_length, aoi=obj.aoi, cl_table=cl_table)
+    flight = plane.flight
+    return AeroSnapshot(true_airspeed=flight.true_airspeed, pitch=flight.pitch, air_viscosity=flight.air_viscosity, **surfaces)
+
+def evaluate_snapshot(snapshot):
+    """ {'Re_wings', 'Re_htail', 'np_xfoil'} as Component.Re and Plane.np_xfoil would report
+        them for the snapshot's state (None where they can't be computed) """
+    res = {}
+    for name in SURFACES:
+        surface = getattr(snapshot, name)
+        res[f"Re_{name}"] = reynolds_number(true_airspeed=snapshot.true_airspeed, air_viscosity=snapshot.air_viscosity, \
+                                            characteristic_length=surface.characteristic_length)
+    wing, tail = snapshot.wings, snapshot.htail
+    if wing.cl_table is None or tail.cl_table is None or res['Re_wings'] is None or res['Re_htail'] is None:
+        res['np_xfoil'] = None
+        return res
+    res['np_xfoil'] = np_xfoil_offset(wing_begin=wing.begin, wing_AC=wing.AC, wing_area=wing.area, \
+                                      tail_begin=tail.begin, tail_AC=tail.AC, tail_area=tail.area, \
+                                      cl_data_wing=wing.cl_table, cl_data_tail=tail.cl_table, \
+                                      Re_wing=res['Re_wings'], Re_tail=res['Re_htail'], \
+                                      alpha_wing=snapshot.pitch + wing.aoi, alpha_tail=snapshot.pitch + tail.aoi)
+    return res
+
+class AeroEvaluator():
+    """ Evaluates snapshots on a worker thread and hands only the newest result to
+        on_result(snapshot, result), which is called from the worker thread.
+
+        Submitting a snapshot supersedes the previous one: a job still waiting in the queue is
+        cancelled, and the result of a job that was already running is dropped. """
+    def __init__(self, *, on_result, max_workers=1):
+        self.on_result = on_result
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aero')
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = None
+        self.submitted = self.cancelled = self.dropped = self.delivered = 0
+
+    def submit(self, snapshot):
+        with self._lock:
+            self._generation += 1
+            self.submitted += 1
+            if self._pending is not None and self._pending.cancel():
+                self.cancelled += 1
+            self._pending = self._pool.submit(self._run, self._generation, snapshot)
+            return self._pending
+
+    def _run(self, generation, snapshot):
+        result = evaluate_snapshot(snapshot)
+        with self._lock:
+            if generation != self._generation: # a newer snapshot arrived while we were busy
+                self.dropped += 1
+                return None
+            self.delivered += 1
+        self.on_result(snapshot, result)
+        return result
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
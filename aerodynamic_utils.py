@@ -1,4 +1,9 @@
 import math
+from instrumentation import metrics
+
+DOWNWASH = 0.1 # fixed 10% downwash angle assumed by every neutral point estimate
+SURFACES = ['wings', 'htail'] # the lifting surfaces, by their x_axis names
+MIN_AIRSPEED = 0.8 # m/s, slower than this there are no flight conditions to compute Re from
 
 def get_two_nearest(*, x, vector):
     tmp = sorted(vector)
@@ -21,6 +26,8 @@ def interpolate_2d_linear(*, dict_fn, Re, aoa, aoa_range=None):
     """ Interpolate Cl and Cd coefficient values given a Reynolds number and an angle of attack.
         Basically a 2D linear interpolation."""
     # print (dict_fn.keys())
+    if metrics.enabled:
+        metrics.count('polars.interpolate_2d_linear')
     if aoa_range is None:
         aoa_range = [round(x* 0.10, 2) for x in range(-140,121)] # alpha from -14 to +12 degrees in increments of 0.1
     Re_known = sorted(dict_fn.keys())
@@ -58,11 +65,19 @@ def interpolate_2d_linear(*, dict_fn, Re, aoa, aoa_range=None):
     return f_approx
 
 def dCl_da(cl_data, Re, alpha, h=0.01):
-    """ Approximate the derivative of Cl over AOA """
+    """ Approximate the derivative of Cl over AOA.
+        `cl_data` is either a {Re: {alpha: Cl}} dict or a dense polar_table.PolarGrid,
+        whose slopes are precomputed when the polars load (h is then not needed) """
+    if hasattr(cl_data, 'slope'):
+        return cl_data.slope(Re, alpha)
     f = interpolate_2d_linear(dict_fn=cl_data, Re=Re, aoa=alpha)
     f_h = interpolate_2d_linear(dict_fn=cl_data, Re=Re, aoa=alpha+h)
     return (f_h - f) / h
 
+def dCm_da(cm_data, Re, alpha, h=0.01):
+    """ Approximate the derivative of Cm over AOA (same inputs as dCl_da) """
+    return dCl_da(cm_data, Re, alpha, h)
+
 def np_from_xfoil(*, cl_data_wing, cl_data_tail, Re_wing, Re_tail, alpha_wing, alpha_tail, l_H, S, S_H, eps):
     """
     a   - dCl / dalpha for the wing
@@ -76,3 +91,18 @@ def np_from_xfoil(*, cl_data_wing, cl_data_tail, Re_wing, Re_tail, alpha_wing, a
     a_t = dCl_da(cl_data_tail, Re_tail, alpha_tail)
     np = (a_t * (1-eps) * S_H * l_H) / (S * a) # relative to the wing's AC!
     return np
+
+def reynolds_number(*, true_airspeed, characteristic_length, air_viscosity):
+    """ Reynolds number of a body flying at true_airspeed, None below MIN_AIRSPEED """
+    if true_airspeed < MIN_AIRSPEED:
+        return None
+    return (true_airspeed * characteristic_length) / air_viscosity
+
+def np_xfoil_offset(*, wing_begin, wing_AC, wing_area, tail_begin, tail_AC, tail_area, \
+                    cl_data_wing, cl_data_tail, Re_wing, Re_tail, alpha_wing, alpha_tail):
+    """ Plane.np_xfoil: np_from_xfoil with the tail arm measured between the surfaces'
+        aerodynamic centers (begin + AC) and the fixed DOWNWASH, added to the wing's AC """
+    return wing_AC + np_from_xfoil(cl_data_wing=cl_data_wing, cl_data_tail=cl_data_tail, \
+                                   Re_wing=Re_wing, Re_tail=Re_tail, alpha_wing=alpha_wing, alpha_tail=alpha_tail, \
+                                   l_H=(tail_begin + tail_AC) - (wing_begin + wing_AC), \
+                                   S=wing_area, S_H=tail_area, eps=DOWNWASH)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+""" Fleet evaluation: time to the first record and total throughput of fleet.iter_records
+    over a directory of synthetic plane configs, one process against a full process pool.
+
+    Run from the repository root: python -m benchmarks.fleet_bench [--planes N] [--processes N] """
+import os
+import json
+import time
+import argparse
+import tempfile
+from fleet import iter_records
+
+CONF_FILE = 'userdata/prop_final.json'
+
+def write_fleet(target_dir, *, n_planes):
+    """ n_planes copies of the sample config, each with its cargo moved a little """
+    with open(CONF_FILE, 'r') as f:
+        conf = json.load(f)
+    conf_files = []
+    for plane_no in range(n_planes):
+        conf['project_name'] = f"plane{plane_no}"
+        conf['non_lifting_components'][-1]['offset'] = 0.8 + 0.6 * plane_no / n_planes
+        conf_file = os.path.join(target_dir, f"plane{plane_no:05d}.json")
+        with open(conf_file, 'w') as f:
+            json.dump(conf, f)
+        conf_files.append(conf_file)
+    return conf_files
+
+def time_records(conf_files, *, processes):
+    t0 = time.perf_counter()
+    first = None
+    n_records = 0
+    for _ in iter_records(conf_files, tas=20.0, processes=processes):
+        if first is None:
+            first = time.perf_counter() - t0
+        n_records += 1
+    total = time.perf_counter() - t0
+    return {'first_ms': first * 1000, 'total_s': total, 'planes_per_s': n_records / total}
+
+def run(*, n_planes=2000, processes=None):
+    processes = processes or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as fleet_dir:
+        conf_files = write_fleet(fleet_dir, n_planes=n_planes)
+        res = {'planes': n_planes, 'processes': processes, 'serial': time_records(conf_files, processes=1)}
+        res['parallel'] = time_records(conf_files, processes=processes)
+    res['speedup'] = res['parallel']['planes_per_s'] / res['serial']['planes_per_s']
+    return res
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--planes', type=int, default=2000)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+    res = run(n_planes=args.planes, processes=args.processes)
+    print (f"{res['planes']} plane configs")
+    for mode in ['serial', 'parallel']:
+        r = res[mode]
+        print (f"{mode:<9} first record after {r['first_ms']:7.1f} ms, {r['planes_per_s']:8.1f} planes/s")
+    print (f"speedup with {res['processes']} processes: {res['speedup']:.1f}x")
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+""" Per-query cost of the dense PolarTable lookup against the dict-based reference.
+
+    Run from the repository root: python -m benchmarks.interpolation_bench """
+import random
+import timeit
+from aerodynamic_utils import interpolate_2d_linear
+from polar_registry import AirfoilPolars
+
+def run(*, xfoil_data='airfoil_data/naca2412', n_queries=5000, seed=0):
+    polars = AirfoilPolars.from_xfoil_dir(xfoil_data)
+    rnd = random.Random(seed)
+    # stay clear of the last Re interval and of alpha >= 12, which the reference cannot handle
+    re_known = sorted(polars.cl_data.keys())
+    queries = [(rnd.uniform(re_known[0], re_known[-2]), rnd.uniform(-14.0, 11.9)) for _ in range(n_queries)]
+    reference = lambda: [interpolate_2d_linear(dict_fn=polars.cl_data, Re=Re, aoa=aoa) for Re, aoa in queries]
+    dense = lambda: [polars.table.cl(Re, aoa) for Re, aoa in queries]
+    t_reference = min(timeit.repeat(reference, number=1, repeat=3)) / n_queries
+    t_dense = min(timeit.repeat(dense, number=1, repeat=3)) / n_queries
+    return {'reference_us': t_reference * 1e6, 'dense_us': t_dense * 1e6, 'speedup': t_reference / t_dense}
+
+if __name__ == '__main__':
+    res = run()
+    print (f"interpolate_2d_linear: {res['reference_us']:.2f} us/query")
+    print (f"PolarGrid lookup:      {res['dense_us']:.2f} us/query")
+    print (f"speedup:               {res['speedup']:.1f}x")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+""" Polar ingestion throughput (MB/s): the streaming parser with vectorized gap filling
+    against the original regex-per-line loader, on large synthetic Xfoil polars.
+
+    Run from the repository root: python -m benchmarks.parser_bench [--rows N] [--files N] """
+import os
+import re
+import glob
+import time
+import random
+import argparse
+import tempfile
+from aerodynamic_utils import get_two_nearest, interpolate_1d_linear
+from polar_cache import load_xfoil_dir
+from polar_table import fill_alpha_gaps
+
+POLAR_HEADER = """
+       XFOIL         Version 6.99
+
+ Calculated polar for: SYNTHETIC
+
+ 1 1 Reynolds number fixed          Mach number fixed
+
+ xtrf =   1.000 (top)        1.000 (bottom)
+ Mach =   0.000     Re =     {re_mantissa:.3f} e 6     Ncrit =   9.000
+
+   alpha    CL        CD       CDp       CM     Top_Xtr  Bot_Xtr
+  ------ -------- --------- --------- -------- -------- --------
+"""
+
+def write_synthetic_polars(xfoil_data, *, n_files=8, n_rows=20000, skip_ratio=0.02, seed=0):
+    """ Xfoil-like polar files with n_rows angles each, a few of them randomly skipped """
+    rnd = random.Random(seed)
+    os.makedirs(xfoil_data, exist_ok=True)
+    step = 40.0 / n_rows
+    for file_no in range(n_files):
+        with open(os.path.join(xfoil_data, f"{file_no}.pol"), 'w') as f:
+            f.write(POLAR_HEADER.format(re_mantissa=0.05 + 0.35*file_no))
+            for row_no in range(n_rows):
+                if rnd.random() < skip_ratio:
+                    continue
+                aoa = -20.0 + row_no*step
+                f.write(f" {aoa:7.3f}  {0.1*aoa:7.4f}  {0.01 + 0.0005*aoa*aoa:8.5f}  {0.005:8.5f}  {-0.002*aoa:7.4f}   1.0000   0.5000\n")
+
+def legacy_load_xfoil_data(xfoil_data):
+    """ The loader as it was before the streaming parser (minus its per-alpha prints) """
+    cl_data = {}; cd_data = {}; cm_data = {}
+    for f in glob.glob(f"{xfoil_data}/*.pol"):
+        with open(f, 'r') as xfoil_file:
+            reynolds_num = 0.0
+            for line in xfoil_file:
+                if "Re = " in line: # parse Reynolds number
+                    reynolds_num = float(re.search(r'Re =\s+([0-9]\.[0-9]+\se\s?-?[0-9])', line).group(1).replace(" ", ""))
+                    cl_data[reynolds_num] = {}; cd_data[reynolds_num] = {}; cm_data[reynolds_num] = {}
+                coeff_values = re.search(r"^\s+(?P<AOA>-?[0-9]+\.[0-9]+)\s+(?P<Cl>-?[0-9]+\.[0-9]+)\s+(?P<Cd>-?[0-9]+\.[0-9]+)\s+(?P<Cdp>-?[0-9]+\.[0-9]+)\s+(?P<CM>-?[0-9]+\.[0-9]+)", line)
+                if coeff_values is not None:
+                    cl_data[reynolds_num][round(float(coeff_values['AOA']), 2)] = float(coeff_values['Cl'])
+                    cd_data[reynolds_num][round(float(coeff_values['AOA']), 2)] = float(coeff_values['Cd'])
+                    cm_data[reynolds_num][round(float(coeff_values['AOA']), 2)] = float(coeff_values['CM'])
+            present_aoa_values = sorted(cl_data[reynolds_num].keys())
+            for aoa in [round(x*0.10, 2) for x in range(-150, 149)]:
+                if aoa not in present_aoa_values:
+                    lower, upper = get_two_nearest(x=aoa, vector=present_aoa_values)
+                    for dict_fn in [cl_data, cd_data, cm_data]:
+                        dict_fn[reynolds_num][aoa] = interpolate_1d_linear(x=aoa, x1=lower, y1=dict_fn[reynolds_num][lower], \
+                                                                           x2=upper, y2=dict_fn[reynolds_num][upper])
+    return cl_data, cd_data, cm_data
+
+def streaming_load(xfoil_data):
+    return [(Re, fill_alpha_gaps(rows)) for Re, rows in load_xfoil_dir(xfoil_data, use_cache=False, processes=1)]
+
+def run(*, n_files=8, n_rows=20000):
+    with tempfile.TemporaryDirectory() as tmp:
+        xfoil_data = os.path.join(tmp, 'synthetic')
+        write_synthetic_polars(xfoil_data, n_files=n_files, n_rows=n_rows)
+        megabytes = sum(os.path.getsize(f) for f in glob.glob(f"{xfoil_data}/*.pol")) / 1e6
+        res = {'megabytes': megabytes}
+        for name, loader in [('legacy', legacy_load_xfoil_data), ('streaming', streaming_load)]:
+            t0 = time.perf_counter()
+            loader(xfoil_data)
+            res[f"{name}_mb_s"] = megabytes / (time.perf_counter() - t0)
+        res['speedup'] = res['streaming_mb_s'] / res['legacy_mb_s']
+        return res
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+    res = run(n_files=args.files, n_rows=args.rows)
+    print (f"{res['megabytes']:.1f} MB of polars")
+    print (f"legacy regex loader:      {res['legacy_mb_s']:.1f} MB/s")
+    print (f"streaming parser + fill:  {res['streaming_mb_s']:.1f} MB/s")
+    print (f"speedup:                  {res['speedup']:.1f}x")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+""" PlanePainter repaint latency with a few hundred equipment items: full repaints with the
+    pixmap cache cleared before each one, full repaints with cached resources, and
+    dirty-region repaints after moving one component.
+
+    The two effects are reported separately: the pixmap cache as uncached / cached full
+    repaints, the dirty regions as cached full / dirty repaints. Both full repaints already
+    go through the layered painter, so neither number is a comparison with the original
+    repaint code.
+
+    Run from the repository root: python -m benchmarks.repaint_bench [--items N] [--repeat N]
+    (set QT_QPA_PLATFORM=offscreen on a headless machine) """
+import time
+import argparse
+from PyQt5.QtWidgets import QApplication, QLabel
+from loader_utils import load_plane
+
+CONF_FILE = 'userdata/prop_final.json'
+
+def make_painter(*, n_items):
+    import PlanePainter as pp_module
+    from EventController import EventController, ParamsEditor
+    ec = EventController()
+    ec.set_params_editor(ParamsEditor(ec=ec))
+    painter = pp_module.PlanePainter(src_img='res/fuselage_horiz2.png', ec=ec, status_label=QLabel())
+    ec.set_plane_painter(painter)
+    plane = load_plane(conf_file=CONF_FILE)
+    for item_no in range(n_items):
+        plane.add_equipment(name=f"item{item_no}", x_offset=0.3 + (1.8 * item_no / n_items), length=0.04, mass=0.01)
+    painter.plane = plane
+    painter._repaintConfiguration(full=True)
+    return pp_module, painter
+
+def run(*, n_items=300, repeat=20):
+    app = QApplication.instance() or QApplication([])
+    pp_module, painter = make_painter(n_items=n_items)
+    res = {'items': n_items}
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        pp_module._pixmap_cache.clear()
+        painter._repaintConfiguration(full=True)
+    res['uncached_full_ms'] = (time.perf_counter() - t0) * 1000 / repeat
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        painter._repaintConfiguration(full=True)
+    res['full_ms'] = (time.perf_counter() - t0) * 1000 / repeat
+    t0 = time.perf_counter()
+    for step in range(repeat):
+        painter.plane.move_component(name='cargo', distance=0.01 if step % 2 == 0 else -0.01)
+        painter._repaintConfiguration()
+    res['dirty_ms'] = (time.perf_counter() - t0) * 1000 / repeat
+    painter.shutdown()
+    res['cache_speedup'] = res['uncached_full_ms'] / res['full_ms']
+    res['dirty_speedup'] = res['full_ms'] / res['dirty_ms']
+    return res
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    res = run(n_items=args.items, repeat=args.repeat)
+    print (f"{res['items']} equipment items")
+    print (f"full repaint, pixmap cache cleared: {res['uncached_full_ms']:.2f} ms")
+    print (f"full repaint, cached resources:     {res['full_ms']:.2f} ms")
+    print (f"dirty-region repaint after a move:  {res['dirty_ms']:.2f} ms")
+    print (f"pixmap cache speedup (full):        {res['cache_speedup']:.1f}x")
+    print (f"dirty-region speedup (cached):      {res['dirty_speedup']:.1f}x")
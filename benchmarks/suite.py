@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+""" Benchmark suite over synthetic, scalable fixtures: polar parsing, interpolation,
+    CG/NP estimation, simulation ticks, config I/O and (offscreen) repaints.
+
+    Every case reports the best per-call time over `repeat` runs. Results are written as
+    JSON and can be compared against a stored baseline; a case more than `threshold`
+    slower than its baseline counts as a regression and makes the run exit with 1.
+
+    Run from the repository root:
+        python -m benchmarks.suite [--scale N] [--only NAME ...] [--output results.json]
+                                   [--baseline benchmarks/baseline.json] [--threshold 0.5]
+                                   [--update-baseline] """
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+from aerodynamic_utils import interpolate_2d_linear, dCl_da
+from loader_utils import load_plane, save_plane
+from polar_registry import registry as polar_registry
+from structure.Wing import Wing
+from structure.flight import Flight
+from benchmarks.parser_bench import write_synthetic_polars
+
+CONF_FILE = 'userdata/prop_final.json'
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = 0.5 # 50% slower than the baseline is a regression (timings on shared machines are noisy)
+
+def measure(fn, *, number=1, repeat=5, setup=None):
+    """ Best seconds per call of fn() over `repeat` runs of `number` calls; setup() runs
+        untimed before every run """
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = (time.perf_counter() - t0) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+class Fixtures():
+    """ Synthetic inputs shared by the cases, sized by `scale`, in a temporary directory """
+    def __init__(self, *, scale=1, seed=0):
+        self.scale = scale
+        self.workdir = tempfile.mkdtemp(prefix='planebuilder_bench_')
+        self.cache_dir = os.path.join(self.workdir, 'polar_cache')
+        self._saved_cache_dir = os.environ.get('PLANEBUILDER_CACHE_DIR')
+        os.environ['PLANEBUILDER_CACHE_DIR'] = self.cache_dir # keep the benchmark's polars out of the user's cache
+        self.polar_dir = os.path.join(self.workdir, 'synthetic_airfoil')
+        write_synthetic_polars(self.polar_dir, n_files=8*scale, n_rows=2000, seed=seed)
+        self.n_items = 300 * scale
+        self.n_ticks = 2000 * scale
+        self.n_queries = 2000 * scale
+        self.plane = self.make_plane(n_items=self.n_items)
+        self.conf_file = os.path.join(self.workdir, 'plane.json')
+        save_plane(conf_file=self.conf_file, plane=self.plane)
+        self.bundle_file = os.path.join(self.workdir, 'plane.pbplane')
+        save_plane(conf_file=self.bundle_file, plane=self.plane, bundle=True)
+        cl_table = self.plane.x_axis['wings']['obj'].polars.cl_data
+        re_known = sorted(cl_table)
+        rnd = random.Random(seed)
+        # stay clear of the last Re interval and of alpha >= 12, which interpolate_2d_linear cannot handle
+        self.queries = [(rnd.uniform(re_known[0], re_known[-2]), rnd.uniform(-14.0, 11.9)) for _ in range(self.n_queries)]
+
+    @staticmethod
+    def make_plane(*, n_items):
+        flight = Flight()
+        flight.true_airspeed = 20.0
+        plane = load_plane(conf_file=CONF_FILE, preflight=flight)
+        for item_no in range(n_items):
+            plane.add_equipment(name=f"item{item_no}", x_offset=0.3 + (1.8 * item_no / n_items), length=0.04, mass=0.01)
+        return plane
+
+    def synthetic_wing(self):
+        params_dict = {'name': 'wings', 'semispan': 0.8, 'root_chord': 0.32, 'characteristic_length': 0.32, \
+                       'thickness_ratio': 0.12, 'mass': 2.5, 'ref_area': 0.5, 'xfoil_data': self.polar_dir}
+        return Wing(params_dict=params_dict, flight=Flight())
+
+    def cleanup(self):
+        if self._saved_cache_dir is None:
+            os.environ.pop('PLANEBUILDER_CACHE_DIR', None)
+        else:
+            os.environ['PLANEBUILDER_CACHE_DIR'] = self._saved_cache_dir
+        polar_registry.clear() # the synthetic airfoil's directory is about to go away
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+def _cold_polars(fx):
+    polar_registry.clear()
+    shutil.rmtree(fx.cache_dir, ignore_errors=True)
+
+def _warm_polars(fx):
+    polar_registry.clear()
+
+def bench_load_xfoil_data(fx, *, repeat):
+    res = {'load_xfoil_data_cold': measure(lambda: fx.synthetic_wing().load_xfoil_data(), \
+                                           repeat=repeat, setup=lambda: _cold_polars(fx))}
+    res['load_xfoil_data_cached'] = measure(lambda: fx.synthetic_wing().load_xfoil_data(), \
+                                            repeat=repeat, setup=lambda: _warm_polars(fx))
+    return res
+
+def bench_interpolation(fx, *, repeat):
+    polars = fx.plane.x_axis['wings']['obj'].polars
+    queries = fx.queries
+    per_query = lambda fn: measure(lambda: [fn(Re, aoa) for Re, aoa in queries], repeat=repeat) / len(queries)
+    return {'interpolate_2d_linear': per_query(lambda Re, aoa: interpolate_2d_linear(dict_fn=polars.cl_data, Re=Re, aoa=aoa)), \
+            'dCl_da_dict': per_query(lambda Re, aoa: dCl_da(polars.cl_data, Re, aoa)), \
+            'dCl_da_table': per_query(lambda Re, aoa: dCl_da(polars.table.cl, Re, aoa))}
+
+def bench_stability(fx, *, repeat):
+    plane = fx.plane
+    return {'cg_offset': measure(lambda: plane.cg_offset, number=1000, repeat=repeat), \
+            'np_offset': measure(lambda: plane.np_offset, number=1000, repeat=repeat), \
+            'np_xfoil': measure(lambda: plane.np_xfoil, number=1000, repeat=repeat)}
+
+def bench_tick(fx, *, repeat):
+    plane = fx.make_plane(n_items=fx.n_items)
+    initial = (plane.flight.true_airspeed, plane.flight.pitch, plane.angular_velocity)
+    def reset():
+        plane.flight.true_airspeed, plane.flight.pitch, plane.angular_velocity = initial
+    def ticks():
+        for _ in range(fx.n_ticks):
+            plane._tick()
+    return {'tick': measure(ticks, repeat=repeat, setup=reset) / fx.n_ticks}
+
+def bench_config_io(fx, *, repeat):
+    out_file = os.path.join(fx.workdir, 'saved.json')
+    return {'load_plane': measure(lambda: load_plane(conf_file=fx.conf_file), repeat=repeat), \
+            'load_plane_bundle': measure(lambda: load_plane(conf_file=fx.bundle_file), repeat=repeat), \
+            'save_plane': measure(lambda: save_plane(conf_file=out_file, plane=fx.plane), repeat=repeat), \
+            'save_plane_bundle': measure(lambda: save_plane(conf_file=out_file, plane=fx.plane, bundle=True), repeat=repeat)}
+
+def bench_repaint(fx, *, repeat):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError: # the GUI is optional, everything else runs without PyQt5
+        return {}
+    from benchmarks.repaint_bench import make_painter
+    app = QApplication.instance() or QApplication([])
+    _, painter = make_painter(n_items=fx.n_items)
+    def move():
+        painter.plane.move_component(name='cargo', distance=0.01 if move.step % 2 == 0 else -0.01)
+        move.step += 1
+        painter._repaintConfiguration()
+    move.step = 0
+    res = {'repaint_full': measure(lambda: painter._repaintConfiguration(full=True), number=10, repeat=repeat), \
+           'repaint_dirty': measure(move, number=10, repeat=repeat)}
+    painter.shutdown()
+    return res
+
+BENCHMARKS = {'load_xfoil_data': bench_load_xfoil_data, 'interpolation': bench_interpolation, \
+              'stability': bench_stability, 'tick': bench_tick, 'config_io': bench_config_io, \
+              'repaint': bench_repaint}
+
+def run_suite(*, scale=1, repeat=5, only=None, seed=0):
+    """ {'meta': {...}, 'results': {case: best seconds per call}} for the benchmarks in
+        `only` (names of BENCHMARKS, all of them by default) """
+    fx = Fixtures(scale=scale, seed=seed)
+    results = {}
+    try:
+        for name in only or BENCHMARKS:
+            results.update(BENCHMARKS[name](fx, repeat=repeat))
+    finally:
+        fx.cleanup()
+    meta = {'scale': scale, 'repeat': repeat, 'python': platform.python_version(), \
+            'machine': platform.machine(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+def compare(results, baseline, *, threshold=DEFAULT_THRESHOLD):
+    """ [{'case', 'baseline', 'current', 'ratio'}] for every case more than `threshold`
+        (a fraction) slower than in `baseline`; cases missing on either side are skipped """
+    regressions = []
+    for case, current in sorted(results['results'].items()):
+        reference = baseline['results'].get(case)
+        if reference is None or reference <= 0:
+            continue
+        ratio = current / reference
+        if ratio > 1 + threshold:
+            regressions.append({'case': case, 'baseline': reference, 'current': current, 'ratio': ratio})
+    return regressions
+
+def format_results(results, baseline=None):
+    lines = []
+    for case, seconds in sorted(results['results'].items()):
+        line = f"{case:<26} {seconds*1e6:>12.2f} us"
+        reference = None if baseline is None else baseline['results'].get(case)
+        if reference:
+            line += f"   {seconds / reference:>5.2f}x baseline"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare it against a baseline")
+    parser.add_argument('--scale', type=int, default=1, help="multiply the size of every synthetic fixture")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument('--output', help="write the results as JSON to this file ('-' for stdout)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline results to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, \
+                        help="allowed slowdown against the baseline, as a fraction (default: 0.5)")
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_suite(scale=args.scale, repeat=args.repeat, only=args.only)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('scale') != args.scale:
+            sys.stderr.write(f"Baseline was recorded with --scale {baseline['meta'].get('scale')}, not comparing\n")
+            baseline = None
+    if args.output == '-':
+        sys.stdout.write(json.dumps(results, indent=4) + "\n")
+    else:
+        sys.stdout.write(format_results(results, baseline) + "\n")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=4)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=4)
+        return 0
+    regressions = [] if baseline is None else compare(results, baseline, threshold=args.threshold)
+    for r in regressions:
+        sys.stderr.write(f"REGRESSION {r['case']}: {r['current']*1e6:.2f} us against {r['baseline']*1e6:.2f} us ({r['ratio']:.2f}x)\n")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
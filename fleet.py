@@ -0,0 +1,99 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from loader_utils import load_plane
+from headless import iter_reports
+from polar_cache import ingest_dirs
+from instrumentation import get_logger, metrics
+
+log = get_logger('io')
+
+def polar_dirs(conf_files):
+    """ Airfoil directories referenced by the lifting surfaces of the given configs
+        (unreadable configs are skipped, loading them reports the error) """
+    dirs = set()
+    for conf_file in conf_files:
+        try:
+            with open(conf_file, 'r') as f:
+                plane_conf = json.load(f)
+            dirs.update(s['xfoil_data'] for s in plane_conf['lifting_surfaces'] if s.get('xfoil_data'))
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+    return sorted(dirs)
+
+def _load_one(conf_file, lazy_polars):
+    try:
+        plane = load_plane(conf_file=conf_file, lazy_polars=lazy_polars)
+    except Exception as e: # one broken config must not stop the batch
+        log.warning("Unable to load %s: %s", conf_file, e)
+        return {'conf_file': conf_file, 'error': f"{type(e).__name__}: {e}"}
+    metrics.count('io.planes_loaded')
+    return {'conf_file': conf_file, 'plane': plane}
+
+def iter_planes(conf_files, *, max_workers=None, lazy_polars=False):
+    """ Load many plane configs on a thread pool and yield {'conf_file', 'plane'} (or
+        {'conf_file', 'error'}) for each one as soon as it is ready, in completion order.
+
+        The planes share this process's polar registry, so every airfoil directory is parsed
+        (or mapped from its compiled cache) once, however many configs refer to it: workers
+        that need a directory another worker is loading wait for it instead of parsing it too. """
+    conf_files = list(conf_files)
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    if max_workers == 1:
+        for conf_file in conf_files:
+            yield _load_one(conf_file, lazy_polars)
+        return
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fleet')
+    try:
+        futures = [pool.submit(_load_one, conf_file, lazy_polars) for conf_file in conf_files]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True) # the caller may stop early
+
+def _evaluate_chunk(conf_files, tas, pitch):
+    return list(iter_reports(conf_files, tas=tas, pitch=pitch))
+
+def _chunk_bounds(n, *, processes, chunksize=None):
+    """ [(lo, hi)] slices of n configs. Without a fixed chunksize the first chunk of every
+        worker holds one config, so records start flowing at once, and the chunks then grow
+        geometrically up to n / (4 * processes) to keep the per-task overhead low. """
+    if chunksize is not None:
+        return [(lo, min(lo + chunksize, n)) for lo in range(0, n, chunksize)]
+    largest = max(1, n // (4 * processes))
+    bounds = []
+    lo = 0; size = 1
+    while lo < n:
+        for _ in range(processes):
+            if lo >= n:
+                break
+            bounds.append((lo, min(lo + size, n)))
+            lo += size
+        size = min(2 * size, largest)
+    return bounds
+
+def iter_records(conf_files, *, tas=0.0, pitch=0.0, processes=None, chunksize=None):
+    """ Evaluate many plane configs on a process pool and yield headless-style records
+        ({'conf_file', 'project_name', 'cg_offset', ..., 'stability'} or {'conf_file', 'error'})
+        as each chunk of configs finishes, in completion order.
+
+        The compiled polar caches of every referenced airfoil are brought up to date first,
+        with the stale polar files parsed once by a shared pool; the workers then only map
+        the caches. See _chunk_bounds for how the configs are split between the workers. """
+    conf_files = list(conf_files)
+    processes = min(processes or os.cpu_count() or 1, max(1, len(conf_files)))
+    if processes == 1:
+        yield from iter_reports(conf_files, tas=tas, pitch=pitch)
+        return
+    with metrics.timer('io.prewarm_polars'):
+        ingest_dirs(polar_dirs(conf_files), processes=processes)
+    pool = ProcessPoolExecutor(max_workers=processes)
+    try:
+        futures = [pool.submit(_evaluate_chunk, conf_files[lo:hi], tas, pitch) \
+                   for lo, hi in _chunk_bounds(len(conf_files), processes=processes, chunksize=chunksize)]
+        for future in as_completed(futures):
+            for record in future.result():
+                metrics.count('io.records')
+                yield record
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
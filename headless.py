@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+""" Headless stability report for plane configs - never imports PyQt5.
+
+    python headless.py userdata/prop_final.json more_planes/ --tas 20 --format json """
+import os
+import sys
+import csv
+import json
+import glob
+import argparse
+from loader_utils import load_plane
+from instrumentation import configure, metrics
+from structure.flight import Flight
+
+REPORT_FIELDS = ['conf_file', 'project_name', 'cg_offset', 'np_offset', 'np_xfoil', 'static_margin', 'stability']
+
+def expand_conf_files(paths):
+    """ Plane config files given directly, plus every *.json file of any directory given """
+    conf_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            conf_files.extend(sorted(glob.glob(os.path.join(path, '*.json'))))
+        else:
+            conf_files.append(path)
+    return conf_files
+
+def evaluate_conf(conf_file, *, tas=0.0, pitch=0.0):
+    """ CG, NP estimates, static margin and STABLE/UNSTABLE/UNDECIDED verdict of one config """
+    flight = Flight()
+    flight.true_airspeed = tas
+    flight.pitch = pitch
+    plane = load_plane(conf_file=conf_file, preflight=flight)
+    return {'conf_file': conf_file, 'project_name': plane.project_name, \
+            'cg_offset': plane.cg_offset, 'np_offset': plane.np_offset, 'np_xfoil': plane.np_xfoil, \
+            'static_margin': plane.static_margin, 'stability': plane.stability}
+
+def iter_reports(conf_files, *, tas=0.0, pitch=0.0):
+    for conf_file in conf_files:
+        try:
+            yield evaluate_conf(conf_file, tas=tas, pitch=pitch)
+        except Exception as e: # one broken config must not stop the batch
+            yield {'conf_file': conf_file, 'error': f"{type(e).__name__}: {e}"}
+
+def format_text(report):
+    if 'error' in report:
+        return f"{report['conf_file']}: ERROR {report['error']}"
+    fmt = lambda v: 'n/a' if v is None else f"{v:.4f}"
+    return f"{report['conf_file']}: {report['stability']} cg={fmt(report['cg_offset'])} " \
+           f"np={fmt(report['np_offset'])} np_xfoil={fmt(report['np_xfoil'])} " \
+           f"margin={fmt(report['static_margin'])}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the static stability of plane configs without the GUI")
+    parser.add_argument('paths', nargs='+', help="plane config files or directories of *.json configs")
+    parser.add_argument('--tas', type=float, default=0.0, help="true airspeed in m/s for np_xfoil (default: none)")
+    parser.add_argument('--pitch', type=float, default=0.0, help="pitch angle in degrees for np_xfoil")
+    parser.add_argument('--format', choices=['text', 'json', 'csv'], default='text')
+    parser.add_argument('--verbose', action='store_true', help="log diagnostics of every subsystem to stderr")
+    parser.add_argument('--log', default=None, help="log levels, e.g. INFO,polars=DEBUG (default: $PLANEBUILDER_LOG)")
+    parser.add_argument('--metrics', action='store_true', help="print parsing, interpolation and CG/NP metrics to stderr")
+    args = parser.parse_args(argv)
+    configure(args.log)
+    if args.verbose:
+        configure('DEBUG')
+    if args.metrics:
+        metrics.enable()
+
+    out = sys.stdout
+    writer = None
+    if args.format == 'csv':
+        writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS + ['error'])
+        writer.writeheader()
+    n_errors = 0
+    for report in iter_reports(expand_conf_files(args.paths), tas=args.tas, pitch=args.pitch):
+        n_errors += 'error' in report
+        if args.format == 'json':
+            out.write(json.dumps(report) + "\n") # one JSON object per line
+        elif args.format == 'csv':
+            writer.writerow(report)
+        else:
+            out.write(format_text(report) + "\n")
+    if args.metrics:
+        sys.stderr.write(metrics.report() + "\n")
+    return 1 if n_errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
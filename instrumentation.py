@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import logging
+import threading
+import functools
+
+LOGGER_NAME = 'planebuilder'
+SUBSYSTEMS = ['polars', 'aero', 'plane', 'gui', 'io'] # planebuilder.<subsystem> loggers
+LOG_FORMAT = '%(asctime)s %(name)s %(levelname)s: %(message)s'
+
+def get_logger(subsystem):
+    return logging.getLogger(f"{LOGGER_NAME}.{subsystem}")
+
+def set_level(subsystem, level):
+    """ Log level ('DEBUG', logging.INFO, ...) of one subsystem, or of all of them for subsystem=None """
+    logger = logging.getLogger(LOGGER_NAME if subsystem is None else f"{LOGGER_NAME}.{subsystem}")
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+class _StderrHandler(logging.StreamHandler):
+    """ Writes to whatever sys.stderr is at the time of the record (it may be redirected later) """
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+def configure(spec=None, *, stream=None):
+    """ Send planebuilder log records to `stream` (stderr by default) and set the levels from
+        `spec` or the PLANEBUILDER_LOG environment variable, e.g. "INFO,polars=DEBUG,gui=WARNING"
+        (a bare level applies to every subsystem). PLANEBUILDER_METRICS=1 turns metrics on. """
+    root = logging.getLogger(LOGGER_NAME)
+    if not any(getattr(h, '_planebuilder', False) for h in root.handlers):
+        handler = _StderrHandler() if stream is None else logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler._planebuilder = True
+        root.addHandler(handler)
+        root.propagate = False
+    if root.level == logging.NOTSET:
+        root.setLevel(logging.WARNING)
+    spec = os.environ.get('PLANEBUILDER_LOG', '') if spec is None else spec
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        subsystem, _, level = item.rpartition('=')
+        set_level(subsystem or None, level)
+    if os.environ.get('PLANEBUILDER_METRICS', '') not in ['', '0']:
+        metrics.enable()
+
+class _NullTimer():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer():
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class Metrics():
+    """ Named counters and timers, collected only while enabled.
+
+        While disabled, count() and timed functions cost one attribute check and timer()
+        returns a shared no-op context manager. """
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timers = {} # name -> [calls, total seconds, min, max]
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.timers = {}
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self.timers.get(name)
+            if stats is None:
+                self.timers[name] = [1, seconds, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds < stats[2]:
+                    stats[2] = seconds
+                if seconds > stats[3]:
+                    stats[3] = seconds
+
+    def timer(self, name):
+        """ Context manager timing its block under `name` """
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def timed(self, name):
+        """ Decorator timing every call of the function under `name` """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """ {'counters': {name: n}, 'timers': {name: {'calls', 'total', 'mean', 'min', 'max'}}}, times in seconds """
+        with self._lock:
+            return {'counters': dict(self.counters), \
+                    'timers': {name: {'calls': calls, 'total': total, 'mean': total / calls, 'min': lo, 'max': hi} \
+                               for name, (calls, total, lo, hi) in self.timers.items()}}
+
+    def report(self):
+        snap = self.snapshot()
+        lines = []
+        if snap['timers']:
+            lines.append(f"{'timer':<32} {'calls':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9}")
+            for name, t in sorted(snap['timers'].items()):
+                lines.append(f"{name:<32} {t['calls']:>8} {t['total']*1000:>10.2f} {t['mean']*1000:>9.3f} {t['max']*1000:>9.3f}")
+        if snap['counters']:
+            lines.append(f"{'counter':<32} {'value':>8}")
+            for name, value in sorted(snap['counters'].items()):
+                lines.append(f"{name:<32} {value:>8}")
+        return "\n".join(lines) if lines else "no metrics collected"
+
+metrics = Metrics()
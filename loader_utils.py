@@ -1,11 +1,19 @@
 from structure.Plane import Plane
 from structure.flight import Flight
 from structure.Wing import Wing
+from plane_bundle import is_bundle, read_bundle, write_bundle
 import json
 
-def load_plane(*, conf_file, preflight=None):
-    with open(conf_file, 'r') as f:
-        plane_conf = json.load(f)
+def load_plane(*, conf_file, preflight=None, lazy_polars=False):
+    """ Build a Plane from a config file or a plane bundle (see save_plane). With lazy_polars=True
+        the airfoil polars are not parsed here but on first use (see Wing.load_xfoil_data and
+        Plane.prefetch_polars). A bundle's polars are memory-mapped from the bundle itself. """
+    polars = {}
+    if is_bundle(conf_file):
+        plane_conf, polars = read_bundle(conf_file)
+    else:
+        with open(conf_file, 'r') as f:
+            plane_conf = json.load(f)
     if preflight is not None:
         f = preflight
     else:
@@ -18,13 +26,20 @@ def load_plane(*, conf_file, preflight=None):
         for k,v in surface.items():
             params_dict[k] = v
         wing = Wing(params_dict=params_dict, flight=f)
-        wing.load_xfoil_data()
+        if params_dict.get('xfoil_data') in polars:
+            wing.use_polars(polars[params_dict['xfoil_data']])
+        else:
+            wing.load_xfoil_data(lazy=True)
         pl.add_component(component=wing, x_offset=params_dict['offset'])
     for equipment in plane_conf['non_lifting_components']:
         pl.add_equipment(name=equipment['name'], x_offset=equipment['offset'], length=equipment['length'], mass=equipment['mass'], eq_type=equipment.get('type'))
+    if not lazy_polars:
+        pl.prefetch_polars() # all surfaces at once, so their polar files are parsed in parallel
     return pl
 
-def save_plane(*, conf_file, plane: Plane, preflight=None):
+def save_plane(*, conf_file, plane: Plane, preflight=None, bundle=False):
+    """ Write the plane's config as JSON or, with bundle=True, as a single-file bundle that also
+        embeds the parsed polars of its lifting surfaces (load_plane needs no xfoil_data directories) """
     plane_object = {'project_name': plane.project_name, 'flight_conditions': {}, \
                   'fuselage': {'mass': plane.fuselage_mass, 'centerline': plane.x_axis_len}, \
                   'lifting_surfaces': [], 'non_lifting_components': []
@@ -54,6 +69,14 @@ def save_plane(*, conf_file, plane: Plane, preflight=None):
                 'mass': equipment.get('mass')
                 }
         plane_object['non_lifting_components'].append(equipment_data)
+    if bundle:
+        polars = {}
+        for lifting_surface in ['wings', 'htail']:
+            surface_entry = plane.x_axis.get(lifting_surface)
+            if surface_entry is not None and surface_entry['obj'].polars is not None:
+                polars[surface_entry['obj'].xfoil_data] = surface_entry['obj'].polars
+        write_bundle(conf_file, plane_conf=plane_object, polars=polars)
+        return
     serialized=json.dumps(plane_object, indent=4)
     with open(conf_file, 'w') as f:
         f.write(serialized)
@@ -0,0 +1,206 @@
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from aerodynamic_utils import DOWNWASH, SURFACES
+
+DEFAULT_SURFACE_RANGE = (0.5, 2.0) # semispan/chord bounds relative to the current value
+
+_worker_evaluator = None
+
+class LayoutEvaluator():
+    """ Vectorized Plane.cg_offset, np_offset, static_margin and np_xfoil for many candidate
+        layouts of one plane at once.
+
+        A layout is a row of values for `variables`: the name of an x_axis element (wings,
+        htail or equipment) stands for its offset from the nose, '<surface>.semispan' and
+        '<surface>.chord' for a lifting surface's semispan and root chord (the tip chord keeps
+        its taper). Everything else - masses, the other dimensions, the flight condition used
+        for the Cl slopes of np_xfoil - is copied from the plane when the evaluator is built,
+        so the evaluator holds only numpy arrays and can be shipped to worker processes. """
+    def __init__(self, plane, variables):
+        if plane.x_axis.get('wings') is None or plane.x_axis.get('htail') is None:
+            raise ValueError("Both `wings` and `htail` are needed to evaluate the static margin")
+        self.variables = list(variables)
+        self.x_axis_len = plane.x_axis_len
+        self.fuselage_mass = plane.fuselage_mass
+        self.names = list(plane.x_axis.keys())
+        self.begin = np.array([plane.x_axis[name]['begin'] for name in self.names], dtype=np.float64)
+        self.length = np.array([plane.x_axis[name]['end'] - plane.x_axis[name]['begin'] for name in self.names], dtype=np.float64)
+        self.mass = np.array([plane.x_axis[name]['mass'] for name in self.names], dtype=np.float64)
+        self.surfaces = {}
+        for name in SURFACES:
+            obj = plane.x_axis[name]['obj']
+            self.surfaces[name] = {'root_chord': obj.root_chord, 'taper': obj.tip_chord / obj.root_chord, \
+                                   'semispan': obj.semispan, 'ar': obj._ar}
+        self.columns = {} # variable -> ('offset', element index) or (surface field, surface name)
+        for var in self.variables:
+            name, _, field = var.partition('.')
+            if name not in plane.x_axis or (field and (name not in SURFACES or field not in ['semispan', 'chord'])):
+                raise ValueError(f"Unknown layout variable `{var}`")
+            self.columns[var] = ('offset', self.names.index(name)) if not field else (field, name)
+        # np_xfoil: the Cl slopes depend only on the flight condition and the airfoil, not on the layout
+        wing = plane.x_axis['wings']['obj']; tail = plane.x_axis['htail']['obj']
+        self.slopes = None
+        if wing.cl_table is not None and tail.cl_table is not None and wing.Re is not None and tail.Re is not None:
+            self.slopes = (wing.cl_table.slope(wing.Re, wing.aoa), tail.cl_table.slope(tail.Re, tail.aoa))
+
+    def initial_layout(self, plane):
+        values = []
+        for var in self.variables:
+            kind, key = self.columns[var]
+            if kind == 'offset':
+                values.append(plane.x_axis[self.names[key]]['begin'])
+            elif kind == 'chord':
+                values.append(plane.x_axis[key]['obj'].root_chord)
+            else:
+                values.append(plane.x_axis[key]['obj'].semispan)
+        return np.array(values, dtype=np.float64)
+
+    def default_bounds(self, x0):
+        bounds = []
+        for var, value in zip(self.variables, x0):
+            kind, key = self.columns[var]
+            if kind == 'offset':
+                bounds.append((0.0, self.x_axis_len - self.length[key]))
+            else:
+                bounds.append((value * DEFAULT_SURFACE_RANGE[0], value * DEFAULT_SURFACE_RANGE[1]))
+        return np.array(bounds, dtype=np.float64)
+
+    def evaluate(self, layouts):
+        """ {'cg_offset', 'np_offset', 'static_margin', 'np_xfoil'} arrays, one value per row of
+            `layouts`. Offsets are first clipped so that every element stays on the centerline
+            (the clipped layouts are returned as 'layouts'). np_xfoil is NaN without flight conditions. """
+        layouts = np.array(layouts, dtype=np.float64, ndmin=2)
+        n = layouts.shape[0]
+        begin = np.tile(self.begin, (n, 1))
+        length = np.tile(self.length, (n, 1))
+        geometry = {name: {'root_chord': np.full(n, s['root_chord']), 'semispan': np.full(n, s['semispan'])} \
+                    for name, s in self.surfaces.items()}
+        for col, var in enumerate(self.variables):
+            kind, key = self.columns[var]
+            if kind == 'offset':
+                begin[:, key] = layouts[:, col]
+            elif kind == 'chord':
+                geometry[key]['root_chord'] = layouts[:, col]
+                length[:, self.names.index(key)] = layouts[:, col]
+            else:
+                geometry[key]['semispan'] = layouts[:, col]
+        begin = np.clip(begin, 0.0, self.x_axis_len - length) # same bounds as Plane.move_component
+        for col, var in enumerate(self.variables):
+            kind, key = self.columns[var]
+            if kind == 'offset':
+                layouts[:, col] = begin[:, key]
+        total_mass = self.fuselage_mass + self.mass.sum()
+        cg = (self.fuselage_mass * (self.x_axis_len / 2) + ((begin + length / 2) * self.mass).sum(axis=1)) / total_mass
+        geo = {name: self._surface_geometry(name, **geometry[name]) for name in SURFACES}
+        w, t = geo['wings'], geo['htail']
+        wing_begin = begin[:, self.names.index('wings')]
+        wing_ac = wing_begin + w['AC']
+        l_H = (begin[:, self.names.index('htail')] + t['AC']) - wing_ac
+        tail_volume = (t['area'] * l_H) / (w['area'] * w['MAC'])
+        np_offset = wing_begin + w['MAC'] * (0.25 + (0.8 * tail_volume * (t['aspect_ratio'] / w['aspect_ratio']) * 0.6))
+        if self.slopes is None:
+            np_xfoil = np.full(n, np.nan)
+        else:
+            a, a_t = self.slopes
+            np_xfoil = w['AC'] + (a_t * (1 - DOWNWASH) * t['area'] * l_H) / (w['area'] * a)
+        return {'layouts': layouts, 'cg_offset': cg, 'np_offset': np_offset, \
+                'static_margin': (np_offset - cg) / w['MAC'], 'np_xfoil': np_xfoil}
+
+    def _surface_geometry(self, name, *, root_chord, semispan):
+        A = root_chord; B = root_chord * self.surfaces[name]['taper']
+        area = ((A + B) / 2) * semispan * 2
+        MAC = A - (2*(A-B)*(0.5*A + B)/(3*(A+B)))
+        ar = self.surfaces[name]['ar']
+        return {'area': area, 'MAC': MAC, 'AC': 0.25 * MAC, \
+                'aspect_ratio': np.full_like(area, ar) if ar else (semispan * 2)**2 / area}
+
+def default_variables(plane):
+    """ Wing and htail offsets, htail semispan and chord and the offsets of all equipment """
+    equipment = [name for name, elem in plane.x_axis.items() if name not in SURFACES and not hasattr(elem['obj'], 'polars')]
+    return ['wings', 'htail', 'htail.semispan', 'htail.chord'] + equipment
+
+def _init_worker(evaluator):
+    global _worker_evaluator
+    _worker_evaluator = evaluator
+
+def _evaluate_shard(layouts):
+    return _worker_evaluator.evaluate(layouts)
+
+def _evaluate(evaluator, layouts, pool, processes):
+    if pool is None:
+        return evaluator.evaluate(layouts)
+    shards = list(pool.map(_evaluate_shard, np.array_split(layouts, processes)))
+    return {key: np.concatenate([shard[key] for shard in shards]) for key in shards[0]}
+
+def optimize_static_margin(plane, *, target, variables=None, bounds=None, population=256, elite_fraction=0.1, \
+                           max_iterations=200, tol=1e-4, regularization=1e-3, processes=1, seed=0):
+    """ Search for the layout whose static margin (Plane.static_margin, i.e. based on
+        np_offset) equals `target`, as close as possible to the current layout.
+
+        Cross-entropy search: every iteration draws `population` layouts around the current
+        estimate, evaluates them in one vectorized pass (split across `processes` worker
+        processes if more than one), and refits the sampling distribution to the best ones.
+        The objective is (margin - target)^2 plus `regularization` times the squared distance
+        from the current layout, normalized by the bounds, so among the many layouts hitting
+        the target the smallest change wins. `bounds` maps variables to (low, high); offsets
+        default to the centerline and semispans/chords to half and twice their current value.
+
+        Returns {'layout': {variable: value}, 'static_margin', 'cg_offset', 'np_offset',
+        'np_xfoil', 'converged', 'iterations', 'evaluations', 'elapsed'} (elapsed in seconds).
+        The plane is not modified - see apply_layout(). """
+    t0 = time.perf_counter()
+    variables = list(variables or default_variables(plane))
+    evaluator = LayoutEvaluator(plane, variables)
+    x0 = evaluator.initial_layout(plane)
+    limits = evaluator.default_bounds(x0)
+    for var, (lo, hi) in (bounds or {}).items():
+        limits[variables.index(var)] = (lo, hi)
+    lo, hi = limits[:, 0], limits[:, 1]
+    span = np.where(hi > lo, hi - lo, 1.0)
+    rng = np.random.default_rng(seed)
+    n_elite = max(2, int(population * elite_fraction))
+    mean = np.clip(x0, lo, hi)
+    sigma = span / 4
+    best = None
+    evaluations = 0
+    iterations = 0
+    pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(evaluator,)) if processes > 1 else None
+    try:
+        for iterations in range(1, max_iterations + 1):
+            layouts = np.clip(mean + sigma * rng.standard_normal((population, len(variables))), lo, hi)
+            layouts[0] = mean
+            res = _evaluate(evaluator, layouts, pool, processes)
+            evaluations += population
+            cost = (res['static_margin'] - target)**2 + regularization * (((res['layouts'] - x0) / span)**2).sum(axis=1)
+            order = np.argsort(cost)
+            if best is None or cost[order[0]] < best['cost']:
+                best = {'cost': cost[order[0]], **{key: value[order[0]] for key, value in res.items()}}
+            elite = res['layouts'][order[:n_elite]]
+            mean = elite.mean(axis=0)
+            sigma = elite.std(axis=0) + 1e-12
+            if np.all(sigma / span < 1e-4):
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return {'layout': dict(zip(variables, best['layouts'].tolist())), \
+            'static_margin': float(best['static_margin']), 'cg_offset': float(best['cg_offset']), \
+            'np_offset': float(best['np_offset']), 'np_xfoil': float(best['np_xfoil']), \
+            'converged': bool(abs(best['static_margin'] - target) <= tol), \
+            'iterations': iterations, 'evaluations': evaluations, 'elapsed': time.perf_counter() - t0}
+
+def apply_layout(plane, layout):
+    """ Move and resize the plane's components to a layout returned by optimize_static_margin """
+    chords = {var.partition('.')[0]: value for var, value in layout.items() if var.endswith('.chord')}
+    for name, value in chords.items(): # shrink first so that the moves below stay on the centerline
+        if value < plane.x_axis[name]['obj'].root_chord:
+            plane.resize_surface(name=name, root_chord=value)
+    for var, value in layout.items():
+        if '.' not in var:
+            plane.move_component(name=var, distance=value - plane.x_axis[var]['begin'])
+        elif var.endswith('.semispan'):
+            plane.resize_surface(name=var.partition('.')[0], semispan=value)
+    for name, value in chords.items():
+        if value > plane.x_axis[name]['obj'].root_chord:
+            plane.resize_surface(name=name, root_chord=value)
@@ -0,0 +1,89 @@
+import os
+import json
+import mmap
+import struct
+import tempfile
+import numpy as np
+from polar_table import PolarTable
+from polar_registry import AirfoilPolars
+
+BUNDLE_MAGIC = b'PBPLANE1'
+BUNDLE_VERSION = 1
+POINT_COLUMNS = 4 # alpha, Cl, Cd, Cm
+
+# Layout (all numbers little-endian):
+#   BUNDLE_MAGIC | header length (uint64) | JSON header, space-padded to 8 bytes | float64 block
+# The header holds the plane config (as save_plane writes it) and, for every airfoil directory
+# it refers to, the Re grid plus the offsets (in floats) of its arrays inside the float block:
+# the alpha grid, the Cl/Cd/Cm grids, their cell slopes and the points the dicts are built from.
+
+def is_bundle(conf_file):
+    try:
+        with open(conf_file, 'rb') as f:
+            return f.read(len(BUNDLE_MAGIC)) == BUNDLE_MAGIC
+    except OSError:
+        return False
+
+def write_bundle(bundle_file, *, plane_conf, polars):
+    """ Write the plane config together with {xfoil_data: AirfoilPolars} into one file """
+    blocks = []
+    offset = 0
+    def add_block(arr):
+        nonlocal offset
+        arr = np.ascontiguousarray(arr, dtype='<f8')
+        blocks.append(arr)
+        start = offset
+        offset += arr.size
+        return start
+    airfoils = {}
+    for xfoil_data, airfoil in polars.items():
+        table = airfoil.table
+        points = airfoil.points()
+        airfoils[xfoil_data] = {'re_grid': table.re_grid.tolist(), 'alpha': len(table.alpha_grid), \
+                                'alpha_offset': add_block(table.alpha_grid), \
+                                'coefficients_offset': add_block(np.stack([table.cl.values, table.cd.values, table.cm.values])), \
+                                'slopes_offset': add_block(np.stack([table.cl.slopes, table.cd.slopes, table.cm.slopes])), \
+                                'points': [len(p) for p in points], \
+                                'points_offset': add_block(np.concatenate(points))}
+    header = json.dumps({'version': BUNDLE_VERSION, 'plane': plane_conf, 'polars': airfoils}).encode('utf-8')
+    header += b' ' * (-(len(BUNDLE_MAGIC) + 8 + len(header)) % 8) # keep the float block 8-byte aligned
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(bundle_file)), suffix='.tmp', delete=False) as f:
+        try:
+            f.write(BUNDLE_MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for arr in blocks:
+                f.write(arr.tobytes())
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, bundle_file)
+
+def read_bundle(bundle_file):
+    """ (plane_conf, {xfoil_data: AirfoilPolars}) of a bundle. The file is memory-mapped: the
+        polar grids and their slopes are read-only views into it, and the {Re: {alpha: value}}
+        dicts and the plain-list caches of the scalar lookups are only built on first use. """
+    with open(bundle_file, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+        raise ValueError(f"`{bundle_file}` is not a plane bundle")
+    header_len, = struct.unpack_from('<Q', mm, len(BUNDLE_MAGIC))
+    data_start = len(BUNDLE_MAGIC) + 8 + header_len
+    header = json.loads(mm[len(BUNDLE_MAGIC) + 8:data_start].decode('utf-8'))
+    if header.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported plane bundle version {header.get('version')} in `{bundle_file}`")
+    def view(offset, count):
+        return np.frombuffer(mm, dtype='<f8', count=count, offset=data_start + offset*8)
+    polars = {}
+    for xfoil_data, entry in header['polars'].items():
+        n_re = len(entry['re_grid'])
+        alpha_grid = view(entry['alpha_offset'], entry['alpha'])
+        cl, cd, cm = view(entry['coefficients_offset'], 3 * n_re * entry['alpha']).reshape(3, n_re, entry['alpha'])
+        slopes = view(entry['slopes_offset'], 3 * n_re * (entry['alpha'] - 1)).reshape(3, n_re, entry['alpha'] - 1)
+        table = PolarTable.from_arrays(re_grid=entry['re_grid'], alpha_grid=alpha_grid, cl=cl, cd=cd, cm=cm, slopes=slopes)
+        all_points = view(entry['points_offset'], sum(entry['points']) * POINT_COLUMNS).reshape(-1, POINT_COLUMNS)
+        bounds = np.cumsum([0] + entry['points'])
+        points = [all_points[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+        polars[xfoil_data] = AirfoilPolars.from_points(xfoil_data=xfoil_data, table=table, points=points)
+    return header['plane'], polars
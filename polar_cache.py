@@ -0,0 +1,196 @@
+import os
+import glob
+import itertools
+import json
+import mmap
+import struct
+import hashlib
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import get_logger, metrics
+
+log = get_logger('polars')
+
+CACHE_MAGIC = b'PBPOLAR1'
+CACHE_VERSION = 1
+ROW_COLUMNS = 4 # alpha, Cl, Cd, Cm
+PARALLEL_MIN_FILES = 8 # fewer stale files than this are parsed without a process pool
+
+def get_cache_dir():
+    """ Directory holding the compiled polar caches (override with PLANEBUILDER_CACHE_DIR) """
+    return os.environ.get('PLANEBUILDER_CACHE_DIR') or \
+           os.path.join(os.path.expanduser('~'), '.cache', 'planebuilder', 'polars')
+
+def cache_file_for(xfoil_data, cache_dir=None):
+    dir_key = hashlib.sha1(os.path.abspath(xfoil_data).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir or get_cache_dir(), f"{dir_key}.polcache")
+
+def _parse_reynolds(tokens):
+    # "... Re =     0.100 e 6     Ncrit = ..." (the exponent may also be glued to the `e`)
+    idx = tokens.index('Re') + 2
+    mantissa, exponent = tokens[idx], tokens[idx+1]
+    if exponent == 'e':
+        exponent = tokens[idx+2]
+    elif exponent.startswith('e'):
+        exponent = exponent[1:]
+    else:
+        return float(mantissa)
+    return float(f"{mantissa}e{int(exponent)}")
+
+def iter_polar_rows(lines, meta=None):
+    """ Yield (alpha, Cl, Cd, Cm) from the lines of an Xfoil polar, one line at a time, so
+        neither the file nor a list of rows is ever held in memory. `lines` is anything
+        iterable over text lines (an open file, io.StringIO, a list...). The Reynolds
+        number is stored in meta['re'] once its header line has been seen. """
+    for line in lines:
+        tokens = line.split()
+        if len(tokens) < 5 or not line[0].isspace():
+            continue
+        if '.' not in tokens[0]: # also skips the "Re = " header and the column titles
+            if meta is not None and 'Re' in tokens and 'Mach' in tokens:
+                meta['re'] = _parse_reynolds(tokens)
+            continue
+        try:
+            aoa, cl, cd, _, cm = float(tokens[0]), float(tokens[1]), float(tokens[2]), float(tokens[3]), float(tokens[4])
+        except ValueError: # e.g. the "------ --------" ruler below the column titles
+            continue
+        yield round(aoa, 2), cl, cd, cm
+
+def parse_xfoil_file(source):
+    """ Parse a single Xfoil polar (a file path or an open text file/buffer) into (Re, rows),
+        where rows is an (n, 4) array of alpha, Cl, Cd and Cm values in file order. """
+    metrics.count('polars.files_parsed')
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r') as xfoil_file:
+            return _parse_polar_lines(xfoil_file)
+    return _parse_polar_lines(source)
+
+def _parse_polar_lines(lines):
+    meta = {'re': 0.0}
+    values = np.fromiter(itertools.chain.from_iterable(iter_polar_rows(lines, meta)), dtype=np.float64)
+    return meta['re'], values.reshape(-1, ROW_COLUMNS)
+
+def _file_key(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def read_cache(cache_file):
+    """ Map a compiled cache into memory. Returns {abs_path: entry} where every entry
+        holds the file's size/mtime key, its Re and a read-only view of its rows. """
+    try:
+        with open(cache_file, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError): # missing or empty file
+        return {}
+    if mm[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+        return {}
+    header_len, = struct.unpack_from('<Q', mm, len(CACHE_MAGIC))
+    data_start = len(CACHE_MAGIC) + 8 + header_len
+    header = json.loads(mm[len(CACHE_MAGIC) + 8:data_start].decode('utf-8'))
+    if header.get('version') != CACHE_VERSION:
+        return {}
+    entries = {}
+    for path, entry in header['files'].items():
+        rows = np.frombuffer(mm, dtype='<f8', count=entry['rows']*ROW_COLUMNS, \
+                             offset=data_start + entry['offset']*8).reshape(-1, ROW_COLUMNS)
+        entries[path] = {**entry, 'data': rows}
+    return entries
+
+def write_cache(cache_file, entries):
+    """ Write {abs_path: {'size', 'mtime_ns', 're', 'data'}} atomically into a single cache file """
+    files = {}
+    offset = 0
+    for path, entry in entries.items():
+        n_rows = len(entry['data'])
+        files[path] = {'size': entry['size'], 'mtime_ns': entry['mtime_ns'], 're': entry['re'], \
+                       'offset': offset, 'rows': n_rows}
+        offset += n_rows * ROW_COLUMNS
+    header = json.dumps({'version': CACHE_VERSION, 'files': files}).encode('utf-8')
+    header += b' ' * (-(len(CACHE_MAGIC) + 8 + len(header)) % 8) # keep the float block 8-byte aligned
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    # a fresh temporary name per writer: threads of one process may write the same cache at once
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(cache_file), suffix='.tmp', delete=False) as f:
+        try:
+            f.write(CACHE_MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for entry in entries.values():
+                f.write(np.ascontiguousarray(entry['data'], dtype='<f8').tobytes())
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, cache_file)
+
+def parse_xfoil_files(paths, *, processes=None):
+    """ Parse many polar files, spreading them over a process pool.
+        processes=None uses every core, but only once there are enough files to pay
+        for starting the pool; processes=1 always parses in this process. """
+    if processes is None:
+        processes = (os.cpu_count() or 1) if len(paths) >= PARALLEL_MIN_FILES else 1
+    processes = min(processes, len(paths))
+    if processes <= 1:
+        return [parse_xfoil_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(parse_xfoil_file, paths, chunksize=max(1, len(paths) // (4*processes))))
+
+class _DirScan():
+    """ Cached and stale (new or changed) polar files of one directory """
+    def __init__(self, xfoil_data, cache_dir):
+        self.cache_file = cache_file_for(xfoil_data, cache_dir)
+        self.cached = read_cache(self.cache_file)
+        self.entries = {}
+        self.stale = [] # [(path, size/mtime key)]
+        for f in sorted(glob.glob(f"{xfoil_data}/*.pol")):
+            path = os.path.abspath(f)
+            key = _file_key(path)
+            entry = self.cached.get(path)
+            if entry is None or entry['size'] != key['size'] or entry['mtime_ns'] != key['mtime_ns']:
+                self.stale.append((path, key))
+            self.entries[path] = entry
+        metrics.count('polars.cache_hits', len(self.entries) - len(self.stale))
+
+    def finish(self, parsed):
+        """ Merge [(Re, rows)] parsed for self.stale, rewrite the cache if needed and
+            return [(Re, rows), ...] for the whole directory """
+        for (path, key), (reynolds_num, rows) in zip(self.stale, parsed):
+            self.entries[path] = {**key, 're': reynolds_num, 'data': rows}
+        if self.stale or len(self.entries) != len(self.cached):
+            try:
+                write_cache(self.cache_file, self.entries)
+            except OSError as e:
+                log.warning("Unable to write polar cache %s: %s", self.cache_file, e)
+        return [(entry['re'], entry['data']) for entry in self.entries.values()]
+
+def load_xfoil_dir(xfoil_data, *, cache_dir=None, use_cache=True, processes=None):
+    """ Return [(Re, rows), ...] for every *.pol file in `xfoil_data`.
+
+        Files whose path, size and mtime match the compiled cache are served straight
+        from the memory-mapped cache; only new or changed files are parsed again
+        (in parallel, see parse_xfoil_files). """
+    with metrics.timer('polars.load_dir'):
+        if not use_cache:
+            return parse_xfoil_files(sorted(glob.glob(f"{xfoil_data}/*.pol")), processes=processes)
+        scan = _DirScan(xfoil_data, cache_dir)
+        log.debug("%s: %d cached, %d stale polar files", xfoil_data, len(scan.entries) - len(scan.stale), len(scan.stale))
+        return scan.finish(parse_xfoil_files([path for path, _ in scan.stale], processes=processes))
+
+def ingest_dirs(dirs, *, cache_dir=None, processes=None):
+    """ Bring the compiled caches of many airfoil directories up to date. The stale files
+        of all directories are parsed by one shared process pool.
+        Returns {directory: number of polar files}. """
+    scans = {d: _DirScan(d, cache_dir) for d in dirs}
+    stale_paths = [path for scan in scans.values() for path, _ in scan.stale]
+    parsed = parse_xfoil_files(stale_paths, processes=processes)
+    summary = {}
+    for d, scan in scans.items():
+        n_stale = len(scan.stale)
+        summary[d] = len(scan.finish(parsed[:n_stale]))
+        parsed = parsed[n_stale:]
+    return summary
+
+def ingest_tree(root, *, cache_dir=None, processes=None):
+    """ Pre-warm the caches of every directory below `root` that holds *.pol files """
+    dirs = sorted({os.path.dirname(f) for f in glob.glob(os.path.join(root, '**', '*.pol'), recursive=True)})
+    return ingest_dirs(dirs, cache_dir=cache_dir, processes=processes)
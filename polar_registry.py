@@ -0,0 +1,210 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from types import MappingProxyType
+import numpy as np
+from polar_cache import load_xfoil_dir, ingest_dirs
+from polar_table import ALPHA_GRID, PolarTable, fill_alpha_gaps
+
+DEFAULT_BUDGET = 64 * 1024 * 1024 # bytes
+
+class AirfoilPolars():
+    """ Read-only Cl/Cd/Cm tables ({Re: {alpha: value}}) parsed from one Xfoil directory,
+        together with their dense PolarTable used for the actual lookups """
+    def __init__(self, *, xfoil_data, cl_data, cd_data, cm_data, table=None):
+        self.xfoil_data = xfoil_data
+        self.cl_data = _freeze(cl_data)
+        self.cd_data = _freeze(cd_data)
+        self.cm_data = _freeze(cm_data)
+        self.table = table or PolarTable.from_dicts(cl_data=cl_data, cd_data=cd_data, cm_data=cm_data)
+        self._points = None
+        self._tables_lock = threading.Lock()
+        self._tables_nbytes = sum(_dict_nbytes(tbl) for tbl in [cl_data, cd_data, cm_data])
+
+    @classmethod
+    def from_xfoil_dir(cls, xfoil_data):
+        by_re = dict(load_xfoil_dir(xfoil_data)) # a repeated Re: the last file wins
+        if not by_re:
+            raise ValueError(f"No Xfoil polars (*.pol) in `{xfoil_data}`")
+        re_grid = sorted(by_re)
+        filled = np.stack([fill_alpha_gaps(by_re[Re], ALPHA_GRID) for Re in re_grid]) # Re x alpha x (Cl, Cd, Cm)
+        table = PolarTable.from_arrays(re_grid=re_grid, alpha_grid=ALPHA_GRID, \
+                                       cl=filled[:, :, 0], cd=filled[:, :, 1], cm=filled[:, :, 2])
+        # the dicts hold every parsed angle plus the filled-in grid, for interpolate_2d_linear
+        points = []
+        for Re, grid_values in zip(re_grid, filled):
+            rows = by_re[Re]
+            by_alpha = dict(zip(ALPHA_GRID, grid_values.tolist()))
+            by_alpha.update(zip(rows[:, 0].tolist(), rows[:, 1:].tolist()))
+            points.append(np.array([[aoa] + coeffs for aoa, coeffs in by_alpha.items()]))
+        return cls.from_points(xfoil_data=xfoil_data, table=table, points=points)
+
+    @classmethod
+    def from_points(cls, *, xfoil_data, table, points):
+        """ Polars from their dense table and, for each Re of table.re_grid, an (n, 4) array of
+            the alpha, Cl, Cd and Cm values kept in the dicts. The dicts are only built when
+            one of them is first used, lookups through the table never need them. """
+        polars = cls.__new__(cls)
+        polars.xfoil_data = xfoil_data
+        polars.table = table
+        polars._points = points
+        polars._tables_lock = threading.Lock()
+        polars._tables_nbytes = None
+        return polars
+
+    @cached_property
+    def cl_data(self):
+        return self._build_tables()[0]
+
+    @cached_property
+    def cd_data(self):
+        return self._build_tables()[1]
+
+    @cached_property
+    def cm_data(self):
+        return self._build_tables()[2]
+
+    def _build_tables(self):
+        with self._tables_lock: # all three dicts at once, and only once even if threads race for them
+            if 'cl_data' not in self.__dict__:
+                tables = ({}, {}, {}) # Cl, Cd, Cm
+                for Re, re_points in zip(self.table.re_grid.tolist(), self._points):
+                    alpha, *columns = re_points.T.tolist()
+                    for dict_fn, values in zip(tables, columns):
+                        dict_fn[Re] = dict(zip(alpha, values))
+                self._tables_nbytes = sum(_dict_nbytes(tbl) for tbl in tables)
+                for name, dict_fn in zip(['cl_data', 'cd_data', 'cm_data'], tables):
+                    self.__dict__[name] = _freeze(dict_fn)
+            return self.__dict__['cl_data'], self.__dict__['cd_data'], self.__dict__['cm_data']
+
+    def points(self):
+        """ Inverse of from_points: [(n, 4) array of alpha, Cl, Cd, Cm] for every Re of the table """
+        if self._points is not None:
+            return self._points
+        return [np.array([[aoa, cl, self.cd_data[Re][aoa], self.cm_data[Re][aoa]] for aoa, cl in self.cl_data[Re].items()]) \
+                for Re in self.table.re_grid.tolist()]
+
+    @property
+    def nbytes(self):
+        """ Estimated size of the dicts (or of the points they will be built from) and the table """
+        if self._tables_nbytes is None:
+            return sum(p.nbytes for p in self._points) + self.table.nbytes
+        return self._tables_nbytes + self.table.nbytes
+
+class PolarRegistry():
+    """ Process-wide store interning AirfoilPolars by airfoil directory.
+
+        Every Wing pointing at the same `xfoil_data` directory gets the same read-only
+        tables. Least recently used directories are evicted once the estimated size of
+        all interned tables exceeds `max_bytes` (wings keep their own reference, so an
+        eviction only means the next plane using that airfoil loads it again). """
+    def __init__(self, max_bytes=DEFAULT_BUDGET, loader=AirfoilPolars.from_xfoil_dir):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._loading = {} # key -> threading.Event set once that directory is loaded
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(xfoil_data):
+        return os.path.normpath(os.path.abspath(xfoil_data))
+
+    def get(self, xfoil_data):
+        key = self.key(xfoil_data)
+        while True:
+            with self._lock:
+                polars = self._entries.get(key)
+                if polars is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return polars
+                in_flight = self._loading.get(key)
+                if in_flight is None: # we load it; other threads wait for this directory only
+                    self.misses += 1
+                    in_flight = self._loading[key] = threading.Event()
+                    break
+            in_flight.wait()
+        try:
+            return self._load(key, xfoil_data)
+        finally:
+            self._release(key, in_flight)
+
+    def prefetch(self, dirs, *, processes=None):
+        """ Load several airfoil directories, parsing their stale polar files in parallel.
+            Directories already being loaded by another thread are waited for, not parsed again. """
+        missing = sorted({d for d in dirs if d is not None and d not in self})
+        claimed = {} # key -> (directory, in-flight event) of the directories this call loads
+        with self._lock:
+            for d in missing:
+                key = self.key(d)
+                if key not in self._entries and key not in self._loading and key not in claimed:
+                    self.misses += 1
+                    claimed[key] = (d, threading.Event())
+                    self._loading[key] = claimed[key][1]
+        try:
+            if len(claimed) > 1:
+                ingest_dirs([d for d, _ in claimed.values()], processes=processes) # after this the loader only reads the caches
+            for key, (d, _) in claimed.items():
+                self._load(key, d)
+        finally:
+            for key, (_, in_flight) in claimed.items():
+                self._release(key, in_flight)
+        return [self.get(d) for d in missing]
+
+    def _load(self, key, xfoil_data):
+        polars = self.loader(xfoil_data)
+        with self._lock:
+            self._entries[key] = polars
+            self._evict()
+        return polars
+
+    def _release(self, key, in_flight):
+        with self._lock:
+            del self._loading[key]
+        in_flight.set()
+
+    def set_budget(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def nbytes(self):
+        return sum(polars.nbytes for polars in self._entries.values())
+
+    def __contains__(self, xfoil_data):
+        return self.key(xfoil_data) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'nbytes': self.nbytes, 'max_bytes': self.max_bytes, \
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def _evict(self):
+        # never evict the most recently used entry, even if it alone exceeds the budget
+        while len(self._entries) > 1 and self.nbytes > self.max_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+registry = PolarRegistry(max_bytes=int(os.environ.get('PLANEBUILDER_POLAR_BUDGET', DEFAULT_BUDGET)))
+
+def get_polars(xfoil_data):
+    return registry.get(xfoil_data)
+
+def _freeze(table):
+    return MappingProxyType({reynolds_num: MappingProxyType(by_aoa) for reynolds_num, by_aoa in table.items()})
+
+def _dict_nbytes(table):
+    float_size = sys.getsizeof(0.0)
+    return sys.getsizeof(table) + sum(sys.getsizeof(by_aoa) + 2*float_size*len(by_aoa) for by_aoa in table.values())
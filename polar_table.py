@@ -0,0 +1,181 @@
+from bisect import bisect_right
+from functools import cached_property
+import numpy as np
+from instrumentation import metrics
+
+ALPHA_GRID = [round(x*0.10, 2) for x in range(-150, 149)] # alpha from -15 to +14.8 degrees, as filled in by the loader
+
+def bracket(grid, x):
+    """ Index of the grid cell containing x and x's fractional position inside it.
+        Points outside the grid fall into the first/last cell, so the interpolation
+        extrapolates linearly, just like interpolate_2d_linear does. """
+    if len(grid) == 1:
+        return 0, 0.0
+    idx = min(max(bisect_right(grid, x) - 1, 0), len(grid) - 2)
+    return idx, (x - grid[idx]) / (grid[idx+1] - grid[idx])
+
+def batch_bracket(grid, x):
+    """ Vectorized bracket(): lower cell indices, upper cell indices and fractional positions """
+    if len(grid) == 1:
+        idx = np.zeros(np.shape(x), dtype=np.intp)
+        return idx, idx, np.zeros(np.shape(x))
+    idx = np.clip(np.searchsorted(grid, x, side='right') - 1, 0, len(grid) - 2)
+    lower = grid[idx]
+    return idx, idx + 1, (x - lower) / (grid[idx+1] - lower)
+
+def fill_alpha_gaps(rows, alpha_grid=ALPHA_GRID):
+    """ Resample parsed (alpha, Cl, Cd, Cm) rows onto `alpha_grid` in one vectorized pass and
+        return a (len(alpha_grid), 3) array of Cl, Cd and Cm.
+
+        Xfoil skips some values at random: missing angles are interpolated linearly between
+        their neighbours, and angles outside the parsed range are extrapolated from the
+        first/last two points (as get_two_nearest did). If an angle is repeated, the last
+        row wins. """
+    alpha_grid = np.asarray(alpha_grid, dtype=np.float64)
+    rows = rows[np.argsort(rows[:, 0], kind='stable')]
+    rows = rows[np.append(rows[1:, 0] != rows[:-1, 0], True)] # last row of every repeated angle
+    alpha, coeffs = rows[:, 0], rows[:, 1:]
+    filled = np.stack([np.interp(alpha_grid, alpha, coeffs[:, c]) for c in range(coeffs.shape[1])], axis=1)
+    for outside, (k0, k1) in [(alpha_grid < alpha[0], (0, 1)), (alpha_grid > alpha[-1], (-2, -1))]:
+        if outside.any(): # np.interp would just repeat the edge values
+            slope = (coeffs[k1] - coeffs[k0]) / (alpha[k1] - alpha[k0])
+            filled[outside] = coeffs[k0] + (alpha_grid[outside, None] - alpha[k0]) * slope
+    return filled
+
+class PolarGrid():
+    """ One aerodynamic coefficient sampled on a dense Re x alpha grid.
+
+        Calling the grid with (Re, aoa) does a bilinear interpolation with bisect-based
+        bracket lookup, i.e. the same blending as aerodynamic_utils.interpolate_2d_linear
+        without rebuilding the alpha range or scanning the Re keys on every call. """
+    def __init__(self, *, re_grid, alpha_grid, values, slopes=None):
+        self.re_grid = np.asarray(re_grid, dtype=np.float64)
+        self.alpha_grid = np.asarray(alpha_grid, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.re_grid), len(self.alpha_grid))
+        # d(value)/d(alpha) of every grid cell, per degree. Inside a cell the bilinear surface
+        # is linear in alpha, so this is exactly what a small forward difference would give.
+        if slopes is None:
+            slopes = np.diff(self.values, axis=1) / np.diff(self.alpha_grid)
+        self.slopes = np.asarray(slopes, dtype=np.float64).reshape(len(self.re_grid), len(self.alpha_grid) - 1)
+
+    # plain lists are much faster than numpy for one scalar query at a time. They are built on
+    # first use, so grids that are only queried in batches (or not at all) never pay for them.
+    @cached_property
+    def _re(self):
+        return self.re_grid.tolist()
+
+    @cached_property
+    def _alpha(self):
+        return self.alpha_grid.tolist()
+
+    @cached_property
+    def _rows(self):
+        return self.values.tolist()
+
+    @cached_property
+    def _slope_rows(self):
+        return self.slopes.tolist()
+
+    def __call__(self, Re, aoa):
+        if metrics.enabled: # inlined check, this is called in every simulation step
+            metrics.count('polars.lookups')
+        i, t_re = bracket(self._re, Re)
+        j, t_aoa = bracket(self._alpha, aoa)
+        return self._at(i, t_re, j, t_aoa)
+
+    def _at(self, i, t_re, j, t_aoa):
+        row = self._rows[i]
+        f_Re1 = row[j]; f_Re2 = row[j+1] if t_aoa else f_Re1
+        if t_re:
+            row = self._rows[i+1]
+            f_Re1 += t_re * (row[j] - f_Re1)
+            f_Re2 += t_re * ((row[j+1] if t_aoa else row[j]) - f_Re2)
+        return f_Re1 + t_aoa * (f_Re2 - f_Re1)
+
+    def slope(self, Re, aoa):
+        """ d(value)/d(alpha) at (Re, aoa), looked up from the precomputed cell slopes """
+        i, t_re = bracket(self._re, Re)
+        j, _ = bracket(self._alpha, aoa)
+        s = self._slope_rows[i][j]
+        if t_re:
+            s += t_re * (self._slope_rows[i+1][j] - s)
+        return s
+
+    def slope_batch(self, Re, aoa):
+        """ Vectorized slope() """
+        Re, aoa = np.broadcast_arrays(np.asarray(Re, dtype=np.float64), np.asarray(aoa, dtype=np.float64))
+        i0, i1, t_re = batch_bracket(self.re_grid, Re)
+        j, _, _ = batch_bracket(self.alpha_grid, aoa)
+        return self.slopes[i0, j] + t_re * (self.slopes[i1, j] - self.slopes[i0, j])
+
+    def batch(self, Re, aoa):
+        """ Interpolate at many (Re, aoa) points at once; the inputs broadcast against each other """
+        Re, aoa = np.broadcast_arrays(np.asarray(Re, dtype=np.float64), np.asarray(aoa, dtype=np.float64))
+        metrics.count('polars.batch_points', Re.size)
+        return self._blend(batch_bracket(self.re_grid, Re), batch_bracket(self.alpha_grid, aoa))
+
+    def _blend(self, re_bracket, aoa_bracket):
+        i0, i1, t_re = re_bracket
+        j0, j1, t_aoa = aoa_bracket
+        v = self.values
+        f_Re1 = v[i0, j0] + t_re * (v[i1, j0] - v[i0, j0])
+        f_Re2 = v[i0, j1] + t_re * (v[i1, j1] - v[i0, j1])
+        return f_Re1 + t_aoa * (f_Re2 - f_Re1)
+
+    @property
+    def nbytes(self):
+        return self.re_grid.nbytes + self.alpha_grid.nbytes + self.values.nbytes + self.slopes.nbytes
+
+class PolarTable():
+    """ Cl, Cd and Cm grids of one airfoil, sharing the same Re and alpha axes """
+    def __init__(self, *, cl: PolarGrid, cd: PolarGrid, cm: PolarGrid):
+        self.cl = cl
+        self.cd = cd
+        self.cm = cm
+
+    @classmethod
+    def from_arrays(cls, *, re_grid, alpha_grid, cl, cd, cm, slopes=None):
+        """ Build the grids from (len(re_grid), len(alpha_grid)) arrays and, if already known,
+            the (3, len(re_grid), len(alpha_grid) - 1) cell slopes of Cl, Cd and Cm """
+        slopes = [None] * 3 if slopes is None else slopes
+        return cls(**{name: PolarGrid(re_grid=re_grid, alpha_grid=alpha_grid, values=values, slopes=cell_slopes) \
+                      for name, values, cell_slopes in zip(['cl', 'cd', 'cm'], [cl, cd, cm], slopes)})
+
+    @classmethod
+    def from_dicts(cls, *, cl_data, cd_data, cm_data, alpha_grid=ALPHA_GRID):
+        """ Build the grids from {Re: {alpha: value}} tables filled in on `alpha_grid` """
+        re_grid = sorted(cl_data.keys())
+        grids = {}
+        for name, dict_fn in [('cl', cl_data), ('cd', cd_data), ('cm', cm_data)]:
+            values = [[dict_fn[Re][aoa] for aoa in alpha_grid] for Re in re_grid]
+            grids[name] = PolarGrid(re_grid=re_grid, alpha_grid=alpha_grid, values=values)
+        return cls(**grids)
+
+    def batch(self, Re, aoa):
+        """ Cl, Cd and Cm arrays for arrays of Reynolds numbers and angles of attack.
+            The grid cells are located once and shared by all three coefficients. """
+        Re, aoa = np.broadcast_arrays(np.asarray(Re, dtype=np.float64), np.asarray(aoa, dtype=np.float64))
+        metrics.count('polars.batch_points', Re.size)
+        re_bracket = batch_bracket(self.re_grid, Re)
+        aoa_bracket = batch_bracket(self.alpha_grid, aoa)
+        return tuple(grid._blend(re_bracket, aoa_bracket) for grid in [self.cl, self.cd, self.cm])
+
+    def lookup(self, Re, aoa):
+        """ Cl, Cd and Cm at one (Re, aoa) point, locating the grid cell only once """
+        if metrics.enabled:
+            metrics.count('polars.lookups')
+        i, t_re = bracket(self.cl._re, Re)
+        j, t_aoa = bracket(self.cl._alpha, aoa)
+        return self.cl._at(i, t_re, j, t_aoa), self.cd._at(i, t_re, j, t_aoa), self.cm._at(i, t_re, j, t_aoa)
+
+    @property
+    def re_grid(self):
+        return self.cl.re_grid
+
+    @property
+    def alpha_grid(self):
+        return self.cl.alpha_grid
+
+    @property
+    def nbytes(self):
+        return self.cl.nbytes + self.cd.nbytes + self.cm.nbytes
@@ -5,6 +5,7 @@ from PlanePainter import PlanePainter
 from DraggableLabel import DraggableLabel
 from EventController import EventController, ParamsEditor, NewPlaneForm, show_unable_window
 from loader_utils import new_plane_from_gui
+from instrumentation import configure
 
 appli = QApplication([]) # ugly global variable
 APP_HDG = "RC Plane Calculator"
@@ -120,6 +121,7 @@ class config_window(QMainWindow):
 
         #### RIGHT-HAND SIDE (components and parameters) #####
         self.xfoil_predictions = QLabel("Xfoil out")
+        self.pp.aero_updated.connect(self.show_xfoil_predictions)
         components_box1 = QHBoxLayout()
         components_box2 = QHBoxLayout()
         form_box = QFormLayout()
@@ -229,7 +231,8 @@ class config_window(QMainWindow):
                   "Please set the new TAS (True Airspeed) in m/sec", self.pp.plane.flight.true_airspeed, 0.0, 500, 2)
         if ok:
             self.pp.plane.flight.true_airspeed = tas
-            self.xfoil_predictions.setText(f"Re = {self.pp.plane.x_axis['wings']['obj'].Re}")
+            self.xfoil_predictions.setText("Re = ...") # filled in by show_xfoil_predictions
+            self.pp.refresh_overlay()
 
     def set_pitch(self): # set pitch angle (the airfoils' AOA will be calculated on this basis)
         if self.pp.plane is None:
@@ -239,10 +242,16 @@ class config_window(QMainWindow):
                   "Please set the new pitch angle relative to the fuselage centerline in degrees", self.pp.plane.flight.pitch, -12.0, 14.0, 3)
         if ok:
             self.pp.plane.flight.pitch = pitch
+            self.pp.refresh_overlay()
+
+    def show_xfoil_predictions(self, result): # aerodynamic results arrive from PlanePainter's worker thread
+        self.xfoil_predictions.setText(f"Re = {result['Re_wings']}")
 
 def qt_app_runner():
     #appli = QApplication([])
+    configure() # log levels from $PLANEBUILDER_LOG
     win = config_window()
+    appli.aboutToQuit.connect(win.pp.shutdown)
     appli.exec_()
 
 #app = QApplication([])
@@ -0,0 +1,82 @@
+from aerodynamic_utils import DOWNWASH, SURFACES
+
+TAIL_FACTOR = 0.8 * 0.6 # the constants of Plane.np_offset's tail volume term
+OUTPUTS = ['cg_offset', 'np_offset', 'np_xfoil', 'static_margin']
+
+def layout_jacobian(plane):
+    """ Partial derivatives of Plane.cg_offset, np_offset, np_xfoil and static_margin with
+        respect to the layout, computed in closed form from the current plane.
+
+        Returns {output: {parameter: derivative}}. Parameters are named like the optimizer's
+        layout variables: '<name>' is the offset of an x_axis element, '<name>.mass' its mass,
+        and '<surface>.chord' / '<surface>.semispan' the root chord (the tip chord keeps its
+        taper, and the element's length on the centerline follows the root chord) and semispan
+        of `wings` and `htail`. Outputs that the plane cannot compute (no wings or tail, or
+        no flight conditions for np_xfoil) map to None. """
+    jac = {output: None for output in OUTPUTS}
+    total_mass = plane.fuselage_mass + plane.total_mass
+    cg = plane.cg_offset
+    jac['cg_offset'] = d_cg = {}
+    for name, elem in plane.x_axis.items():
+        d_cg[name] = elem['mass'] / total_mass
+        d_cg[f"{name}.mass"] = ((elem['begin'] + (elem['end'] - elem['begin']) / 2) - cg) / total_mass
+        if name in SURFACES:
+            d_cg[f"{name}.chord"] = elem['mass'] / (2 * total_mass)
+            d_cg[f"{name}.semispan"] = 0.0
+    if plane.x_axis.get('wings') is None or plane.x_axis.get('htail') is None:
+        return jac
+    wing = plane.x_axis['wings']['obj']; tail = plane.x_axis['htail']['obj']
+    l_H = (plane.x_axis['htail']['begin'] + tail.AC) - (plane.x_axis['wings']['begin'] + wing.AC)
+    dAC_w = wing.AC / wing.root_chord # MAC and AC are linear in the root chord at fixed taper
+    dAC_t = tail.AC / tail.root_chord
+
+    # np_offset = wing begin + AC_w + TAIL_FACTOR * S_t * l_H * (AR_t / AR_w) / S_w
+    k = TAIL_FACTOR * tail.area * (tail.aspect_ratio / wing.aspect_ratio) / wing.area # d np / d l_H
+    F = k * l_H
+    ar_w = 0.0 if wing._ar else 1.0 # fixed aspect ratios don't change with the geometry
+    ar_t = 0.0 if tail._ar else 1.0
+    jac['np_offset'] = d_np = _zeros(d_cg)
+    d_np['wings'] = 1 - k
+    d_np['htail'] = k
+    d_np['wings.chord'] = dAC_w - k*dAC_w + (ar_w - 1) * F / wing.root_chord
+    d_np['wings.semispan'] = -(1 + ar_w) * F / wing.semispan
+    d_np['htail.chord'] = k*dAC_t + (1 - ar_t) * F / tail.root_chord
+    d_np['htail.semispan'] = (1 + ar_t) * F / tail.semispan
+
+    # static_margin = (np_offset - cg_offset) / MAC_w
+    margin = (plane.np_offset - cg) / wing.MAC
+    jac['static_margin'] = {param: (d_np[param] - d_cg[param]) / wing.MAC for param in d_cg}
+    jac['static_margin']['wings.chord'] -= margin / wing.root_chord
+
+    # np_xfoil = AC_w + c * S_t * l_H / S_w, with c = a_t * (1 - downwash) / a independent of the layout
+    if wing.cl_table is None or tail.cl_table is None or wing.Re is None or tail.Re is None:
+        return jac
+    a = wing.cl_table.slope(wing.Re, wing.aoa)
+    a_t = tail.cl_table.slope(tail.Re, tail.aoa)
+    c = a_t * (1 - DOWNWASH) * tail.area / (wing.area * a) # d np_xfoil / d l_H
+    G = c * l_H
+    jac['np_xfoil'] = d_xf = _zeros(d_cg)
+    d_xf['wings'] = -c
+    d_xf['htail'] = c
+    d_xf['wings.chord'] = dAC_w - c*dAC_w - G / wing.root_chord
+    d_xf['wings.semispan'] = -G / wing.semispan
+    d_xf['htail.chord'] = c*dAC_t + G / tail.root_chord
+    d_xf['htail.semispan'] = G / tail.semispan
+    return jac
+
+def predict_change(jacobian, changes):
+    """ First-order change of every output for {parameter: delta} edits, e.g.
+        predict_change(jac, {'htail': 0.05, 'cargo.mass': -0.2}) """
+    predicted = {}
+    for output, derivatives in jacobian.items():
+        if derivatives is None:
+            predicted[output] = None
+            continue
+        unknown = [param for param in changes if param not in derivatives]
+        if unknown:
+            raise ValueError(f"Unknown layout parameters: {', '.join(unknown)}")
+        predicted[output] = sum(derivatives[param] * delta for param, delta in changes.items())
+    return predicted
+
+def _zeros(like):
+    return {param: 0.0 for param in like}
@@ -0,0 +1,245 @@
+import math
+import numpy as np
+
+RAD_TO_DEG = 180.0 / math.pi
+
+class SurfaceSnapshot():
+    """ Constants of one lifting surface needed by the equations of motion """
+    def __init__(self, *, wing, x_offset, flight):
+        self.table = None if wing.polars is None else wing.polars.table
+        self.aoi = wing.aoi
+        self.re_per_speed = wing.characteristic_length / flight.air_viscosity
+        self.area = wing.area
+        self.ref_area = wing.ref_area
+        self.induced_factor = 1.0 / (math.pi * wing.aspect_ratio * wing.e)
+        self.cdp_factor = wing.form_factor * wing.wetted_area / wing.ref_area
+        self.x_ac = x_offset + wing.AC
+        self.mac = wing.MAC
+
+class FlightSimulator():
+    """ Longitudinal flight of a Plane: state = (true airspeed m/s, pitch deg, angular velocity deg/s).
+
+        dV/dt = (thrust - drag) / mass
+        dpitch/dt = angular velocity
+        domega/dt = pitching moment about the CG / moment of inertia
+
+        Every lifting surface contributes its drag (Cdi + Cdp, as in Wing), its lift acting at
+        its aerodynamic center and its Cm moment; the wind gust acts at Plane.wind_gust_offset.
+        Mass, CG, inertia and surface geometry are captured when the simulator is created and
+        the coefficients come straight from the dense polar tables, so one evaluation of the
+        right-hand side never touches the Plane/Wing properties. """
+    def __init__(self, plane):
+        flight = plane.flight
+        self.rho = flight.rho
+        self.thrust = flight.thrust
+        self.mass = plane.fuselage_mass + plane.total_mass
+        self.cg = plane.cg_offset
+        self.inertia = plane.moment_of_inertia
+        if self.mass <= 0 or self.inertia <= 0:
+            raise ValueError("The plane needs a positive mass and moment of inertia to be simulated")
+        self.surfaces = [SurfaceSnapshot(wing=elem['obj'], x_offset=elem['begin'], flight=flight) \
+                         for elem in plane.x_axis.values() if hasattr(elem['obj'], 'polars')]
+        self.gust_moment = 0.0
+        if plane.wind_gust_force is not None and plane.wind_gust_offset is not None:
+            self.gust_moment = plane.wind_gust_force * (self.cg - plane.wind_gust_offset)
+        self.initial_state = (flight.true_airspeed, flight.pitch, plane.angular_velocity)
+
+    def derivatives(self, state):
+        speed, pitch, omega = state
+        q = 0.5 * self.rho * speed * speed
+        drag = 0.0
+        moment = self.gust_moment
+        for s in self.surfaces:
+            Re = speed * s.re_per_speed
+            if speed < 1:
+                cl = 0.0; cm = 0.0
+            elif s.table is None:
+                cl = 1.0; cm = 0.0 # same approximation as Wing.Cl without airfoil data
+            else:
+                cl, _, cm = s.table.lookup(Re, pitch + s.aoi)
+            cf = 0.0 if Re < 100 else 0.455 / math.pow(math.log10(Re), 2.58)
+            drag += (cl * cl * s.induced_factor + cf * s.cdp_factor) * q * s.ref_area
+            lift = cl * q * s.area
+            moment += lift * (self.cg - s.x_ac) + cm * q * s.area * s.mac
+        return ((self.thrust - drag) / self.mass, omega, RAD_TO_DEG * moment / self.inertia)
+
+    def step_euler(self, state, dt):
+        v, p, w = state
+        dv, dp, dw = self.derivatives(state)
+        return (v + dt*dv, p + dt*dp, w + dt*dw)
+
+    def step_rk4(self, state, dt):
+        v, p, w = state
+        h = 0.5*dt
+        a = self.derivatives(state)
+        b = self.derivatives((v + h*a[0], p + h*a[1], w + h*a[2]))
+        c = self.derivatives((v + h*b[0], p + h*b[1], w + h*b[2]))
+        d = self.derivatives((v + dt*c[0], p + dt*c[1], w + dt*c[2]))
+        k = dt / 6
+        return (v + k*(a[0] + 2*b[0] + 2*c[0] + d[0]),
+                p + k*(a[1] + 2*b[1] + 2*c[1] + d[1]),
+                w + k*(a[2] + 2*b[2] + 2*c[2] + d[2]))
+
+    def run(self, *, duration, dt=0.05, method='rk4', state=None, rtol=1e-6, atol=1e-8, max_steps=1000000):
+        """ Integrate for `duration` seconds and return {'t', 'true_airspeed', 'pitch',
+            'angular_velocity'} arrays, one row per step (including the initial state).
+
+            method is 'euler' or 'rk4' (fixed step `dt`) or 'rk45' (adaptive Dormand-Prince,
+            `dt` is the first trial step and rtol/atol bound the local error). An adaptive run
+            raises a RuntimeError rather than returning a short trajectory when it needs more
+            than `max_steps` steps (rejected ones included) or its step size underflows. """
+        state = tuple(float(y) for y in (state or self.initial_state))
+        if method == 'rk45':
+            return self._run_adaptive(duration=duration, dt=dt, state=state, rtol=rtol, atol=atol, max_steps=max_steps)
+        step = {'euler': self.step_euler, 'rk4': self.step_rk4}.get(method)
+        if step is None:
+            raise ValueError(f"Unknown integration method `{method}` (euler, rk4 or rk45)")
+        n_steps = int(math.ceil(duration / dt - 1e-9))
+        traj = np.empty((n_steps + 1, 4))
+        traj[0] = (0.0, *state)
+        for i in range(1, n_steps + 1):
+            state = step(state, dt)
+            traj[i] = (i*dt, *state)
+        return _as_trajectory(traj)
+
+    def _run_adaptive(self, *, duration, dt, state, rtol, atol, max_steps):
+        traj = np.empty((max(16, int(duration / dt) + 1), 4)) # grown by doubling if needed
+        traj[0] = (0.0, *state)
+        n = 1
+        t = 0.0
+        h = dt
+        min_step = 1e-12 * duration
+        k1 = self.derivatives(state)
+        for _ in range(max_steps): # accepted and rejected steps alike
+            if t >= duration:
+                break
+            h = min(h, duration - t)
+            new_state, k7, err = self._dormand_prince(state, k1, h, rtol, atol)
+            if err <= 1.0:
+                t += h
+                state, k1 = new_state, k7 # first-same-as-last
+                if n == len(traj):
+                    traj = np.concatenate([traj, np.empty_like(traj)])
+                traj[n] = (t, *state)
+                n += 1
+            elif not err < math.inf: # NaN or infinite error: the state blew up, shrink hard
+                err = 1e5
+            h *= min(5.0, max(0.2, 0.9 * (err if err > 0 else 1e-10) ** -0.2))
+            if h < min_step and t < duration:
+                raise RuntimeError(f"Step size underflow at t = {t:g} s (h = {h:g} s), the flight state diverged")
+        if t < duration:
+            raise RuntimeError(f"No convergence after {max_steps} steps, stopped at t = {t:g} of {duration:g} s")
+        return _as_trajectory(traj[:n])
+
+    def _dormand_prince(self, y, k1, h, rtol, atol):
+        def at(*terms):
+            return tuple(yi + h*sum(c*k[i] for c, k in terms) for i, yi in enumerate(y))
+        k2 = self.derivatives(at((1/5, k1)))
+        k3 = self.derivatives(at((3/40, k1), (9/40, k2)))
+        k4 = self.derivatives(at((44/45, k1), (-56/15, k2), (32/9, k3)))
+        k5 = self.derivatives(at((19372/6561, k1), (-25360/2187, k2), (64448/6561, k3), (-212/729, k4)))
+        k6 = self.derivatives(at((9017/3168, k1), (-355/33, k2), (46732/5247, k3), (49/176, k4), (-5103/18656, k5)))
+        y5 = at((35/384, k1), (500/1113, k3), (125/192, k4), (-2187/6784, k5), (11/84, k6))
+        k7 = self.derivatives(y5)
+        err = 0.0
+        for i in range(len(y)):
+            e = h * (71/57600*k1[i] - 71/16695*k3[i] + 71/1920*k4[i] - 17253/339200*k5[i] + 22/525*k6[i] - 1/40*k7[i])
+            ratio = abs(e) / (atol + rtol*max(abs(y[i]), abs(y5[i])))
+            if not ratio <= err: # unlike max(), keeps a NaN
+                err = ratio
+        return y5, k7, err
+
+def _as_trajectory(traj):
+    return {'t': traj[:, 0], 'true_airspeed': traj[:, 1], 'pitch': traj[:, 2], 'angular_velocity': traj[:, 3]}
+
+def simulate(plane, *, duration, dt=0.05, method='rk4', **kwargs):
+    """ Simulate `plane` from its current flight state, see FlightSimulator.run """
+    return FlightSimulator(plane).run(duration=duration, dt=dt, method=method, **kwargs)
+
+SURFACE_FIELDS = ['re_per_speed', 'area', 'ref_area', 'induced_factor', 'cdp_factor', 'x_ac', 'mac', 'aoi']
+
+class BatchSimulator():
+    """ FlightSimulator for N planes advanced in lock-step, in struct-of-arrays layout.
+
+        Every per-plane quantity (state, mass, CG, inertia, thrust, air density, gust moment)
+        is an array of length N, and every surface quantity is a (surfaces, N) array whose
+        rows are the k-th lifting surface of each plane (padded with zero-area surfaces for
+        planes that have fewer of them). Surfaces sharing an airfoil share one PolarTable,
+        so the coefficients are looked up with one vectorized call per airfoil. """
+    def __init__(self, planes):
+        sims = [FlightSimulator(plane) for plane in planes]
+        if not sims:
+            raise ValueError("No planes to simulate")
+        self.n = n = len(sims)
+        for field in ['rho', 'thrust', 'mass', 'cg', 'inertia', 'gust_moment']:
+            setattr(self, field, np.array([getattr(sim, field) for sim in sims], dtype=np.float64))
+        self.initial_state = tuple(np.array(col, dtype=np.float64) for col in zip(*[sim.initial_state for sim in sims]))
+        n_surfaces = max(len(sim.surfaces) for sim in sims)
+        self.present = np.zeros((n_surfaces, n), dtype=bool)
+        for field in SURFACE_FIELDS:
+            setattr(self, field, np.zeros((n_surfaces, n)))
+        groups = {} # id(table) -> (table, flat indices of the surfaces using it)
+        for col, sim in enumerate(sims):
+            for row, surface in enumerate(sim.surfaces):
+                self.present[row, col] = True
+                for field in SURFACE_FIELDS:
+                    getattr(self, field)[row, col] = getattr(surface, field)
+                if surface.table is not None:
+                    groups.setdefault(id(surface.table), (surface.table, []))[1].append(row*n + col)
+        self.mac[~self.present] = 1.0 # keeps the padding finite
+        self.induced_factor[~self.present] = 0.0
+        self.table_groups = [(table, np.array(idx, dtype=np.intp)) for table, idx in groups.values()]
+        self.default_cl = self.present.astype(np.float64) # same approximation as Wing.Cl without airfoil data
+
+    def derivatives(self, speed, pitch, omega):
+        q = 0.5 * self.rho * speed * speed
+        Re = speed * self.re_per_speed
+        aoa = pitch + self.aoi
+        cl = self.default_cl.copy()
+        cm = np.zeros_like(cl)
+        for table, idx in self.table_groups:
+            c_l, _, c_m = table.batch(Re.flat[idx], aoa.flat[idx])
+            cl.flat[idx] = c_l
+            cm.flat[idx] = c_m
+        slow = speed < 1
+        cl[:, slow] = 0.0
+        cm[:, slow] = 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cf = np.where(Re < 100, 0.0, 0.455 / np.power(np.log10(np.maximum(Re, 100)), 2.58))
+        drag = ((cl*cl*self.induced_factor + cf*self.cdp_factor) * self.ref_area).sum(axis=0) * q
+        lift = cl * self.area
+        moment = self.gust_moment + q * (lift * (self.cg - self.x_ac) + cm * self.area * self.mac).sum(axis=0)
+        return (self.thrust - drag) / self.mass, omega, RAD_TO_DEG * moment / self.inertia
+
+    def step_euler(self, state, dt):
+        v, p, w = state
+        dv, dp, dw = self.derivatives(v, p, w)
+        return (v + dt*dv, p + dt*dp, w + dt*dw)
+
+    def step_rk4(self, state, dt):
+        v, p, w = state
+        h = 0.5*dt
+        a = self.derivatives(v, p, w)
+        b = self.derivatives(v + h*a[0], p + h*a[1], w + h*a[2])
+        c = self.derivatives(v + h*b[0], p + h*b[1], w + h*b[2])
+        d = self.derivatives(v + dt*c[0], p + dt*c[1], w + dt*c[2])
+        k = dt / 6
+        return (v + k*(a[0] + 2*b[0] + 2*c[0] + d[0]),
+                p + k*(a[1] + 2*b[1] + 2*c[1] + d[1]),
+                w + k*(a[2] + 2*b[2] + 2*c[2] + d[2]))
+
+    def run(self, *, duration, dt=0.05, method='rk4', state=None):
+        """ Integrate all planes for `duration` seconds with a fixed step (lock-step rules out
+            per-plane adaptive steps). Returns 't' and (steps + 1, N) arrays of
+            'true_airspeed', 'pitch' and 'angular_velocity'. """
+        step = {'euler': self.step_euler, 'rk4': self.step_rk4}.get(method)
+        if step is None:
+            raise ValueError(f"Unknown batch integration method `{method}` (euler or rk4)")
+        state = tuple(np.array(y, dtype=np.float64) for y in (state or self.initial_state))
+        n_steps = int(math.ceil(duration / dt - 1e-9))
+        traj = np.empty((3, n_steps + 1, self.n))
+        traj[:, 0] = state
+        for i in range(1, n_steps + 1):
+            state = step(state, dt)
+            traj[:, i] = state
+        return {'t': np.arange(n_steps + 1) * dt, 'true_airspeed': traj[0], 'pitch': traj[1], 'angular_velocity': traj[2]}
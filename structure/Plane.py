@@ -1,10 +1,16 @@
 import math
-from functools import reduce
+from simulation import FlightSimulator
 from structure.flight import Flight
 from structure.Wing import Wing
 from structure.component import Component
 from structure.Equipment import Equipment
-from aerodynamic_utils import np_from_xfoil
+from structure.mass_properties import MassProperties
+from structure.interval_index import IntervalIndex
+from aerodynamic_utils import np_xfoil_offset
+from polar_registry import registry as polar_registry
+from instrumentation import get_logger, metrics
+
+log = get_logger('plane')
 
 class Plane():
     TIME_INCR = 0.05                    # time increment
@@ -13,9 +19,10 @@ class Plane():
         self.project_name = None
         self.components = []
         self.fuselage_mass = 0.0
-        self.total_mass = 0.0
         self.x_axis_len = x_axis_len
         self.x_axis = {} # {'propeller': {'begin': 10.0, 'end': 12.0, 'obj': obj_reference}}
+        self.mass_props = MassProperties() # running totals over x_axis, kept in sync by every method changing it
+        self.x_index = IntervalIndex() # begin/end ranges of x_axis, kept in sync like mass_props
         self.wind_gust_offset = None
         self.wind_gust_force = None
         self.angular_velocity = 0.0
@@ -24,12 +31,12 @@ class Plane():
         if x_offset + component.root_chord > self.x_axis_len:
             raise ValueError(f"The component's end at {x_offset+component.root_chord} falls beyond the plane's centerline of length {self.x_axis_len}")
         self.components.append((component, x_offset))
-        component_cg = component.root_chord / 2      # assume even weight distribution
+        self._untrack(component.name)
         self.x_axis[component.name] = {'begin': x_offset, 'end': x_offset + component.root_chord, 'mass': component.mass, 'obj': component}
-        self.total_mass += component.mass
+        self._track(component.name)
 
     def remove_component(self, *, component_name):
-        self.total_mass -= self.x_axis[component_name]['obj'].mass
+        self._untrack(component_name)
         components = [c for c in self.components if c[0].name != component_name]
         del self.x_axis[component_name]['obj']
         del self.x_axis[component_name]
@@ -41,15 +48,55 @@ class Plane():
             raise OutsideCenterlineException("Component offset cannot be less than zero.")
         if new_end > self.x_axis_len:
             raise OutsideCenterlineException("Component cannot extend beyond the centerline.")
+        self._untrack(name)
         self.x_axis[name]['begin'] = new_begin
         self.x_axis[name]['end'] = new_end
-        print (f"Unable to move {name}")
+        self._track(name)
+        log.debug("Moved %s to %s-%s", name, new_begin, new_end)
+
+    def resize_surface(self, *, name, semispan=None, root_chord=None): # the tip chord follows the root chord (same taper)
+        surface = self.x_axis[name]['obj']
+        if root_chord is not None:
+            if root_chord <= 0:
+                raise ValueError("The root chord must be greater than zero")
+            new_end = round(self.x_axis[name]['begin'] + root_chord, 4)
+            if new_end > self.x_axis_len:
+                raise OutsideCenterlineException("Component cannot extend beyond the centerline.")
+            surface.tip_chord = surface.tip_chord * (root_chord / surface.root_chord)
+            surface.root_chord = root_chord
+            self._untrack(name)
+            self.x_axis[name]['end'] = new_end
+            self._track(name)
+        if semispan is not None:
+            if semispan <= 0:
+                raise ValueError("The semispan must be greater than zero")
+            surface.semispan = semispan
 
     def add_equipment(self, *, name, x_offset, length, mass, eq_type=None):
        if x_offset + length > self.x_axis_len:
            raise ValueError(f"The equipment's end at {x_offset+length} falls beyond the plane's centerline of length {self.x_axis_len}")
+       self._untrack(name)
        self.x_axis[name] = {'begin': x_offset, 'end': x_offset + length, 'mass': mass, 'obj': Equipment(name, mass, length), 'type': eq_type}
-       self.total_mass += mass
+       self._track(name)
+
+    def _track(self, name): # add an x_axis element to the running mass totals and the interval index
+        self.mass_props.add_elem(self.x_axis[name])
+        self.x_index.add_elem(name, self.x_axis[name])
+
+    def _untrack(self, name): # take an x_axis element out of the running mass totals and the interval index
+        if name in self.x_axis:
+            self.mass_props.remove_elem(self.x_axis[name])
+            self.x_index.remove(name)
+
+    def elements_at(self, x): # names of the x_axis elements covering x, ordered by offset
+        return self.x_index.at(x)
+
+    def elements_overlapping(self, begin, end): # names of the x_axis elements overlapping [begin, end], ordered by offset
+        return self.x_index.overlapping(begin, end)
+
+    @property
+    def rightmost_end(self): # None without any components or equipment
+        return self.x_index.rightmost_end
 
     def set_xobj_or_none(self, component_name, field_name, new_value):
         if getattr(self.x_axis[component_name]['obj'], field_name, None) is not None:
@@ -116,40 +163,65 @@ class Plane():
                 try:
                     new_value = float(new_value)
                 except ValueError:
-                    print(f"Cannot understand `{new_value}` for `{param_name}`")
+                    log.warning("Cannot understand `%s` for `%s`", new_value, param_name)
                     continue
             if self.set_xobj_or_none(component_name, entity_map[param_name], new_value) == True:
-                print(f"Setting {param_name} to {new_value}")
+                log.debug("Setting %s to %s", param_name, new_value)
             else:
-                print(f"Unable to set {param_name} to {new_value}")
+                log.warning("Unable to set %s to %s", param_name, new_value)
         old_comp_name = component_name
         new_comp_name = input_fields['comp_name_input']
         old_begin = self.x_axis[old_comp_name]['begin']
+        self._untrack(old_comp_name)
         if component_name in ['wings', 'htail']:
             self.x_axis[old_comp_name]['end'] = old_begin + float(input_fields['comp_rootchord_input'])
         else:
             self.x_axis[old_comp_name]['end'] = old_begin + float(input_fields['comp_width_input'])
         self.x_axis[old_comp_name]['mass'] = float(input_fields['comp_mass_input'])
+        self._track(old_comp_name)
         new_begin = float(input_fields['comp_x_offset_input'])
         self.move_component(name=old_comp_name, distance=new_begin - old_begin)
+        self._untrack(old_comp_name)
         new_dict_elem = self.x_axis.pop(old_comp_name)
+        self._untrack(new_comp_name) # renamed onto an existing element, which gets replaced
         self.x_axis[new_comp_name] = new_dict_elem
+        self._track(new_comp_name)
+
+    @property
+    def polars_pending(self): # True while any lifting surface still waits for deferred polars
+        return any(getattr(elem['obj'], 'polars_pending', False) for elem in self.x_axis.values())
+
+    def prefetch_polars(self, *, processes=None):
+        pending = [elem['obj'] for elem in list(self.x_axis.values()) if getattr(elem['obj'], 'polars_pending', False)]
+        polar_registry.prefetch([wing.xfoil_data for wing in pending], processes=processes)
+        for wing in pending:
+            wing.prefetch_polars()
 
     def set_thrust(self, val):
         self.flight.thrust = val
 
+    @property
+    def total_mass(self): # components and equipment, without the fuselage
+        return self.mass_props.mass
+
     @property
     def cg_offset(self): # CAREFUL with subsequent aerodynamic properties: fuselage CG was not included before!
-        total_moment = self.fuselage_mass * (self.x_axis_len / 2) # for the fuselage
-        total_mass = self.fuselage_mass
-        for el_name, elem in self.x_axis.items():
-            elem_cg = elem['begin'] + ((elem['end'] - elem['begin'])/2)
-            print (f"'{el_name}' cg = {elem_cg}, mass = {elem['mass']}")
-            total_moment += (elem_cg * elem['mass'])
-            total_mass += elem['mass']
+        if metrics.enabled:
+            metrics.count('plane.cg_offset')
+        total_moment = self.fuselage_mass * (self.x_axis_len / 2) + self.mass_props.moment # fuselage + everything on x_axis
+        total_mass = self.fuselage_mass + self.mass_props.mass
         return total_moment / total_mass
 
     @property
+    def moment_of_inertia(self):
+        """ Pitching moment of inertia about the CG (kg m^2), fuselage included as a uniform rod """
+        fuselage = MassProperties.element_terms(mass=self.fuselage_mass, begin=0.0, end=self.x_axis_len)
+        total_mass = fuselage[0] + self.mass_props.mass
+        second_moment = fuselage[2] + self.mass_props.second_moment
+        return second_moment - total_mass * self.cg_offset**2
+
+    @property
+    @metrics.timed('plane.np_offset')
     def np_offset(self):
         """ Rough estimation without a specific flight condition """
         #mac_wing = self.x_axis['wings']['begin'] + (0.25*self.x_axis['wings']['obj'].chord)
@@ -168,27 +240,39 @@ class Plane():
         return self.x_axis['wings']['begin'] + np_le_offset
 
     @property
+    @metrics.timed('plane.np_xfoil')
     def np_xfoil(self):
         """ Estimation from wing and tail's lift coefficients """
         if self.x_axis.get('wings') is None or self.x_axis.get('htail') is None:
             return
-        if self.x_axis['wings']['obj'].cl_data is None or self.x_axis['htail']['obj'].cl_data is None:
-            print ("Cannot estimate the neutral point from Xfoil data")
+        if self.x_axis['wings']['obj'].cl_table is None or self.x_axis['htail']['obj'].cl_table is None:
+            log.info("Cannot estimate the neutral point from Xfoil data")
             return None
         if self.x_axis['wings']['obj'].Re is None or self.x_axis['htail']['obj'].Re is None:
-            print ("Cannot estimate the neutral point without flight conditions")
+            log.info("Cannot estimate the neutral point without flight conditions")
             return None
-        npm = np_from_xfoil(cl_data_wing=self.x_axis['wings']['obj'].cl_data,\
-                            cl_data_tail=self.x_axis['htail']['obj'].cl_data,\
-                            Re_wing=self.x_axis['wings']['obj'].Re,\
-                            Re_tail=self.x_axis['htail']['obj'].Re,\
-                            alpha_wing=self.x_axis['wings']['obj'].aoa,\
-                            alpha_tail=self.x_axis['htail']['obj'].aoa,\
-                            l_H=(self.x_axis['htail']['begin'] + self.x_axis['htail']['obj'].AC) - (self.x_axis['wings']['begin'] + self.x_axis['wings']['obj'].AC),\
-                            S=self.x_axis['wings']['obj'].area,\
-                            S_H=self.x_axis['htail']['obj'].area,\
-                            eps=0.1) # assume fixed 10% downwash angle
-        return self.x_axis['wings']['obj'].AC + npm
+        wing, tail = self.x_axis['wings'], self.x_axis['htail']
+        return np_xfoil_offset(wing_begin=wing['begin'], wing_AC=wing['obj'].AC, wing_area=wing['obj'].area,\
+                               tail_begin=tail['begin'], tail_AC=tail['obj'].AC, tail_area=tail['obj'].area,\
+                               cl_data_wing=wing['obj'].cl_table, cl_data_tail=tail['obj'].cl_table,\
+                               Re_wing=wing['obj'].Re, Re_tail=tail['obj'].Re,\
+                               alpha_wing=wing['obj'].aoa, alpha_tail=tail['obj'].aoa)
+
+    @property
+    def static_margin(self):
+        """ (NP - CG) as a fraction of the wing's MAC; positive means statically stable """
+        plane_np = self.np_offset
+        if plane_np is None:
+            return None
+        return (plane_np - self.cg_offset) / self.x_axis['wings']['obj'].MAC
+
+    @property
+    def stability(self):
+        """ STABLE, UNSTABLE or UNDECIDED (no wings or no tail) """
+        plane_np = self.np_offset
+        if plane_np is None:
+            return "UNDECIDED"
+        return "STABLE" if self.cg_offset <= plane_np else "UNSTABLE"
 
     @property
     def wing_cp_offset(self):
@@ -238,24 +322,14 @@ class Plane():
         return tot
 
     @property
-    def angular_acceleration(self):
-        wing_cp_to_cg_arm = (self.x_axis['wings']['begin'] + self.x_axis['wings']['obj'].Xcp) - self.cg_offset
-        tail_cp_to_cg_arm = (self.x_axis['htail']['begin'] + self.x_axis['htail']['obj'].Xcp) - self.cg_offset
-        gust_to_cg_arm = 0 if self.wind_gust_offset is None else self.cg_offset - self.wind_gust_offset
-        total_moment_of_inertia = (math.pow(gust_to_cg_arm, 2)*self.total_mass + math.pow(wing_cp_to_cg_arm, 2)*self.total_mass + math.pow(tail_cp_to_cg_arm, 2)*self.total_mass)
-        #total_moment = self.wind_gust_moment + self.wing_pitching_moment + self.tail_pitching_moment
-        total_moment = self.total_moment
-        #if total_moment < 0.5:
-        #    total_moment = 0.0
-        return 0.175*(total_moment / total_moment_of_inertia) # in degrees per second squared
+    def angular_acceleration(self): # in degrees per second squared
+        sim = FlightSimulator(self)
+        return sim.derivatives(sim.initial_state)[2]
 
     def _tick(self):
-        curr_drag = reduce(lambda x,y: x+y, map(lambda z: z[0].D, self.components)) # sum up drag from all components
-        curr_drag = reduce(lambda x,y: x+y, map(lambda z: z[0].D, self.components)) # sum up drag from all components
-        curr_net_thrust = self.flight.thrust - curr_drag
-        self.flight.true_airspeed = self.flight.true_airspeed + ((curr_net_thrust / self.total_mass)*Plane.TIME_INCR) # V = V0 + at, where a is net_thrust / aircraft mass
-        self.angular_velocity = self.angular_velocity + self.angular_acceleration * Plane.TIME_INCR
-        self.flight.pitch += (self.angular_velocity * Plane.TIME_INCR)
+        """ Advance the flight by one TIME_INCR step (forward Euler, see simulation.FlightSimulator) """
+        sim = FlightSimulator(self)
+        self.flight.true_airspeed, self.flight.pitch, self.angular_velocity = sim.step_euler(sim.initial_state, Plane.TIME_INCR)
 
 class OutsideCenterlineException(Exception):
     pass
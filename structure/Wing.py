@@ -1,10 +1,14 @@
 import math
 import os
-import glob
-import re
+import numpy as np
 from structure.component import Component
 from structure.flight import Flight
 from aerodynamic_utils import *
+from polar_registry import get_polars
+from structure.memo import memoized_property
+from instrumentation import get_logger
+
+log = get_logger('polars')
 
 class Wing(Component):
     def __init__(self, *, params_dict, flight:Flight):
@@ -28,54 +32,78 @@ class Wing(Component):
         self.e = params_dict.get('e') or 0.85 # Oswald efficiency facto
         ########## FIXED OR APPROXIMATED PROPERTIES ######
         self._ar = params_dict.get('aspect_ratio')
-        self.cl_data = None
-        self.cd_data = None
-        self.cm_data = None
+        self._polars = None
+        self._polars_deferred = False # set by load_xfoil_data(lazy=True)
+
+    @property
+    def polars(self): # loads deferred polars on first access
+        if self._polars is None and self._polars_deferred:
+            self.prefetch_polars()
+        return self._polars
+
+    @property
+    def polars_pending(self): # True while deferred polars have not been loaded yet
+        return self._polars is None and self._polars_deferred
+
+    @property
+    def cl_data(self):
+        return None if self.polars is None else self.polars.cl_data
+
+    @property
+    def cd_data(self):
+        return None if self.polars is None else self.polars.cd_data
 
     @property
+    def cm_data(self):
+        return None if self.polars is None else self.polars.cm_data
+
+    @memoized_property('_polars')
+    def cl_table(self): # dense Cl(Re, alpha) grid, None until the polars are loaded
+        return None if self.polars is None else self.polars.table.cl
+
+    @memoized_property('semispan')
     def span(self):
         return self.semispan * 2
 
-    @property
+    @memoized_property('root_chord', 'tip_chord', 'span')
     def area(self):
-        print("AREA IS ", str(((self.root_chord + self.tip_chord) / 2) * self.span))
         return ((self.root_chord + self.tip_chord) / 2) * self.span
 
-    @property
+    @memoized_property('_ar', 'span', 'area')
     def aspect_ratio(self):
         return self._ar or math.pow(self.span, 2) / self.area
 
-    @property
+    @memoized_property('root_chord', 'tip_chord')
     def MAC(self): # mean aerodynamic chord
         A = self.root_chord; B = self.tip_chord
         return A - (2*(A-B)*(0.5*A + B)/(3*(A+B)))
 
-    @property
+    @memoized_property('MAC')
     def AC(self): # aerodynamic center from the leading edge
         return 0.25 * self.MAC
 
-    @property
+    @memoized_property('flight.pitch', 'aoi')
     def aoa(self):
         return self.flight.pitch + self.aoi
 
-    @property
+    @memoized_property('thickness_ratio')
     def form_factor(self):
         return 1 + 2*(self.thickness_ratio) + 60*(math.pow(self.thickness_ratio, 4))
 
-    @property # lift varies with angle of attack
+    @memoized_property('flight.true_airspeed', 'xfoil_data', '_polars', 'Re', 'aoa') # lift varies with angle of attack
     def Cl(self):
         if self.flight.true_airspeed < 1:
             return 0
         elif (self.xfoil_data is None):
             return 1.0 # a good approximation for just about any AOA
         else:
-            return interpolate_2d_linear(dict_fn=self.cl_data, Re=self.Re, aoa=self.aoa)
+            return self.polars.table.cl(self.Re, self.aoa)
 
-    @property
+    @memoized_property('_polars', 'Re', 'aoa')
     def Cm(self):
-        return interpolate_2d_linear(dict_fn=self.cm_data, Re=self.Re, aoa=self.aoa)
+        return self.polars.table.cm(self.Re, self.aoa)
 
-    @property # lift-induced drag coefficient - difficult to estimate...
+    @memoized_property('flight.true_airspeed', 'Cl', 'aspect_ratio', 'e') # lift-induced drag coefficient - difficult to estimate...
     def Cdi(self):
         #if (self.xfoil_data is None):
         if self.flight.true_airspeed < 1:
@@ -86,55 +114,40 @@ class Wing(Component):
             # return interpolate_2d_linear(dict_fn=self.cd_data, Re=self.Re, aoa=self.aoa)
             return math.pow(self.Cl, 2) / (math.pi * self.aspect_ratio * self.e)
 
-    @property
+    @memoized_property('Cl', 'flight.rho', 'flight.true_airspeed', 'area')
     def L(self): # lift force
         return self.Cl * 0.5 * self.flight.rho * math.pow(self.flight.true_airspeed, 2) * self.area
 
-    def load_xfoil_data(self):
-        if self.xfoil_data == None:
-            print ("No airfoil data!")
+    def load_xfoil_data(self, *, lazy=False):
+        """ Load the airfoil polars now, or with lazy=True only on first access to the
+            coefficients (or when prefetch_polars() is called, e.g. from a worker thread) """
+        if not self.xfoil_data:
+            log.info("%s: no airfoil data", self.name)
+        elif lazy:
+            self._polars_deferred = True
         else:
-            #xfoil_data_files = [f for f in os.listdir(self.xfoil_data) if os.path.isfile(os.path.join(self.xfoil_data, f))]
-            xfoil_data_files = glob.glob(f"{self.xfoil_data}/*.pol")
-            print (xfoil_data_files)
-            self.cl_data = {}
-            self.cd_data = {}
-            self.cm_data = {}
-            for f in xfoil_data_files:
-                with open(f, 'r') as xfoil_file:
-                    reynolds_num = 0.0
-                    values_row = 0; min_aoa = -100.0; max_aoa = 100.0
-                    for line in xfoil_file:
-                        if "Re = " in line: # parse Reynolds number
-                            reynolds_num = float(re.search('Re =\s+([0-9]\.[0-9]+\se\s?-?[0-9])', line).group(1).replace(" ", ""))
-                            print (f"Parsing data for Re = {reynolds_num}")
-                            self.cl_data[reynolds_num] = {}
-                            self.cd_data[reynolds_num] = {}
-                            self.cm_data[reynolds_num] = {}
-                        coeff_values = re.search("^\s+(?P<AOA>-?[0-9]+\.[0-9]+)\s+(?P<Cl>-?[0-9]+\.[0-9]+)\s+(?P<Cd>-?[0-9]+\.[0-9]+)\s+(?P<Cdp>-?[0-9]+\.[0-9]+)\s+(?P<CM>-?[0-9]+\.[0-9]+)", line)
-                        if coeff_values is not None:
-                            if values_row == 0:
-                                min_aoa = round(float(coeff_values['AOA']), 2)
-                            max_aoa = round(float(coeff_values['AOA']), 2)
-                            self.cl_data[reynolds_num][round(float(coeff_values['AOA']), 2)] = float(coeff_values['Cl']) # lift coefficient by angle of attack at this Reynolds number
-                            self.cd_data[reynolds_num][round(float(coeff_values['AOA']), 2)] = float(coeff_values['Cd']) # total parasitic drag coefficient
-                            self.cm_data[reynolds_num][round(float(coeff_values['AOA']), 2)] = float(coeff_values['CM']) # total moment coefficient
-                    # Xfoil skips some values at random, so we'll interpolate them here as well:
-                    present_aoa_values = sorted(self.cl_data[reynolds_num].keys())
-                    aoa_range = [round(x*0.10, 2) for x in range(-150, 149)]
-                    for aoa in aoa_range:
-                        if aoa not in present_aoa_values:
-                            lower, upper = get_two_nearest(x=aoa, vector=present_aoa_values)
-                            cl_lower = self.cl_data[reynolds_num][lower]; cl_upper = self.cl_data[reynolds_num][upper]
-                            cd_lower = self.cd_data[reynolds_num][lower]; cd_upper = self.cd_data[reynolds_num][upper]
-                            cm_lower = self.cm_data[reynolds_num][lower]; cm_upper = self.cm_data[reynolds_num][upper]
-                            interp_cl = interpolate_1d_linear(x = aoa, x1=lower, y1=cl_lower, x2=upper, y2=cl_upper)
-                            interp_cd = interpolate_1d_linear(x = aoa, x1=lower, y1=cd_lower, x2=upper, y2=cd_upper)
-                            interp_cm = interpolate_1d_linear(x = aoa, x1=lower, y1=cm_lower, x2=upper, y2=cm_upper)
-                            self.cl_data[reynolds_num][aoa] = interp_cl
-                            self.cl_data[reynolds_num][aoa] = interp_cd
-                            self.cm_data[reynolds_num][aoa] = interp_cm
-                            print (f"Alpha {aoa} not present in Xfoil output for R={reynolds_num} - interpolating from {get_two_nearest(x=aoa, vector=present_aoa_values)}: Cl={interp_cl}, Cd={interp_cd}")
+            self.prefetch_polars()
+
+    def prefetch_polars(self):
+        self._polars = get_polars(self.xfoil_data) # shared with every other wing using this airfoil
+
+    def use_polars(self, polars):
+        """ Take already loaded polars (e.g. embedded in a plane bundle) instead of reading xfoil_data """
+        self._polars_deferred = False
+        self._polars = polars
+
+    def batch_coefficients(self, *, Re, aoa):
+        """ Cl, Cd and Cm for arrays of Reynolds numbers and angles of attack in one vectorized pass """
+        if self.polars is None:
+            raise ValueError(f"No airfoil data loaded for `{self.name}`")
+        cl, cd, cm = self.polars.table.batch(Re, aoa)
+        return {'Cl': cl, 'Cd': cd, 'Cm': cm}
+
+    def sweep_coefficients(self, *, true_airspeed, pitch):
+        """ Same as batch_coefficients, but for arrays of airspeeds (m/s) and pitch angles (deg)
+            in the current flight's air. Pass e.g. tas[:, None] and pitch[None, :] for a full grid. """
+        Re = np.asarray(true_airspeed, dtype=np.float64) * self.characteristic_length / self.flight.air_viscosity
+        return self.batch_coefficients(Re=Re, aoa=np.asarray(pitch, dtype=np.float64) + self.aoi)
 
     def get_aerodynamic_properties(self):
         return {'Cl': self.Cl,
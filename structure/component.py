@@ -1,9 +1,16 @@
 import math
 from abc import ABC, abstractmethod
 from .flight import Flight
+from .memo import Memoized, memoized_property
+from instrumentation import get_logger
+from aerodynamic_utils import reynolds_number
 
+log = get_logger('aero')
 
-class Component(ABC):
+
+class Component(Memoized, ABC):
+    """ Aerodynamic properties are memoized and recomputed only when their inputs
+        (own fields or the fields of self.flight they read) are assigned """
 
     def __init__(self, *, params_dict, flight:Flight):
         self.flight = flight
@@ -17,28 +24,29 @@ class Component(ABC):
         # filled in by constructors in subclasses:
         self.wetted_area = None
         
-    @property
+    @memoized_property('characteristic_length', 'flight.true_airspeed', 'flight.air_viscosity')
     def Re(self):
         #return (self.flight.rho * self.flight.true_airspeed * self.characteristic_length) \
         #        / self.flight.air_viscosity
-        if self.flight is None or self.flight.true_airspeed < 0.8:
-            print ("No flight conditions to calculate Reynolds number")
-            return None
-        return (self.flight.true_airspeed * self.characteristic_length) \
-                / self.flight.air_viscosity
+        Re = None if self.flight is None else \
+             reynolds_number(true_airspeed=self.flight.true_airspeed, characteristic_length=self.characteristic_length, \
+                             air_viscosity=self.flight.air_viscosity)
+        if Re is None:
+            log.debug("%s: no flight conditions to calculate Reynolds number", self.name)
+        return Re
     @property
     @abstractmethod
     def form_factor(self):
         pass
 
-    @property # flat-plane coefficient
+    @memoized_property('Re') # flat-plane coefficient
     def Cf(self):
         if self.Re < 100:
             return 0
         else:
             return (0.455 / math.pow(math.log10(self.Re), 2.58))
 
-    @property # drag coefficient for parasitic drag
+    @memoized_property('Cf', 'form_factor', 'wetted_area', 'ref_area') # drag coefficient for parasitic drag
     def Cdp(self):
         return (self.Cf * self.form_factor * self.wetted_area) / self.ref_area
 
@@ -50,15 +58,15 @@ class Component(ABC):
     def Cl(self):
         return 0.0
 
-    @property
+    @memoized_property('Cdi', 'flight.rho', 'flight.true_airspeed', 'ref_area')
     def D_i(self): # induced drag force
         return self.Cdi * 0.5 * self.flight.rho * math.pow(self.flight.true_airspeed, 2) * self.ref_area
 
-    @property
+    @memoized_property('Cdp', 'flight.rho', 'flight.true_airspeed', 'ref_area')
     def D_p(self): # parasitic drag force
         return self.Cdp * 0.5 * self.flight.rho * math.pow(self.flight.true_airspeed, 2) * self.ref_area
 
-    @property
+    @memoized_property('D_i', 'D_p')
     def D(self): # total drag force
         return self.D_i + self.D_p
 
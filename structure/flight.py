@@ -1,5 +1,9 @@
+from structure.memo import FlightListeners
+from atmosphere import isa
+
 class Flight:
     def __init__(self):
+        object.__setattr__(self, '_listeners', FlightListeners()) # components whose cached values depend on us
         # self.true_airspeed = 20.4216    # m/s
         self.true_airspeed = 0.0        # m/s
         # assume ISA conditions at sea level
@@ -7,12 +11,28 @@ class Flight:
         self.atm_pressure = 983.81*100  # Pa
         self.temperature = 283.593      # K
         self.altitude = 701.4           # m above sea level
+        self.temperature_offset = 0.0   # K above (or below) the ISA temperature, see set_atmosphere
         self.air_viscosity = 0.000014207  # kinematic viscosity of air at 10 deg C
         self.thrust = 0                 # N
         self.pitch = 0.0                # deg
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        self._listeners.notify(self, name)
+
+    def add_listener(self, component):
+        self._listeners.add(component)
     
+    def set_atmosphere(self, *, altitude, temperature_offset=0.0):
+        """ Take density, pressure, temperature and viscosity from the ISA+temperature_offset
+            atmosphere at `altitude` (m), see atmosphere.AtmosphereTable """
+        air = isa.at(altitude, temperature_offset)
+        self.altitude = altitude
+        self.temperature_offset = temperature_offset
+        self.temperature = air['temperature']
+        self.atm_pressure = air['pressure']
+        self.rho = air['rho']
+        self.air_viscosity = air['air_viscosity']
+
     def set_isa_sealevel(self):
-        self.rho = 1.225
-        self.atm_pressure = 1013.25*100
-        self.temperature = 288.15
-        self.altitude = 0.0
+        self.set_atmosphere(altitude=0.0)
@@ -0,0 +1,134 @@
+import random
+
+class _Node():
+    __slots__ = ('begin', 'name', 'end', 'priority', 'left', 'right', 'max_end')
+
+    def __init__(self, begin, name, end, priority):
+        self.begin = begin; self.name = name; self.end = end
+        self.priority = priority
+        self.left = self.right = None
+        self.max_end = end
+
+    def update(self):
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+class IntervalIndex():
+    """ Named closed intervals [begin, end] (x_axis elements) in a treap ordered by begin and
+        augmented with the largest end of every subtree.
+
+        add/remove are O(log n); at(x) and overlapping(a, b) are O(log n + k) for k results;
+        rightmost_end is O(1). """
+    def __init__(self, seed=None):
+        self._root = None
+        self._intervals = {} # name -> (begin, end)
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def __contains__(self, name):
+        return name in self._intervals
+
+    def add(self, name, begin, end):
+        if name in self._intervals:
+            self.remove(name)
+        self._intervals[name] = (begin, end)
+        self._root = self._insert(self._root, _Node(begin, name, end, self._random.random()))
+
+    def remove(self, name):
+        begin, _ = self._intervals.pop(name)
+        self._root = self._delete(self._root, (begin, name))
+
+    def add_elem(self, name, elem):
+        self.add(name, elem['begin'], elem['end'])
+
+    def rebuild(self, x_axis):
+        """ Re-index from scratch, e.g. after editing x_axis entries directly """
+        self._root = None
+        self._intervals = {}
+        for name, elem in x_axis.items():
+            self.add_elem(name, elem)
+
+    @property
+    def rightmost_end(self):
+        return None if self._root is None else self._root.max_end
+
+    def at(self, x):
+        """ Names of the intervals containing x, ordered by begin """
+        return self.overlapping(x, x)
+
+    def overlapping(self, a, b):
+        """ Names of the intervals overlapping [a, b], ordered by begin """
+        found = []
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            # in-order walk that skips subtrees ending before a and everything beginning after b
+            while node is not None and node.max_end >= a:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.begin > b:
+                break
+            if node.end >= a:
+                found.append(node.name)
+            node = node.right
+        return found
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if (new.begin, new.name) < (node.begin, node.name):
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                node = self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                node = self._rotate_left(node)
+        node.update()
+        return node
+
+    def _delete(self, node, key):
+        if node is None:
+            raise KeyError(key)
+        node_key = (node.begin, node.name)
+        if key < node_key:
+            node.left = self._delete(node.left, key)
+        elif key > node_key:
+            node.right = self._delete(node.right, key)
+        elif node.left is None:
+            return node.right
+        elif node.right is None:
+            return node.left
+        elif node.left.priority > node.right.priority:
+            node = self._rotate_right(node)
+            node.right = self._delete(node.right, key)
+        else:
+            node = self._rotate_left(node)
+            node.left = self._delete(node.left, key)
+        node.update()
+        return node
+
+    @staticmethod
+    def _rotate_right(node):
+        top = node.left
+        node.left = top.right
+        top.right = node
+        node.update(); top.update()
+        return top
+
+    @staticmethod
+    def _rotate_left(node):
+        top = node.right
+        node.right = top.left
+        top.left = node
+        node.update(); top.update()
+        return top
@@ -0,0 +1,43 @@
+class MassProperties():
+    """ Running totals of mass and of the first and second moments of mass along the
+        plane's x axis (measured from the nose), updated in O(1) per element.
+
+        Every element is treated as a uniform rod between its begin and end offsets. """
+    def __init__(self):
+        self.mass = 0.0
+        self.moment = 0.0           # sum of m * x_cg
+        self.second_moment = 0.0    # sum of m * x_cg^2 + m * length^2 / 12
+        self.count = 0
+
+    @staticmethod
+    def element_terms(*, mass, begin, end):
+        x_cg = begin + ((end - begin) / 2)
+        return mass, mass * x_cg, mass * (x_cg*x_cg + (end - begin)**2 / 12)
+
+    def add(self, *, mass, begin, end):
+        m, first, second = self.element_terms(mass=mass, begin=begin, end=end)
+        self.mass += m
+        self.moment += first
+        self.second_moment += second
+        self.count += 1
+
+    def remove(self, *, mass, begin, end):
+        m, first, second = self.element_terms(mass=mass, begin=begin, end=end)
+        self.mass -= m
+        self.moment -= first
+        self.second_moment -= second
+        self.count -= 1
+        if self.count == 0: # don't let rounding errors outlive the last element
+            self.mass = self.moment = self.second_moment = 0.0
+
+    def add_elem(self, elem):
+        self.add(mass=elem['mass'], begin=elem['begin'], end=elem['end'])
+
+    def remove_elem(self, elem):
+        self.remove(mass=elem['mass'], begin=elem['begin'], end=elem['end'])
+
+    def rebuild(self, x_axis):
+        """ Recompute the totals from scratch, e.g. after editing x_axis entries directly """
+        self.__init__()
+        for elem in x_axis.values():
+            self.add_elem(elem)
@@ -0,0 +1,120 @@
+import weakref
+
+class memoized_property():
+    """ Read-only property whose value is kept in the instance's _memo dict until one of
+        its declared inputs changes.
+
+        Inputs are names of attributes or other memoized properties of the same object,
+        or 'flight.<attribute>' for fields of the component's Flight. Setting any of them
+        drops exactly the cached values that (directly or transitively) depend on it. """
+    def __init__(self, *deps):
+        self.deps = deps
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, fn):
+        self.fn = fn
+        self.name = fn.__name__
+        self.__doc__ = fn.__doc__
+        return self
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        memo = obj._memo
+        try:
+            value = memo[self.name]
+        except KeyError:
+            self.misses += 1
+            value = memo[self.name] = self.fn(obj)
+            return value
+        self.hits += 1
+        return value
+
+class Memoized():
+    """ Mixin invalidating memoized_property values when their inputs are assigned """
+    _memo_dependents = {}
+    _memo_flight_dependents = {}
+
+    def __new__(cls, *args, **kwargs):
+        obj = super().__new__(cls)
+        object.__setattr__(obj, '_memo', {})
+        return obj
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        props = {}
+        for klass in reversed(cls.__mro__):
+            for name, attr in vars(klass).items():
+                if isinstance(attr, memoized_property):
+                    props[name] = attr
+                elif name in props: # overridden by a plain attribute or property
+                    del props[name]
+        direct = {} # input -> properties reading it directly
+        for name, prop in props.items():
+            for dep in prop.deps:
+                direct.setdefault(dep, set()).add(name)
+                if dep.startswith('flight.'):
+                    direct.setdefault('flight', set()).add(name)
+        def closure(dep, seen):
+            for name in direct.get(dep, ()):
+                if name not in seen:
+                    seen.add(name)
+                    closure(name, seen)
+            return seen
+        dependents = {dep: tuple(closure(dep, set())) for dep in direct}
+        cls._memo_dependents = {dep: names for dep, names in dependents.items() if not dep.startswith('flight.')}
+        cls._memo_flight_dependents = {dep[len('flight.'):]: names for dep, names in dependents.items() if dep.startswith('flight.')}
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name == 'flight' and value is not None:
+            value.add_listener(self)
+        names = self._memo_dependents.get(name)
+        if names:
+            memo = self._memo
+            for dependent in names:
+                memo.pop(dependent, None)
+
+    def _flight_changed(self, flight, field_name):
+        if flight is not self.__dict__.get('flight'): # listener of a flight we no longer use
+            return
+        names = self._memo_flight_dependents.get(field_name)
+        if names:
+            memo = self._memo
+            for dependent in names:
+                memo.pop(dependent, None)
+
+    def invalidate_memo(self):
+        self._memo.clear()
+
+def memo_stats(obj_or_cls):
+    """ {property: {'hits': n, 'misses': n}} of every memoized property, summed over all
+        instances of the class """
+    cls = obj_or_cls if isinstance(obj_or_cls, type) else type(obj_or_cls)
+    stats = {}
+    for klass in reversed(cls.__mro__):
+        for name, attr in vars(klass).items():
+            if isinstance(attr, memoized_property):
+                stats[name] = {'hits': attr.hits, 'misses': attr.misses}
+            else:
+                stats.pop(name, None)
+    return stats
+
+def reset_memo_stats(cls):
+    for klass in cls.__mro__:
+        for attr in vars(klass).values():
+            if isinstance(attr, memoized_property):
+                attr.hits = attr.misses = 0
+
+class FlightListeners():
+    """ Weak set of components to notify when a Flight field is assigned """
+    def __init__(self):
+        self._refs = weakref.WeakSet()
+
+    def add(self, listener):
+        self._refs.add(listener)
+
+    def notify(self, flight, field_name):
+        for listener in list(self._refs):
+            listener._flight_changed(flight, field_name)
@@ -0,0 +1,111 @@
+import os
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from loader_utils import load_plane
+from atmosphere import isa
+from aerodynamic_utils import DOWNWASH, MIN_AIRSPEED, SURFACES
+
+SURFACE_QUANTITIES = ['Re', 'Cl', 'Cdi', 'Cdp', 'L', 'D']
+
+_worker_plane = None
+
+def evaluate_surface(wing, *, tas, pitch, rho, air_viscosity):
+    """ Vectorized equivalent of Wing.Re, Cl, Cdi, Cdp, L and D for every (tas, pitch) pair.
+        `tas` and `pitch` must broadcast against each other. """
+    tas, pitch = np.broadcast_arrays(np.asarray(tas, dtype=np.float64), np.asarray(pitch, dtype=np.float64))
+    Re = tas * wing.characteristic_length / air_viscosity
+    Re = np.where(tas < MIN_AIRSPEED, np.nan, Re) # Component.Re gives None without flight conditions
+    if wing.xfoil_data is None:
+        Cl = np.ones_like(tas)
+    else:
+        Cl = wing.polars.table.cl.batch(Re, pitch + wing.aoi)
+    Cl = np.where(tas < 1, 0.0, Cl)
+    Cdi = np.where(tas < 1, 0.0, Cl**2 / (math.pi * wing.aspect_ratio * wing.e))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Cf = np.where(Re < 100, 0.0, 0.455 / np.power(np.log10(Re), 2.58))
+    Cdp = (Cf * wing.form_factor * wing.wetted_area) / wing.ref_area
+    q = 0.5 * rho * tas**2
+    return {'Re': Re, 'Cl': Cl, 'Cdi': Cdi, 'Cdp': Cdp, \
+            'L': Cl * q * wing.area, 'D': (Cdi + Cdp) * q * wing.ref_area}
+
+def evaluate_np_xfoil(plane, *, re_wing, re_tail, pitch):
+    """ Vectorized Plane.np_xfoil (NaN wherever the scalar property returns None) """
+    wing = plane.x_axis['wings']['obj']
+    tail = plane.x_axis['htail']['obj']
+    if wing.polars is None or tail.polars is None:
+        return np.full(np.broadcast(re_wing, pitch).shape, np.nan)
+    a = wing.polars.table.cl.slope_batch(re_wing, pitch + wing.aoi)
+    a_t = tail.polars.table.cl.slope_batch(re_tail, pitch + tail.aoi)
+    l_H = (plane.x_axis['htail']['begin'] + tail.AC) - (plane.x_axis['wings']['begin'] + wing.AC)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        npm = (a_t * (1 - DOWNWASH) * tail.area * l_H) / (wing.area * a)
+    return wing.AC + npm
+
+def evaluate_grid(plane, *, tas, pitch):
+    """ Evaluate every surface and np_xfoil on the full tas x pitch grid of one plane """
+    tas_col = np.asarray(tas, dtype=np.float64)[:, None]
+    pitch_row = np.asarray(pitch, dtype=np.float64)[None, :]
+    flight = plane.flight
+    res = {}
+    for surface in SURFACES:
+        if plane.x_axis.get(surface) is not None:
+            res[surface] = evaluate_surface(plane.x_axis[surface]['obj'], tas=tas_col, pitch=pitch_row, \
+                                            rho=flight.rho, air_viscosity=flight.air_viscosity)
+    if 'wings' in res and 'htail' in res:
+        res['np_xfoil'] = evaluate_np_xfoil(plane, re_wing=res['wings']['Re'], re_tail=res['htail']['Re'], pitch=pitch_row)
+    return res
+
+def evaluate_altitude_grid(plane, *, altitude, tas, pitch=0.0, temperature_offset=0.0):
+    """ Every surface and np_xfoil on the full altitude x tas grid of one plane at one pitch
+        angle, flying in the ISA+temperature_offset atmosphere (see atmosphere.AtmosphereTable).
+        The air properties at every altitude come back under 'atmosphere'. """
+    alt_col = np.asarray(altitude, dtype=np.float64)[:, None]
+    tas_row = np.asarray(tas, dtype=np.float64)[None, :]
+    air = isa.properties(alt_col, temperature_offset)
+    res = {'atmosphere': {name: value[:, 0] for name, value in air.items()}}
+    for surface in SURFACES:
+        if plane.x_axis.get(surface) is not None:
+            res[surface] = evaluate_surface(plane.x_axis[surface]['obj'], tas=tas_row, pitch=pitch, \
+                                            rho=air['rho'], air_viscosity=air['air_viscosity'])
+    if 'wings' in res and 'htail' in res:
+        res['np_xfoil'] = evaluate_np_xfoil(plane, re_wing=res['wings']['Re'], re_tail=res['htail']['Re'], pitch=pitch)
+    return res
+
+def _init_worker(conf_file):
+    global _worker_plane
+    _worker_plane = load_plane(conf_file=conf_file)
+
+def _evaluate_shard(start, tas, pitch):
+    return start, evaluate_grid(_worker_plane, tas=tas, pitch=pitch)
+
+def sweep_envelope(*, conf_file, tas, pitch, processes=None, shards_per_process=4):
+    """ Per-surface Re, Cl, Cdi, Cdp, L, D and the plane's np_xfoil over a grid of true
+        airspeeds (m/s) and pitch angles (deg).
+
+        The airspeed axis is split into shards evaluated by a pool of worker processes,
+        each of which loads the plane once. Returns {'tas', 'pitch', 'np_xfoil',
+        'wings': {quantity: array}, 'htail': {...}} with arrays of shape (len(tas), len(pitch)). """
+    tas = np.asarray(tas, dtype=np.float64)
+    pitch = np.asarray(pitch, dtype=np.float64)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        _init_worker(conf_file)
+        shards = [_evaluate_shard(0, tas, pitch)]
+    else:
+        n_shards = min(len(tas), processes * shards_per_process)
+        bounds = np.linspace(0, len(tas), n_shards + 1).astype(int)
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(conf_file,)) as pool:
+            futures = [pool.submit(_evaluate_shard, int(lo), tas[lo:hi], pitch) for lo, hi in zip(bounds[:-1], bounds[1:])]
+            shards = [f.result() for f in futures]
+    result = {'tas': tas, 'pitch': pitch}
+    for start, shard in shards:
+        for key, value in shard.items():
+            if isinstance(value, dict):
+                target = result.setdefault(key, {q: np.empty((len(tas), len(pitch))) for q in value})
+                for q, arr in value.items():
+                    target[q][start:start+arr.shape[0]] = arr
+            else:
+                target = result.setdefault(key, np.empty((len(tas), len(pitch))))
+                target[start:start+value.shape[0]] = value
+    return result
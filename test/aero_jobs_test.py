@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import threading
+import pytest
+import aero_jobs
+from loader_utils import load_plane
+from aero_jobs import AeroEvaluator, aero_snapshot, evaluate_snapshot
+
+CONF_FILE = 'userdata/prop_final.json'
+
+@pytest.fixture
+def plane():
+    pl = load_plane(conf_file=CONF_FILE)
+    pl.flight.true_airspeed = 18.0
+    pl.flight.pitch = 1.5
+    return pl
+
+def test_snapshot_matches_properties(plane):
+    res = evaluate_snapshot(aero_snapshot(plane))
+    assert res['Re_wings'] == plane.x_axis['wings']['obj'].Re
+    assert res['Re_htail'] == plane.x_axis['htail']['obj'].Re
+    assert res['np_xfoil'] == pytest.approx(plane.np_xfoil)
+
+def test_snapshot_is_detached_from_the_plane(plane):
+    snapshot = aero_snapshot(plane)
+    before = evaluate_snapshot(snapshot)
+    plane.move_component(name='htail', distance=-0.2)
+    plane.flight.true_airspeed = 30.0
+    assert evaluate_snapshot(snapshot) == before
+    assert aero_snapshot(plane) != snapshot
+
+def test_pending_polars_are_not_loaded():
+    plane = load_plane(conf_file=CONF_FILE, lazy_polars=True)
+    plane.flight.true_airspeed = 18.0
+    assert evaluate_snapshot(aero_snapshot(plane))['np_xfoil'] is None
+    assert plane.polars_pending
+
+def test_only_the_newest_result_is_delivered(plane, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    orig_evaluate = aero_jobs.evaluate_snapshot
+    def slow_evaluate(snapshot):
+        started.set()
+        release.wait(5)
+        return orig_evaluate(snapshot)
+    monkeypatch.setattr(aero_jobs, 'evaluate_snapshot', slow_evaluate)
+    delivered = []
+    evaluator = AeroEvaluator(on_result=lambda snapshot, result: delivered.append(snapshot))
+    snapshots = []
+    for tas in [10.0, 15.0, 20.0, 25.0]:
+        plane.flight.true_airspeed = tas
+        snapshots.append(aero_snapshot(plane))
+        evaluator.submit(snapshots[-1])
+        started.wait(5) # the first job is running, the others queue up behind it
+    release.set()
+    evaluator.shutdown()
+    assert delivered == [snapshots[-1]]
+    assert (evaluator.cancelled, evaluator.dropped, evaluator.delivered) == (2, 1, 1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import pytest
+import numpy as np
+from atmosphere import AtmosphereTable, isa, isa_exact
+from loader_utils import load_plane
+from structure.flight import Flight
+
+@pytest.mark.parametrize("altitude,temperature,pressure,rho", [
+    (0.0, 288.15, 101325.0, 1.2250),
+    (5000.0, 255.65, 54019.9, 0.73612),
+    (11000.0, 216.65, 22632.0, 0.36392),
+    (30000.0, 226.65, 1171.87, 0.018012),
+    (50000.0, 270.65, 75.944, 0.00097752),
+])
+def test_standard_atmosphere(altitude, temperature, pressure, rho):
+    for air in [isa_exact(altitude), isa.properties(altitude)]:
+        assert air['temperature'] == pytest.approx(temperature)
+        assert air['pressure'] == pytest.approx(pressure, rel=1e-5)
+        assert air['rho'] == pytest.approx(rho, rel=1e-4)
+    assert isa.at(0.0)['air_viscosity'] == pytest.approx(1.4607e-5, rel=1e-4)
+
+def test_temperature_offset_keeps_pressure():
+    cold, hot = isa.at(1000.0, -15.0), isa.at(1000.0, 15.0)
+    assert cold['pressure'] == pytest.approx(hot['pressure'])
+    assert hot['temperature'] - cold['temperature'] == pytest.approx(30.0)
+    assert hot['rho'] < cold['rho'] and hot['air_viscosity'] > cold['air_viscosity']
+
+def test_table_matches_layer_equations():
+    rng = np.random.default_rng(0)
+    altitude = rng.uniform(-500.0, 51000.0, 20000)
+    offset = rng.uniform(-40.0, 40.0, 20000)
+    exact = isa_exact(altitude, offset)
+    table = AtmosphereTable().properties(altitude, offset)
+    for name, value in exact.items():
+        assert np.max(np.abs(table[name] / value - 1)) < 1e-5, name
+
+def test_altitude_outside_table():
+    with pytest.raises(ValueError):
+        isa.at(60000.0)
+    with pytest.raises(ValueError):
+        isa.properties([0.0, 1000.0, -1000.0])
+
+def test_properties_broadcast():
+    air = isa.properties(np.linspace(0.0, 3000.0, 4)[:, None], np.array([-10.0, 0.0, 10.0]))
+    assert all(value.shape == (4, 3) for value in air.values())
+
+def test_flight_altitude_changes_reynolds_number():
+    flight = Flight()
+    flight.true_airspeed = 20.0
+    plane = load_plane(conf_file='userdata/prop_final.json', preflight=flight)
+    wing = plane.x_axis['wings']['obj']
+    flight.set_isa_sealevel()
+    re_sealevel, lift_sealevel = wing.Re, wing.L
+    flight.set_atmosphere(altitude=3000.0, temperature_offset=10.0)
+    assert flight.temperature == pytest.approx(268.65 + 10.0)
+    assert wing.Re < re_sealevel and wing.L < lift_sealevel # memoized values follow the thinner air
+    assert wing.Re == pytest.approx(20.0 * wing.characteristic_length / flight.air_viscosity)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+import json
+from benchmarks.suite import run_suite, compare, main
+
+def test_run_suite_reports_every_case():
+    res = run_suite(repeat=1, only=['stability', 'config_io'])
+    assert set(res['results']) == {'cg_offset', 'np_offset', 'np_xfoil', 'load_plane', 'save_plane', 'load_plane_bundle', 'save_plane_bundle'}
+    assert all(seconds > 0 for seconds in res['results'].values())
+    assert res['meta']['scale'] == 1
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {'results': {'a': 1.0, 'b': 1.0, 'c': 1.0}}
+    results = {'results': {'a': 1.2, 'b': 2.0, 'c': 0.5, 'new_case': 9.0}}
+    regressions = compare(results, baseline, threshold=0.25)
+    assert [r['case'] for r in regressions] == ['b']
+    assert regressions[0]['ratio'] == 2.0
+
+def test_main_writes_json_and_fails_on_regression(tmp_path, capsys):
+    baseline_file = tmp_path / 'baseline.json'
+    assert main(['--only', 'stability', '--repeat', '1', '--baseline', str(baseline_file), '--update-baseline']) == 0
+    baseline = json.loads(baseline_file.read_text())
+    baseline['results'] = {case: seconds / 100 for case, seconds in baseline['results'].items()}
+    baseline_file.write_text(json.dumps(baseline))
+    out_file = tmp_path / 'results.json'
+    assert main(['--only', 'stability', '--repeat', '1', '--baseline', str(baseline_file), '--output', str(out_file)]) == 1
+    assert set(json.loads(out_file.read_text())['results']) == {'cg_offset', 'np_offset', 'np_xfoil'}
+    assert 'REGRESSION' in capsys.readouterr().err
@@ -0,0 +1,20 @@
+import logging
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_polar_cache(tmp_path_factory, monkeypatch):
+    """ Keep the compiled polar caches written by tests out of the user's home directory """
+    monkeypatch.setenv('PLANEBUILDER_CACHE_DIR', str(tmp_path_factory.getbasetemp() / 'polar_cache'))
+
+@pytest.fixture
+def restore_logging():
+    """ Undo configure(): the levels, and the handler and propagation of the planebuilder logger """
+    names = ['planebuilder'] + [f"planebuilder.{s}" for s in ['polars', 'aero', 'plane', 'gui', 'io']]
+    levels = {name: logging.getLogger(name).level for name in names}
+    root = logging.getLogger('planebuilder')
+    handlers, propagate = list(root.handlers), root.propagate
+    yield
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+    root.handlers[:] = handlers
+    root.propagate = propagate
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import json
+import pytest
+from fleet import polar_dirs, iter_planes, iter_records, _chunk_bounds
+from headless import evaluate_conf
+
+CONF_FILE = 'userdata/prop_final.json'
+
+@pytest.fixture
+def fleet_dir(tmp_path):
+    with open(CONF_FILE, 'r') as f:
+        conf = json.load(f)
+    conf_files = []
+    for plane_no in range(12):
+        conf['project_name'] = f"plane{plane_no}"
+        conf['non_lifting_components'][-1]['offset'] = 1.0 + 0.02*plane_no
+        conf_file = tmp_path / f"plane{plane_no:02d}.json"
+        conf_file.write_text(json.dumps(conf))
+        conf_files.append(str(conf_file))
+    broken = tmp_path / 'broken.json'
+    broken.write_text('{"project_name": ')
+    return conf_files, str(broken)
+
+def test_polar_dirs(fleet_dir):
+    conf_files, broken = fleet_dir
+    assert polar_dirs(conf_files + [broken]) == ['airfoil_data/naca0012', 'airfoil_data/naca2412']
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_iter_planes_shares_polars(fleet_dir, max_workers):
+    conf_files, broken = fleet_dir
+    results = list(iter_planes(conf_files + [broken], max_workers=max_workers))
+    assert len(results) == 13
+    errors = [r for r in results if 'error' in r]
+    assert [r['conf_file'] for r in errors] == [broken]
+    planes = {r['conf_file']: r['plane'] for r in results if 'plane' in r}
+    assert sorted(planes) == conf_files
+    wing_polars = {id(p.x_axis['wings']['obj'].polars) for p in planes.values()}
+    assert len(wing_polars) == 1 # parsed once, shared by every plane
+    assert planes[conf_files[3]].project_name == 'plane3'
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_iter_records_match_headless(fleet_dir, processes):
+    conf_files, broken = fleet_dir
+    records = {r['conf_file']: r for r in iter_records(conf_files + [broken], tas=20.0, processes=processes, chunksize=3)}
+    assert 'error' in records.pop(broken)
+    assert sorted(records) == conf_files
+    for conf_file in [conf_files[0], conf_files[-1]]:
+        assert records[conf_file] == evaluate_conf(conf_file, tas=20.0)
+
+@pytest.mark.parametrize("n,processes,chunksize", [(100, 2, None), (7, 4, None), (10, 3, 4), (1, 1, None)])
+def test_chunks_cover_every_config_once(n, processes, chunksize):
+    bounds = _chunk_bounds(n, processes=processes, chunksize=chunksize)
+    assert bounds[0][0] == 0 and bounds[-1][1] == n
+    assert all(hi == next_lo for (_, hi), (next_lo, _) in zip(bounds, bounds[1:]))
+    if chunksize is None:
+        assert all(hi - lo == 1 for lo, hi in bounds[:processes]) # every worker starts with a single config
+
+def test_iter_planes_parses_each_polar_file_once(fleet_dir, tmp_path, monkeypatch):
+    import glob
+    import polar_cache
+    from polar_registry import registry
+    conf_files, _ = fleet_dir
+    monkeypatch.setenv('PLANEBUILDER_CACHE_DIR', str(tmp_path / 'empty_cache'))
+    monkeypatch.setattr(polar_cache, 'PARALLEL_MIN_FILES', 10**6) # parse in this process, where we can count
+    parse = polar_cache.parse_xfoil_file
+    parsed = []
+    monkeypatch.setattr(polar_cache, 'parse_xfoil_file', lambda path: parsed.append(path) or parse(path))
+    registry.clear()
+    try:
+        planes = [r['plane'] for r in iter_planes(conf_files, max_workers=4)]
+    finally:
+        registry.clear() # its entries map the temporary cache
+    assert len(planes) == len(conf_files)
+    n_files = sum(len(glob.glob(f"{d}/*.pol")) for d in polar_dirs(conf_files))
+    assert len(parsed) == len(set(parsed)) == n_files
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+import sys
+import json
+import subprocess
+import pytest
+from headless import evaluate_conf, main
+
+def test_evaluate_conf():
+    report = evaluate_conf('userdata/prop_final.json', tas=20.0)
+    assert report['stability'] == 'STABLE'
+    assert report['static_margin'] == pytest.approx((report['np_offset'] - report['cg_offset']) / 0.32)
+    assert report['np_xfoil'] is not None
+
+def test_json_output_and_error_exit_code(capsys, restore_logging):
+    assert main(['userdata', 'no_such_plane.json', '--format', 'json']) == 1
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert lines[0]['stability'] == 'STABLE'
+    assert 'error' in lines[1]
+
+def test_never_imports_qt():
+    code = "import sys, headless; headless.main(['userdata']); assert not any(m.startswith('PyQt5') for m in sys.modules)"
+    subprocess.run([sys.executable, '-c', code], check=True, capture_output=True)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import io
+import logging
+import pytest
+from loader_utils import load_plane
+from polar_cache import load_xfoil_dir
+from instrumentation import Metrics, configure, get_logger, metrics
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+def test_disabled_metrics_collect_nothing():
+    m = Metrics()
+    m.count('x')
+    with m.timer('t'):
+        pass
+    assert m.timed('f')(lambda v: v * 2)(21) == 42
+    assert m.snapshot() == {'counters': {}, 'timers': {}}
+    assert m.report() == "no metrics collected"
+
+def test_counters_and_timers():
+    m = Metrics()
+    m.enable()
+    m.count('x'); m.count('x', 4)
+    for _ in range(3):
+        with m.timer('t'):
+            pass
+    f = m.timed('f')(lambda v: v * 2)
+    assert f(21) == 42
+    snap = m.snapshot()
+    assert snap['counters'] == {'x': 5}
+    assert snap['timers']['t']['calls'] == 3 and snap['timers']['f']['calls'] == 1
+    assert 0 <= snap['timers']['t']['min'] <= snap['timers']['t']['mean'] <= snap['timers']['t']['max']
+    report = m.report()
+    assert 'x' in report and 't' in report and 'f' in report
+
+def test_plane_metrics(enabled_metrics):
+    plane = load_plane(conf_file='userdata/prop_final.json')
+    plane.flight.true_airspeed = 20.0
+    plane.cg_offset; plane.np_offset; plane.np_xfoil
+    snap = enabled_metrics.snapshot()
+    assert snap['counters']['plane.cg_offset'] >= 1
+    assert snap['timers']['plane.np_offset']['calls'] == 1
+    assert snap['timers']['plane.np_xfoil']['calls'] == 1
+
+def test_polar_metrics(enabled_metrics, tmp_path):
+    load_xfoil_dir('airfoil_data/naca0012', cache_dir=str(tmp_path), processes=1)
+    parsed = enabled_metrics.snapshot()['counters']['polars.files_parsed']
+    load_xfoil_dir('airfoil_data/naca0012', cache_dir=str(tmp_path), processes=1)
+    snap = enabled_metrics.snapshot()
+    assert snap['counters']['polars.files_parsed'] == parsed # the second load is served from the cache
+    assert snap['counters']['polars.cache_hits'] == parsed
+    assert snap['timers']['polars.load_dir']['calls'] == 2
+
+def test_level_spec(restore_logging):
+    configure("WARNING,polars=DEBUG", stream=io.StringIO())
+    assert get_logger('polars').isEnabledFor(logging.DEBUG)
+    assert not get_logger('gui').isEnabledFor(logging.INFO)
+    assert get_logger('gui').isEnabledFor(logging.WARNING)
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    logging.getLogger('planebuilder').addHandler(handler)
+    try:
+        get_logger('polars').debug("parsed %d files", 3)
+        get_logger('gui').info("hidden")
+    finally:
+        logging.getLogger('planebuilder').removeHandler(handler)
+    assert stream.getvalue() == "parsed 3 files\n"
+
+def test_configure_is_undone(restore_logging):
+    root = logging.getLogger('planebuilder')
+    assert root.propagate and not any(getattr(h, '_planebuilder', False) for h in root.handlers)
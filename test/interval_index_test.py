@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import random
+import pytest
+from loader_utils import load_plane
+from structure.interval_index import IntervalIndex
+
+def brute_overlapping(intervals, a, b):
+    return sorted((begin, name) for name, (begin, end) in intervals.items() if begin <= b and end >= a)
+
+def test_matches_brute_force():
+    rnd = random.Random(1)
+    index = IntervalIndex(seed=2)
+    intervals = {}
+    for step in range(2000):
+        name = f"item{rnd.randrange(300)}"
+        if name in intervals and rnd.random() < 0.3:
+            index.remove(name)
+            del intervals[name]
+        else:
+            begin = round(rnd.uniform(0, 10), 3)
+            intervals[name] = (begin, begin + round(rnd.uniform(0, 0.5), 3))
+            index.add(name, *intervals[name])
+        if step % 50 == 0:
+            a = rnd.uniform(-1, 11); b = a + rnd.uniform(0, 1)
+            assert index.overlapping(a, b) == [name for _, name in brute_overlapping(intervals, a, b)]
+            assert index.at(a) == [name for _, name in brute_overlapping(intervals, a, a)]
+            assert index.rightmost_end == max(end for _, end in intervals.values())
+    assert len(index) == len(intervals)
+
+def test_plane_keeps_index_in_sync():
+    plane = load_plane(conf_file='userdata/prop_final.json')
+    plane.add_equipment(name='battery', x_offset=1.0, length=0.1, mass=0.3)
+    plane.move_component(name='htail', distance=-0.1)
+    plane.resize_surface(name='wings', root_chord=0.3)
+    plane.remove_component(component_name='propeller')
+    fields = {'comp_name_orig_input': 'battery', 'comp_name_input': 'lipo', 'comp_mass_input': '0.3', \
+              'comp_width_input': '0.2', 'comp_x_offset_input': '1.1'}
+    plane.validate_param_update(input_fields=fields)
+    reference = IntervalIndex()
+    reference.rebuild(plane.x_axis)
+    for a, b in [(0.0, 0.0), (0.5, 1.2), (1.15, 1.15), (2.0, 2.6), (0.0, 2.6)]:
+        assert plane.elements_overlapping(a, b) == reference.overlapping(a, b)
+    assert plane.elements_at(1.2) == ['lipo']
+    assert plane.rightmost_end == max(elem['end'] for elem in plane.x_axis.values())
+    with pytest.raises(KeyError):
+        plane.x_index.remove('battery')
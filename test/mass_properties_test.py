@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import pytest
+from loader_utils import load_plane
+from structure.Plane import Plane
+
+def full_scan_cg(plane):
+    total_moment = plane.fuselage_mass * (plane.x_axis_len / 2)
+    total_mass = plane.fuselage_mass
+    for elem in plane.x_axis.values():
+        total_moment += (elem['begin'] + (elem['end'] - elem['begin'])/2) * elem['mass']
+        total_mass += elem['mass']
+    return total_moment / total_mass
+
+@pytest.fixture
+def plane():
+    return load_plane(conf_file='userdata/prop_final.json')
+
+def test_cg_tracks_edits(plane):
+    assert plane.cg_offset == pytest.approx(full_scan_cg(plane))
+    plane.add_equipment(name='camera', x_offset=1.2, length=0.1, mass=0.3)
+    plane.move_component(name='cargo', distance=0.2)
+    plane.remove_component(component_name='powerplant')
+    plane.add_equipment(name='camera', x_offset=0.5, length=0.2, mass=0.4) # replaces the first camera
+    assert plane.cg_offset == pytest.approx(full_scan_cg(plane))
+    assert plane.total_mass == pytest.approx(sum(e['mass'] for e in plane.x_axis.values()))
+
+def test_cg_after_param_update(plane):
+    fields = {'comp_name_orig_input': 'cargo', 'comp_name_input': 'payload', 'comp_mass_input': '2.0',
+              'comp_width_input': '0.3', 'comp_x_offset_input': '1.0'}
+    plane.validate_param_update(input_fields=fields)
+    assert plane.x_axis['payload']['mass'] == 2.0
+    assert plane.cg_offset == pytest.approx(full_scan_cg(plane))
+
+def test_moment_of_inertia_matches_point_sum():
+    plane = Plane(x_axis_len=2.0, flight=None)
+    plane.add_equipment(name='a', x_offset=0.0, length=0.0, mass=1.0)
+    plane.add_equipment(name='b', x_offset=2.0, length=0.0, mass=1.0)
+    assert plane.cg_offset == pytest.approx(1.0)
+    assert plane.moment_of_inertia == pytest.approx(2.0)
+    plane.fuselage_mass = 3.0 # uniform rod about its middle: m L^2 / 12
+    assert plane.moment_of_inertia == pytest.approx(3.0)
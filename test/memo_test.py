@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+import pytest
+from loader_utils import load_plane
+from structure.Wing import Wing
+from structure.flight import Flight
+from structure.memo import memo_stats, reset_memo_stats
+
+@pytest.fixture
+def wing():
+    plane = load_plane(conf_file='userdata/prop_final.json')
+    plane.flight.true_airspeed = 20.0
+    return plane.x_axis['wings']['obj']
+
+def fresh(wing, prop):
+    wing.invalidate_memo()
+    return getattr(wing, prop)
+
+def test_steady_state_reads_hit_the_memo(wing):
+    wing.D
+    reset_memo_stats(Wing)
+    for _ in range(10):
+        wing.D
+    assert memo_stats(wing)['D'] == {'hits': 10, 'misses': 0}
+    assert memo_stats(wing)['Cl']['misses'] == 0
+
+@pytest.mark.parametrize("field,value", [('true_airspeed', 27.5), ('pitch', 4.2), ('rho', 1.0), ('air_viscosity', 1.6e-5)])
+def test_flight_change_invalidates(wing, field, value):
+    before = {p: getattr(wing, p) for p in ['Re', 'Cl', 'Cdi', 'D', 'L']}
+    setattr(wing.flight, field, value)
+    after = {p: getattr(wing, p) for p in before}
+    assert after == {p: fresh(wing, p) for p in before}
+    assert after != before
+
+def test_geometry_change_invalidates(wing):
+    area, ar = wing.area, wing.aspect_ratio
+    wing.semispan = 1.0
+    assert wing.area == pytest.approx(area * 1.25)
+    assert wing.aspect_ratio != ar and wing.aspect_ratio == fresh(wing, 'aspect_ratio')
+
+def test_new_flight_object_invalidates(wing):
+    wing.Re
+    f = Flight()
+    f.true_airspeed = 10.0
+    wing.flight = f
+    assert wing.Re == pytest.approx(10.0 * wing.characteristic_length / f.air_viscosity)
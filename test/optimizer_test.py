@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+import pytest
+from loader_utils import load_plane
+from optimizer import LayoutEvaluator, default_variables, optimize_static_margin, apply_layout
+
+CONF_FILE = 'userdata/prop_final.json'
+
+@pytest.fixture
+def plane():
+    pl = load_plane(conf_file=CONF_FILE)
+    pl.flight.true_airspeed = 15.0
+    return pl
+
+def test_evaluator_matches_properties(plane):
+    evaluator = LayoutEvaluator(plane, default_variables(plane))
+    res = evaluator.evaluate(evaluator.initial_layout(plane))
+    assert res['cg_offset'][0] == pytest.approx(plane.cg_offset)
+    assert res['np_offset'][0] == pytest.approx(plane.np_offset)
+    assert res['static_margin'][0] == pytest.approx(plane.static_margin)
+    assert res['np_xfoil'][0] == pytest.approx(plane.np_xfoil)
+
+def test_optimizer_reaches_target(plane):
+    res = optimize_static_margin(plane, target=0.15, tol=1e-3)
+    assert res['converged']
+    assert res['evaluations'] > 0 and res['elapsed'] > 0
+    apply_layout(plane, res['layout'])
+    assert plane.static_margin == pytest.approx(0.15, abs=2e-3) # move_component rounds offsets to 0.1 mm
+    for name, elem in plane.x_axis.items():
+        assert 0 <= elem['begin'] and elem['end'] <= plane.x_axis_len
+
+def test_parallel_evaluation_is_identical(plane):
+    kwargs = {'target': 0.05, 'variables': ['wings', 'htail'], 'max_iterations': 5}
+    assert optimize_static_margin(plane, processes=1, **kwargs)['layout'] == \
+           optimize_static_margin(plane, processes=2, **kwargs)['layout']
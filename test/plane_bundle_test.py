@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import json
+import pytest
+import polar_registry
+from loader_utils import load_plane, save_plane
+from plane_bundle import is_bundle, read_bundle
+from structure.flight import Flight
+
+CONF_FILE = 'userdata/prop_final.json'
+
+@pytest.fixture
+def bundle_file(tmp_path):
+    plane = load_plane(conf_file=CONF_FILE)
+    bundle_file = tmp_path / 'prop_final.pbplane'
+    save_plane(conf_file=str(bundle_file), plane=plane, bundle=True)
+    return str(bundle_file)
+
+def test_bundle_round_trip(bundle_file, tmp_path):
+    assert is_bundle(bundle_file) and not is_bundle(CONF_FILE)
+    flight = Flight()
+    flight.true_airspeed = 20.0
+    original = load_plane(conf_file=CONF_FILE, preflight=flight)
+    flight = Flight()
+    flight.true_airspeed = 20.0
+    bundled = load_plane(conf_file=bundle_file, preflight=flight)
+    assert sorted(bundled.x_axis) == sorted(original.x_axis)
+    for prop in ['cg_offset', 'np_offset', 'np_xfoil', 'static_margin']:
+        assert getattr(bundled, prop) == getattr(original, prop)
+    for name in ['wings', 'htail']:
+        ours, theirs = bundled.x_axis[name]['obj'], original.x_axis[name]['obj']
+        assert ours.Cl == theirs.Cl and ours.Cm == theirs.Cm
+        assert dict(ours.cd_data[50000.0]) == dict(theirs.cd_data[50000.0])
+    json_file = tmp_path / 'plane.json'
+    save_plane(conf_file=str(json_file), plane=bundled) # back to plain JSON
+    with open(CONF_FILE) as f:
+        assert json.loads(json_file.read_text())['lifting_surfaces'] == json.load(f)['lifting_surfaces']
+
+def test_bundle_needs_no_polar_files(bundle_file, monkeypatch):
+    def fail(xfoil_data):
+        raise AssertionError(f"{xfoil_data} should come from the bundle")
+    monkeypatch.setattr(polar_registry.registry, 'get', fail)
+    plane = load_plane(conf_file=bundle_file)
+    assert not plane.polars_pending
+    assert plane.x_axis['wings']['obj'].cl_table is not None
+
+def test_bundle_arrays_are_views(bundle_file):
+    _, polars = read_bundle(bundle_file)
+    table = polars['airfoil_data/naca2412'].table
+    for grid in [table.cl, table.cd, table.cm]:
+        assert not grid.values.flags.owndata and not grid.values.flags.writeable # view into the mmap
+    assert table.alpha_grid[0] == -15.0
+    for grid in [table.cl, table.cd, table.cm]:
+        assert not grid.slopes.flags.owndata # stored in the bundle, not recomputed
+        assert '_rows' not in vars(grid) # scalar lookup lists are built on first use
+
+def test_bundle_builds_dicts_on_first_use(bundle_file):
+    _, polars = read_bundle(bundle_file)
+    airfoil = polars['airfoil_data/naca2412']
+    assert 'cl_data' not in vars(airfoil)
+    flight = Flight()
+    flight.true_airspeed = 20.0
+    plane = load_plane(conf_file=bundle_file, preflight=flight)
+    assert plane.np_xfoil is not None # looked up from the tables only
+    assert 'cl_data' not in vars(plane.x_axis['wings']['obj'].polars)
+    assert airfoil.cl_data[50000.0][0.0] == airfoil.table.cl(50000.0, 0.0)
+    assert airfoil.cd_data is vars(airfoil)['cd_data']
+
+def test_not_a_bundle(tmp_path):
+    bogus = tmp_path / 'bogus.pbplane'
+    bogus.write_bytes(b'PBPLANE1' + b'\x00' * 8)
+    with pytest.raises(ValueError):
+        read_bundle(str(bogus))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import os
+import pytest
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+from loader_utils import load_plane
+
+@pytest.fixture(scope='module')
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+@pytest.fixture
+def painter(app):
+    from EventController import EventController, ParamsEditor
+    from PlanePainter import PlanePainter
+    ec = EventController()
+    ec.set_params_editor(ParamsEditor(ec=ec))
+    pp = PlanePainter(src_img='res/fuselage_horiz2.png', ec=ec, status_label=QtWidgets.QLabel())
+    ec.set_plane_painter(pp)
+    plane = load_plane(conf_file='userdata/prop_final.json')
+    for item_no in range(50):
+        plane.add_equipment(name=f"item{item_no}", x_offset=0.3 + 0.03*item_no, length=0.04, mass=0.01)
+    pp.plane = plane
+    pp._repaintConfiguration()
+    yield pp
+    pp.shutdown() # one aero worker pool per painter
+
+def test_dirty_repaint_matches_full_repaint(painter):
+    painter.plane.move_component(name='cargo', distance=0.1)
+    painter.plane.move_component(name='htail', distance=-0.05)
+    painter._repaintConfiguration(setActive='item7')
+    painter.plane.remove_component(component_name='item3')
+    painter._repaintConfiguration(setActive='item8')
+    incremental = painter.modifPixmap.toImage()
+    painter._repaintConfiguration(setActive='item8', full=True)
+    assert incremental == painter.modifPixmap.toImage()
+
+def test_resources_are_decoded_once(painter, monkeypatch):
+    import PlanePainter
+    monkeypatch.setattr(PlanePainter, 'QPixmap', None) # any reload from disk would fail now
+    painter._repaintConfiguration(full=True)
+    assert [name for name, _ in painter.drawnComponents] == list(painter.plane.x_axis.keys())
+
+def test_click_selects_like_a_linear_scan(painter):
+    from PyQt5.QtCore import QEvent, QPoint, Qt
+    from PyQt5.QtGui import QMouseEvent
+    for x, y in [(10, 330), (250, 330), (340, 330), (700, 330), (740, 200), (400, 100)]:
+        expected = next((c for c in painter.drawnComponents if c[1].contains(x, y)), None)
+        painter.mousePressEvent(QMouseEvent(QEvent.MouseButtonPress, QPoint(x, y), Qt.LeftButton, Qt.LeftButton, Qt.NoModifier))
+        assert (painter.activeComponent and painter.activeComponent[0]) == (expected and expected[0])
+
+def test_repaint_requests_are_coalesced(painter, app, monkeypatch):
+    import time
+    repaints = []
+    orig_repaint = painter._repaintConfiguration
+    monkeypatch.setattr(painter, '_repaintConfiguration', lambda **kwargs: repaints.append(kwargs) or orig_repaint(**kwargs))
+    painter.activeComponent = ('cargo', None)
+    for direction in ['aft', 'aft', 'fore', 'aft']:
+        painter.move_component(direction)
+    painter.ec.request_repaint(setActive='item4')
+    assert repaints == []
+    deadline = time.perf_counter() + 2.0
+    while painter.ec.repaint_pending and time.perf_counter() < deadline:
+        app.processEvents()
+    assert repaints == [{'setActive': 'item4', 'refresh_editor': True}]
+    assert painter.paintedItems['item4']['key'][-1] # drawn as the active component
+
+def test_np_xfoil_marker_arrives_asynchronously(painter, app):
+    import time
+    painter.plane.flight.true_airspeed = 20.0
+    painter.refresh_overlay()
+    deadline = time.perf_counter() + 5.0
+    while (painter.aero_result is None or painter.aero_result['np_xfoil'] is None or painter.ec.repaint_pending) \
+          and time.perf_counter() < deadline:
+        app.processEvents()
+    assert painter.aero_result['np_xfoil'] == painter.plane.np_xfoil
+    assert ('res/np_xfoil_symbol40.png' in [item['state'][0] for key, item in painter.paintedItems.items() if key[0] == 'marker'])
+
+def test_opening_planes_back_to_back(painter, app, monkeypatch):
+    import time
+    import polar_registry
+    loader = polar_registry.registry.loader
+    def slow_loader(xfoil_data):
+        time.sleep(0.3)
+        return loader(xfoil_data)
+    monkeypatch.setattr(polar_registry.registry, 'loader', slow_loader)
+    polar_registry.registry.clear()
+    for name in ['project_name', 'centerline', 'fuselage_mass']:
+        painter.ec.set_global_parameter_input((name, QtWidgets.QLineEdit()))
+    painter.setPlane(data_file='userdata/prop_final.json')
+    first = painter.plane
+    painter.setPlane(data_file='userdata/prop_final.json') # while the first plane's polars still load
+    assert first.polars_pending and len(painter.polar_loaders) == 2
+    deadline = time.perf_counter() + 10.0
+    while painter.polar_loaders and time.perf_counter() < deadline:
+        app.processEvents()
+    assert not painter.polar_loaders
+    assert not painter.plane.polars_pending
+
+def test_shutdown_stops_the_aero_worker(painter, app):
+    import threading
+    painter.plane.flight.true_airspeed = 20.0
+    painter.refresh_overlay() # submits an evaluation, starting the worker
+    painter.shutdown()
+    assert not any(t.name.startswith('aero') for t in threading.enumerate())
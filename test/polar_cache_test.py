@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import io
+import os
+import shutil
+import threading
+import pytest
+import polar_cache
+from polar_cache import load_xfoil_dir, parse_xfoil_file, ingest_tree
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'airfoil_data', 'naca2412')
+
+@pytest.fixture
+def polar_dir(tmp_path):
+    xfoil_data = tmp_path / 'naca2412'
+    xfoil_data.mkdir()
+    for fname in ['50k.pol', '100k.pol']:
+        shutil.copy(os.path.join(SRC_DIR, fname), xfoil_data / fname)
+    return {'xfoil_data': str(xfoil_data), 'cache_dir': str(tmp_path / 'cache')}
+
+def test_parse_xfoil_file():
+    reynolds_num, rows = parse_xfoil_file(os.path.join(SRC_DIR, '100k.pol'))
+    assert reynolds_num == 100000.0
+    assert rows.shape[1] == 4
+    assert tuple(rows[0]) == (-15.0, -0.5428, 0.1779, -0.0113)
+
+def test_warm_cache_skips_parsing(polar_dir, monkeypatch):
+    cold = load_xfoil_dir(polar_dir['xfoil_data'], cache_dir=polar_dir['cache_dir'])
+    def fail(path):
+        raise AssertionError(f"{path} should have been served from the cache")
+    monkeypatch.setattr(polar_cache, 'parse_xfoil_file', fail)
+    warm = load_xfoil_dir(polar_dir['xfoil_data'], cache_dir=polar_dir['cache_dir'])
+    assert [r for r, _ in cold] == [r for r, _ in warm]
+    for (_, cold_rows), (_, warm_rows) in zip(cold, warm):
+        assert (cold_rows == warm_rows).all()
+        assert not warm_rows.flags.writeable # view into the mmap
+
+def test_changed_file_is_reparsed(polar_dir, monkeypatch):
+    load_xfoil_dir(polar_dir['xfoil_data'], cache_dir=polar_dir['cache_dir'])
+    changed = os.path.join(polar_dir['xfoil_data'], '50k.pol')
+    with open(changed, 'a') as f:
+        f.write("\n")
+    parsed = []
+    orig_parse = polar_cache.parse_xfoil_file
+    monkeypatch.setattr(polar_cache, 'parse_xfoil_file', lambda path: parsed.append(path) or orig_parse(path))
+    load_xfoil_dir(polar_dir['xfoil_data'], cache_dir=polar_dir['cache_dir'])
+    assert parsed == [os.path.abspath(changed)]
+
+def test_ingest_tree_in_parallel(tmp_path, monkeypatch):
+    root = tmp_path / 'airfoils'
+    for airfoil in ['naca0012', 'naca2412']:
+        shutil.copytree(os.path.join(SRC_DIR, '..', airfoil), root / airfoil)
+    cache_dir = str(tmp_path / 'cache')
+    summary = ingest_tree(str(root), cache_dir=cache_dir, processes=2)
+    assert sorted(summary.values()) == [9, 10]
+    monkeypatch.setattr(polar_cache, 'parse_xfoil_file', None) # everything must come from the cache now
+    warm = load_xfoil_dir(str(root / 'naca0012'), cache_dir=cache_dir)
+    assert sorted(r for r, _ in warm) == sorted(parse_xfoil_file(str(p))[0] for p in (root / 'naca0012').glob('*.pol'))
+
+def test_parse_from_buffer():
+    buf = io.StringIO(" Mach =   0.000     Re =     0.420 e 6     Ncrit =   9.000\n"
+                      "   alpha    CL        CD       CDp       CM     Top_Xtr  Bot_Xtr\n"
+                      "  ------ -------- --------- --------- -------- -------- --------\n"
+                      "  -1.200  -0.0133   0.00590   0.00100  -0.0510   0.7000   0.9000\n"
+                      "   0.000   0.2516   0.00561   0.00098  -0.0530   0.6000   1.0000\n")
+    reynolds_num, rows = parse_xfoil_file(buf)
+    assert reynolds_num == 420000.0
+    assert rows.tolist() == [[-1.2, -0.0133, 0.0059, -0.051], [0.0, 0.2516, 0.00561, -0.053]]
+
+def test_concurrent_writes_of_one_cache(polar_dir):
+    cache_file = polar_cache.cache_file_for(polar_dir['xfoil_data'], cache_dir=polar_dir['cache_dir'])
+    load_xfoil_dir(polar_dir['xfoil_data'], cache_dir=polar_dir['cache_dir'])
+    entries = polar_cache.read_cache(cache_file)
+    errors = []
+    def write():
+        try:
+            for _ in range(20):
+                polar_cache.write_cache(cache_file, entries)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert sorted(polar_cache.read_cache(cache_file)) == sorted(entries)
+    assert os.listdir(os.path.dirname(cache_file)) == [os.path.basename(cache_file)] # no temporary files left behind
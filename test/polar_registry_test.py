@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import pytest
+from polar_registry import AirfoilPolars, PolarRegistry
+from polar_table import ALPHA_GRID
+from structure.Wing import Wing
+from structure.flight import Flight
+
+def fake_loader(xfoil_data):
+    table = {Re: {aoa: 0.1*aoa for aoa in ALPHA_GRID} for Re in [100000.0, 200000.0]}
+    return AirfoilPolars(xfoil_data=xfoil_data, cl_data=table, cd_data=table, cm_data=table)
+
+def test_same_directory_is_interned():
+    reg = PolarRegistry(loader=fake_loader)
+    assert reg.get('airfoil_data/naca2412') is reg.get('./airfoil_data/naca2412/')
+    assert reg.stats()['misses'] == 1 and reg.stats()['hits'] == 1
+
+def test_tables_are_read_only():
+    polars = fake_loader('naca')
+    with pytest.raises(TypeError):
+        polars.cl_data[100000.0][0.0] = 1.0
+
+def test_lru_eviction_keeps_budget():
+    entry_size = fake_loader('x').nbytes
+    reg = PolarRegistry(max_bytes=2*entry_size, loader=fake_loader)
+    reg.get('a'); reg.get('b'); reg.get('a'); reg.get('c')
+    assert 'a' in reg and 'c' in reg and 'b' not in reg
+    assert reg.nbytes <= reg.max_bytes
+    assert reg.evictions == 1
+
+def test_wings_share_polars():
+    f = Flight()
+    params = {'characteristic_length': 0.32, 'ref_area': 0.5, 'mass': 1.0, 'root_chord': 0.32,
+              'semispan': 0.8, 'thickness': 0.0376, 'xfoil_data': 'airfoil_data/naca2412'}
+    w1 = Wing(params_dict={**params, 'name': 'wings'}, flight=f)
+    w2 = Wing(params_dict={**params, 'name': 'htail'}, flight=f)
+    w1.load_xfoil_data(); w2.load_xfoil_data()
+    assert w1.cl_data is w2.cl_data
+
+def test_lazy_plane_loads_polars_on_demand():
+    from loader_utils import load_plane
+    plane = load_plane(conf_file='userdata/prop_final.json', lazy_polars=True)
+    wing = plane.x_axis['wings']['obj']
+    assert plane.polars_pending and wing._polars is None
+    plane.prefetch_polars()
+    assert not plane.polars_pending
+    assert wing.cl_data is wing.polars.cl_data
+
+def test_concurrent_prefetch_parses_each_file_once(tmp_path, monkeypatch):
+    import glob
+    import threading
+    import polar_cache
+    from polar_registry import AirfoilPolars
+    monkeypatch.setenv('PLANEBUILDER_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(polar_cache, 'PARALLEL_MIN_FILES', 10**6) # parse in this process, where we can count
+    parse = polar_cache.parse_xfoil_file
+    parsed = []
+    monkeypatch.setattr(polar_cache, 'parse_xfoil_file', lambda path: parsed.append(path) or parse(path))
+    reg = PolarRegistry(loader=AirfoilPolars.from_xfoil_dir)
+    dirs = ['airfoil_data/naca2412', 'airfoil_data/naca0012']
+    threads = [threading.Thread(target=reg.prefetch, args=(dirs,)) for _ in range(8)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    n_files = sum(len(glob.glob(f"{d}/*.pol")) for d in dirs)
+    assert len(parsed) == len(set(parsed)) == n_files
+    assert reg.stats()['misses'] == 2
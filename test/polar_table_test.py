@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import pytest
+import numpy as np
+from aerodynamic_utils import interpolate_2d_linear, dCl_da, dCm_da
+from polar_table import ALPHA_GRID, PolarTable, bracket, fill_alpha_gaps
+
+@pytest.fixture
+def tables():
+    re_known = [50000.0, 100000.0, 420000.0, 850000.0]
+    cl_data = {Re: {aoa: 0.1*aoa + Re*1e-7 + 0.001*aoa*aoa for aoa in ALPHA_GRID} for Re in re_known}
+    return cl_data, PolarTable.from_dicts(cl_data=cl_data, cd_data=cl_data, cm_data=cl_data)
+
+def test_bracket():
+    assert bracket([1.0, 2.0, 4.0], 3.0) == (1, 0.5)
+    assert bracket([1.0, 2.0, 4.0], 0.0) == (0, -1.0) # extrapolates from the first cell
+    assert bracket([1.0, 2.0, 4.0], 4.0) == (1, 1.0)
+
+@pytest.mark.parametrize("Re,aoa", [(60000.0, 2.33), (100000.0, 0.0), (300000.0, -13.96), (30000.0, 5.05), (400000.0, 11.87)])
+def test_matches_reference(tables, Re, aoa):
+    cl_data, table = tables
+    assert table.cl(Re, aoa) == pytest.approx(interpolate_2d_linear(dict_fn=cl_data, Re=Re, aoa=aoa))
+
+def test_grid_shape(tables):
+    _, table = tables
+    assert table.cl.values.shape == (4, len(ALPHA_GRID))
+
+def test_batch_matches_scalar(tables):
+    _, table = tables
+    Re = np.array([30000.0, 60000.0, 300000.0, 900000.0])
+    aoa = np.array([-16.0, 2.33, -13.96, 11.87])
+    cl, cd, cm = table.batch(Re, aoa)
+    assert cl.shape == (4,)
+    assert cl == pytest.approx([table.cl(r, a) for r, a in zip(Re, aoa)])
+
+def test_batch_broadcasts_to_grid(tables):
+    _, table = tables
+    cl = table.cl.batch(np.linspace(5e4, 8e5, 7)[:, None], np.linspace(-10, 10, 5)[None, :])
+    assert cl.shape == (7, 5)
+
+@pytest.mark.parametrize("Re,aoa", [(60000.0, 2.33), (300000.0, -13.96), (400000.0, 7.42)])
+def test_slope_matches_forward_difference(tables, Re, aoa):
+    cl_data, table = tables
+    assert dCl_da(table.cl, Re, aoa) == pytest.approx(dCl_da(cl_data, Re, aoa), rel=1e-6)
+    assert table.cl.slope_batch([Re], [aoa])[0] == pytest.approx(table.cl.slope(Re, aoa))
+
+@pytest.mark.parametrize("Re,aoa", [(60000.0, 2.33), (300000.0, -13.96), (400000.0, 7.42)])
+def test_cm_slope_matches_forward_difference(tables, Re, aoa):
+    cl_data, _ = tables
+    cm_data = {Re: {aoa: -0.02*aoa - Re*1e-8 + 0.0005*aoa*aoa for aoa in ALPHA_GRID} for Re in cl_data}
+    table = PolarTable.from_dicts(cl_data=cl_data, cd_data=cl_data, cm_data=cm_data)
+    assert dCm_da(table.cm, Re, aoa) == pytest.approx(dCm_da(cm_data, Re, aoa), rel=1e-6)
+    assert dCm_da(table.cm, Re, aoa) == pytest.approx(-0.02 + 0.001*aoa, abs=1e-3) # the Cm curve, not Cl's
+
+def test_fill_alpha_gaps():
+    rows = np.array([[-1.0, -0.1, 0.01, 0.0], [0.0, 0.0, 0.02, 0.0], [0.2, 0.2, 0.04, 0.0], [0.2, 0.3, 0.05, 0.0]])
+    filled = fill_alpha_gaps(rows, alpha_grid=[-1.1, 0.0, 0.1, 0.3])
+    assert filled[:, 0] == pytest.approx([-0.11, 0.0, 0.15, 0.45]) # repeated 0.2 keeps the last row
+    assert filled[:, 1] == pytest.approx([0.009, 0.02, 0.035, 0.065])
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import pytest
+import numpy as np
+from loader_utils import load_plane
+from optimizer import LayoutEvaluator
+from sensitivity import layout_jacobian, predict_change
+
+CONF_FILE = 'userdata/prop_final.json'
+EPS = 1e-6
+
+@pytest.fixture
+def plane():
+    pl = load_plane(conf_file=CONF_FILE)
+    pl.flight.true_airspeed = 15.0
+    return pl
+
+def test_layout_derivatives_match_finite_differences(plane):
+    jac = layout_jacobian(plane)
+    variables = [name for name in plane.x_axis] + ['wings.chord', 'wings.semispan', 'htail.chord', 'htail.semispan']
+    evaluator = LayoutEvaluator(plane, variables)
+    x0 = evaluator.initial_layout(plane)
+    steps = np.vstack([x0 + EPS*np.eye(len(x0)), x0 - EPS*np.eye(len(x0))])
+    res = evaluator.evaluate(steps)
+    for output in ['cg_offset', 'np_offset', 'np_xfoil', 'static_margin']:
+        numeric = (res[output][:len(x0)] - res[output][len(x0):]) / (2*EPS)
+        for var, expected in zip(variables, numeric):
+            assert jac[output][var] == pytest.approx(expected, rel=1e-5, abs=1e-8), (output, var)
+
+def test_mass_derivatives(plane):
+    jac = layout_jacobian(plane)
+    cg0 = plane.cg_offset
+    plane.x_axis['cargo']['mass'] += EPS
+    plane.mass_props.rebuild(plane.x_axis)
+    assert jac['cg_offset']['cargo.mass'] == pytest.approx((plane.cg_offset - cg0) / EPS, rel=1e-4)
+    assert jac['np_offset']['cargo.mass'] == 0.0
+
+def test_predict_change(plane):
+    jac = layout_jacobian(plane)
+    predicted = predict_change(jac, {'htail': 0.05})
+    sm0 = plane.static_margin
+    plane.move_component(name='htail', distance=0.05)
+    assert sm0 + predicted['static_margin'] == pytest.approx(plane.static_margin) # linear in the offsets
+    with pytest.raises(ValueError):
+        predict_change(jac, {'nonexistent': 1.0})
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import pytest
+import numpy as np
+from loader_utils import load_plane
+from simulation import FlightSimulator, BatchSimulator
+
+CONF_FILE = 'userdata/prop_final.json'
+
+@pytest.fixture
+def plane():
+    pl = load_plane(conf_file=CONF_FILE)
+    pl.flight.true_airspeed = 15.0
+    pl.flight.thrust = 2.0
+    return pl
+
+def test_derivatives_match_properties(plane):
+    plane.flight.pitch = 1.5
+    sim = FlightSimulator(plane)
+    dv, dpitch, _ = sim.derivatives(sim.initial_state)
+    drag = sum(plane.x_axis[name]['obj'].D for name in ['wings', 'htail'])
+    assert dv == pytest.approx((plane.flight.thrust - drag) / (plane.fuselage_mass + plane.total_mass))
+    assert dpitch == plane.angular_velocity
+
+def test_trajectory_arrays(plane):
+    res = FlightSimulator(plane).run(duration=2.0, dt=0.05, method='euler')
+    assert len(res['t']) == 41
+    assert res['t'][-1] == pytest.approx(2.0)
+    assert res['true_airspeed'][0] == 15.0
+    assert all(len(res[key]) == 41 for key in ['true_airspeed', 'pitch', 'angular_velocity'])
+
+def test_integrators_converge(plane):
+    sim = FlightSimulator(plane)
+    reference = sim.run(duration=3.0, dt=0.001, method='rk4')
+    for method, dt in [('rk4', 0.05), ('rk45', 0.05)]:
+        res = sim.run(duration=3.0, dt=dt, method=method)
+        assert res['t'][-1] == pytest.approx(3.0)
+        for key in ['true_airspeed', 'pitch', 'angular_velocity']:
+            assert res[key][-1] == pytest.approx(reference[key][-1], abs=1e-2) # the polar tables are only piecewise linear
+    euler = sim.run(duration=3.0, dt=0.05, method='euler')
+    assert abs(euler['pitch'][-1] - reference['pitch'][-1]) > 1.0
+
+def test_tick_is_one_euler_step(plane):
+    expected = FlightSimulator(plane).run(duration=plane.TIME_INCR, dt=plane.TIME_INCR, method='euler')
+    plane._tick()
+    assert plane.flight.true_airspeed == expected['true_airspeed'][-1]
+    assert plane.flight.pitch == expected['pitch'][-1]
+    assert plane.angular_velocity == expected['angular_velocity'][-1]
+
+def test_unknown_method(plane):
+    with pytest.raises(ValueError):
+        FlightSimulator(plane).run(duration=1.0, method='leapfrog')
+
+def test_adaptive_run_fails_loudly(plane):
+    sim = FlightSimulator(plane)
+    with pytest.raises(RuntimeError, match="No convergence"):
+        sim.run(duration=3.0, dt=0.05, method='rk45', max_steps=10)
+    sim.derivatives = lambda state: (float('nan'),) * 3
+    with pytest.raises(RuntimeError, match="Step size underflow"):
+        sim.run(duration=3.0, dt=0.05, method='rk45')
+
+def test_batch_matches_single_planes():
+    planes = []
+    for no in range(3):
+        pl = load_plane(conf_file=CONF_FILE)
+        pl.flight.true_airspeed = 12.0 + 3*no
+        pl.flight.thrust = 2.0
+        pl.move_component(name='wings', distance=0.01*no)
+        planes.append(pl)
+    planes[2].remove_component(component_name='htail') # fewer surfaces than the others
+    res = BatchSimulator(planes).run(duration=2.0, dt=0.05)
+    assert res['pitch'].shape == (41, 3)
+    for no, pl in enumerate(planes):
+        single = FlightSimulator(pl).run(duration=2.0, dt=0.05)
+        for key in ['true_airspeed', 'pitch', 'angular_velocity']:
+            assert np.allclose(res[key][:, no], single[key], rtol=1e-12, atol=1e-12)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import pytest
+import numpy as np
+from loader_utils import load_plane
+from sweep import sweep_envelope, evaluate_altitude_grid
+
+CONF_FILE = 'userdata/prop_final.json'
+
+@pytest.fixture(scope='module')
+def grid():
+    return {'tas': np.linspace(5.0, 35.0, 7), 'pitch': np.linspace(-6.0, 6.0, 5)}
+
+def test_sweep_matches_properties(grid):
+    res = sweep_envelope(conf_file=CONF_FILE, tas=grid['tas'], pitch=grid['pitch'], processes=1)
+    plane = load_plane(conf_file=CONF_FILE)
+    plane.flight.true_airspeed = grid['tas'][3]
+    plane.flight.pitch = grid['pitch'][1]
+    wing = plane.x_axis['wings']['obj']
+    assert res['wings']['Re'].shape == (7, 5)
+    for q in ['Re', 'Cl', 'Cdi', 'Cdp', 'L', 'D']:
+        assert res['wings'][q][3, 1] == pytest.approx(getattr(wing, q))
+    assert res['np_xfoil'][3, 1] == pytest.approx(plane.np_xfoil)
+
+def test_sharded_sweep_is_identical(grid):
+    serial = sweep_envelope(conf_file=CONF_FILE, tas=grid['tas'], pitch=grid['pitch'], processes=1)
+    sharded = sweep_envelope(conf_file=CONF_FILE, tas=grid['tas'], pitch=grid['pitch'], processes=2)
+    assert np.array_equal(serial['np_xfoil'], sharded['np_xfoil'])
+    assert np.array_equal(serial['htail']['L'], sharded['htail']['L'])
+
+def test_altitude_grid_matches_properties():
+    altitude = np.linspace(0.0, 4000.0, 5)
+    tas = np.linspace(10.0, 30.0, 3)
+    plane = load_plane(conf_file=CONF_FILE)
+    res = evaluate_altitude_grid(plane, altitude=altitude, tas=tas, pitch=2.0, temperature_offset=5.0)
+    assert res['wings']['Re'].shape == (5, 3) and res['np_xfoil'].shape == (5, 3)
+    plane.flight.set_atmosphere(altitude=altitude[3], temperature_offset=5.0)
+    plane.flight.true_airspeed = tas[1]
+    plane.flight.pitch = 2.0
+    assert res['atmosphere']['rho'][3] == pytest.approx(plane.flight.rho)
+    for name in ['wings', 'htail']:
+        surface = plane.x_axis[name]['obj']
+        for q in ['Re', 'Cl', 'Cdi', 'Cdp', 'L', 'D']:
+            assert res[name][q][3, 1] == pytest.approx(getattr(surface, q))
+    assert res['np_xfoil'][3, 1] == pytest.approx(plane.np_xfoil)